@@ -6,6 +6,25 @@ MAX_GIFT_NUMBER = 500000
 MAX_WITHDRAW_AMOUNT = 500
 INLINE_IMAGE_URL = "https://store.nestdex.dev/media/inline_image.jpg"
 DEFAULT_AVATAR_URL = "https://store.nestdex.dev/media/default.png"
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENT_REPLAYED_HEADER = "Idempotent-Replayed"
+DB_QUERIES_HEADER = "X-DB-Queries"
+DB_ROWS_HEADER = "X-DB-Rows"
+DB_TIME_HEADER = "X-DB-Time"
+DB_REPEATED_QUERIES_HEADER = "X-DB-Repeated-Queries"
+RECENT_BIDS_LIMIT = 10
+MARKET_CACHE_VERSION_KEY = "market:version"
+MARKET_EVENTS_CHANNEL = "market:events"
+MARKET_EVENTS_KEEPALIVE = 15
+USERS_INVALIDATION_CHANNEL = "users:invalidate"
+AUCTION_SCHEDULE_KEY = "auctions:end_time"
+PRIMARY_PIN_KEY_PREFIX = "db:primary_pin:"
+TELEGRAM_CHANNEL_KEY_PREFIX = "telegram:channel:"
+TELEGRAM_FILE_URL_KEY_PREFIX = "telegram:file_url:"
+TELEGRAM_CHANNEL_REFRESH_LOCK_TTL = 30
+TRANSFER_PURCHASE_JOB = "transfer_purchase"
+LEDGER_TOLERANCE = 1e-6
 
 
 class OrderStatus(StrEnum):
@@ -16,6 +35,46 @@ class OrderStatus(StrEnum):
     GIFT_RECEIVED = auto()
 
 
+class PurchaseStatus(StrEnum):
+    RESERVED = auto()
+    TRANSFERRING = auto()
+    COMPLETED = auto()
+    FAILED = auto()
+    REVIEW = auto()
+
+
+class GiftTransferResult(StrEnum):
+    SENT = auto()
+    REJECTED = auto()
+    UNKNOWN = auto()
+
+
+class LedgerRecordType(StrEnum):
+    OPENING_BALANCE = auto()
+    DEPOSIT = auto()
+    WITHDRAW = auto()
+    ADJUSTMENT = auto()
+    LISTING_FEE = auto()
+    PURCHASE = auto()
+    PURCHASE_REFUND = auto()
+    SALE = auto()
+    BID = auto()
+    BID_REFUND = auto()
+    STAR_PURCHASE = auto()
+    STAR_REFUND = auto()
+    STAR_SALE = auto()
+    REFERRAL_REWARD = auto()
+    GIVEAWAY_TICKETS = auto()
+
+
+class MarketEventType(StrEnum):
+    LISTING_CREATED = auto()
+    PRICE_CHANGED = auto()
+    SOLD = auto()
+    DELISTED = auto()
+    NEW_BID = auto()
+
+
 class OrderType(StrEnum):
     ALL = auto()
     BUY = auto()
@@ -0,0 +1,16 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from json import dumps, loads
+
+
+def encode_cursor(data: dict) -> str:
+    raw = dumps(data, separators=(",", ":"), default=str).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict | None:
+    try:
+        data = loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (BinasciiError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
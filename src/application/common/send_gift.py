@@ -2,20 +2,32 @@ from aiogram import Bot
 from pyrogram.client import Client
 from pyrogram.errors import BadRequest, PeerIdInvalid, RPCError
 
+from src.application.common.const import GiftTransferResult
 from src.application.common.utils import send_message
 from src.entrypoint.config import Config
 
 
-async def send_gift(user_id: int, gift_id: int, client: Client, bot: Bot, config: Config) -> bool:
-    is_success, message = False, None
+async def transfer_gift(
+    user_id: int, gift_id: int, client: Client, bot: Bot, config: Config
+) -> GiftTransferResult:
+    """Sends a gift and tells a definite rejection apart from an unknown outcome.
+
+    Telegram answered with an error only on PeerIdInvalid and BadRequest, anything else
+    (flood waits, server errors, timeouts) may have happened after the gift was moved.
+    """
+
+    result, message = GiftTransferResult.UNKNOWN, None
 
     try:
         is_success = await client.transfer_gift(gift_id, user_id)
+        result = GiftTransferResult.SENT if is_success else GiftTransferResult.REJECTED
     except (PeerIdInvalid, ValueError) as e:
+        result = GiftTransferResult.REJECTED
         message = (
             f"PeerIdInvalid when sending a gift. user id: {user_id}, gift message_id: {gift_id}\n\n{e}"
         )
     except BadRequest as e:
+        result = GiftTransferResult.REJECTED
         message = f"TelegramBadRequest when sending a gift. user id: {user_id}, gift message_id: {gift_id}\n\n{e}"
     except RPCError as e:
         message = f"RPCError when sending a gift. user id: {user_id}, gift message_id: {gift_id}\n\n{e}"
@@ -24,4 +36,8 @@ async def send_gift(user_id: int, gift_id: int, client: Client, bot: Bot, config
 
     if message:
         await send_message(bot, message, config.bot.owners_chat_id, parse_mode=None)
-    return is_success
+    return result
+
+
+async def send_gift(user_id: int, gift_id: int, client: Client, bot: Bot, config: Config) -> bool:
+    return await transfer_gift(user_id, gift_id, client, bot, config) is GiftTransferResult.SENT
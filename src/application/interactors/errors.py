@@ -32,3 +32,7 @@ class GiveawaySubscriptionError(Exception):
 
 class GiveawayAdminError(Exception):
     pass
+
+
+class InvalidCursorError(Exception):
+    pass
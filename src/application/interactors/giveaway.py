@@ -2,10 +2,12 @@ from asyncio import gather
 from datetime import datetime, timezone
 
 from aiogram import Bot
-from aiogram.exceptions import TelegramAPIError
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
 from aiogram.types.input_file import FSInputFile
+from pydantic import ValidationError
 
-from src.application.common.const import DEFAULT_AVATAR_URL, GiveawayType
+from src.application.common.const import DEFAULT_AVATAR_URL, GiveawayType, LedgerRecordType
+from src.application.common.cursor import decode_cursor, encode_cursor
 from src.application.common.utils import (
     build_direct_link,
     get_file_logger,
@@ -17,10 +19,12 @@ from src.application.dto.giveaway import CreateGiveawayDTO, JoinGiveawayDTO
 from src.application.interactors.errors import (
     GiveawayAdminError,
     GiveawaySubscriptionError,
+    InvalidCursorError,
     NotAccessError,
     NotEnoughBalanceError,
     NotFoundError,
 )
+from src.application.interfaces.cache import ChannelCache
 from src.application.interfaces.database import DBSession
 from src.application.interfaces.giveaway import GiveawayManager, GiveawayReader, GiveawaySaver
 from src.application.interfaces.interactor import Interactor
@@ -31,7 +35,10 @@ from src.domain.entities.giveaway import (
     CreateGiveawayDM,
     FullGiveawayDM,
     GiveawayDM,
+    GiveawayEntryDM,
+    GiveawayParticipantCursorDM,
     GiveawayParticipantDM,
+    GiveawayParticipantsPageDM,
     TelegramChannelDM,
 )
 from src.domain.entities.user import UpdateUserBalanceDM, UserDM
@@ -140,84 +147,114 @@ class GiveawayJoinInteractor(Interactor[JoinGiveawayDTO, None]):
         giveaway = await self._giveaway_gateway.get_one(id=data.id)
         if not giveaway or giveaway.end_time < datetime.now(tz=timezone.utc):
             raise NotFoundError("Giveaway not found")
-        participants_ids = giveaway.participants_ids
-        referrers_ids = giveaway.referrers_ids
-        if (
-            giveaway.user_id == self._user.id
-            or giveaway.type is not GiveawayType.SUBSCRIPTION_PAID_TICKET
-            and self._user.id in giveaway.participants_ids
+        is_ticket_giveaway = giveaway.type is GiveawayType.SUBSCRIPTION_PAID_TICKET
+        if giveaway.user_id == self._user.id or (
+            not is_ticket_giveaway
+            and await self._giveaway_gateway.is_participant(giveaway.id, self._user.id)
         ):
             raise NotAccessError("Forbidden")
 
+        for channel_username in giveaway.channels_usernames:
+            if not await is_subscriber(self._bot, f"@{channel_username}", self._user.id):
+                raise GiveawaySubscriptionError("The conditions of the giveaway are not fulfilled")
+
+        referrer_id = None
         if data.referrer_id and giveaway.type is GiveawayType.SUBSCRIPTION_LIVE:
-            referrers_ids.append(data.referrer_id)
+            referrer_id = data.referrer_id
+        entry = GiveawayEntryDM(
+            giveaway_id=giveaway.id,
+            user_id=self._user.id,
+            tickets=data.count_tickets if is_ticket_giveaway else 1,
+            referrer_id=referrer_id,
+        )
+        if not await self._giveaway_gateway.add_entry(
+            entry, giveaway.quantity_members, add_tickets=is_ticket_giveaway
+        ):
+            # a concurrent join of the same user lands here as well, it is not a full giveaway
+            if not is_ticket_giveaway and await self._giveaway_gateway.is_participant(
+                giveaway.id, self._user.id
+            ):
+                raise NotAccessError("Forbidden")
+            raise NotAccessError("There are too many participants")
+
         if giveaway.type is not GiveawayType.SUBSCRIPTION_LIVE:
             if not await self._user_gateway.get_referrer(self._user.id):
                 await self._user_gateway.add_referral(giveaway.user_id, self._user)
             else:
                 await self._user_gateway.update_referrer(giveaway.user_id, self._user)
 
-        if (
-            giveaway.quantity_members
-            and len(participants_ids) + data.count_tickets > giveaway.quantity_members
-        ):
-            raise NotAccessError("There are too many participants")
-
         if giveaway.price > 0:
             price = data.count_tickets * giveaway.price
             user = await self._user_gateway.update_balance(
-                UpdateUserBalanceDM(id=self._user.id, amount=-price)
+                UpdateUserBalanceDM(
+                    id=self._user.id,
+                    amount=-price,
+                    type=LedgerRecordType.GIVEAWAY_TICKETS,
+                    reference_id=giveaway.id,
+                )
             )
             if user and user.balance < 0:
                 raise NotEnoughBalanceError("User does not have enough balance")
 
-        for channel_username in giveaway.channels_usernames:
-            if not await is_subscriber(self._bot, f"@{channel_username}", self._user.id):
-                raise GiveawaySubscriptionError("The conditions of the giveaway are not fulfilled")
-            participants_ids.append(self._user.id)
-
-        await self._giveaway_gateway.update_giveaway(
-            {"participants_ids": participants_ids, "referrers_ids": referrers_ids}, id=giveaway.id
-        )
-
         await self._db_session.commit()
 
 
-class GetGiveawayParticipantsInteractor(Interactor[int, list[GiveawayParticipantDM]]):
+class GetGiveawayParticipantsInteractor(Interactor):
     def __init__(self, giveaway_gateway: GiveawayReader, user_gateway: UserReader) -> None:
         self._giveaway_gateway = giveaway_gateway
         self._user_gateway = user_gateway
 
-    async def __call__(self, giveaway_id: int) -> list[GiveawayParticipantDM]:
+    async def __call__(
+        self, giveaway_id: int, limit: int, cursor: str | None
+    ) -> GiveawayParticipantsPageDM:
         giveaway = await self._giveaway_gateway.get_one(id=giveaway_id)
         if not giveaway:
             raise NotFoundError("Giveaway not found")
-        tasks = [self._user_gateway.get_by_id(id) for id in giveaway.participants_ids]
-        count_referrers, count_participants = len(giveaway.referrers_ids), len(giveaway.participants_ids)
-        participants = await gather(*tasks)
-        all_win = len(giveaway.gifts_ids) >= count_participants
-        result = []
-        for participant in participants:
-            if not participant:
-                continue
-            chance_win = 100 / count_participants
-            count_participant_referrals = giveaway.referrers_ids.count(participant.id)
-            if count_participant_referrals:
-                chance_win += (count_participant_referrals / (4 * count_referrers)) * 100
-            chance_win = min(chance_win, 95)
-            if all_win:
-                chance_win = 100
-            result.append(
-                GiveawayParticipantDM(
-                    id=participant.id,
-                    photo_url=participant.photo_url,
-                    name=participant.first_name,
-                    count_referrals=count_participant_referrals,
-                    chance_win=chance_win,
-                    is_win=participant.id in giveaway.winners_ids,
+        entries = await self._giveaway_gateway.get_entries(
+            giveaway_id, limit, self._decode_cursor(cursor) if cursor else None
+        )
+        users_ids = [entry.user_id for entry in entries]
+        users = {user.id: user for user in await self._user_gateway.get_by_ids(users_ids)}
+        referrals = await self._giveaway_gateway.get_referral_counts(giveaway_id, users_ids)
+
+        # a ticket is worth its share of all tickets, a referral a quarter of its share of all
+        # referrals, the totals are of the whole giveaway and not of the page
+        all_win = len(giveaway.gifts_ids) >= giveaway.count_tickets
+        ticket_chance = 100 / giveaway.count_tickets if giveaway.count_tickets else 0
+        referral_chance = 25 / giveaway.count_referrals if giveaway.count_referrals else 0
+        winners_ids = set(giveaway.winners_ids)
+        participants = [
+            GiveawayParticipantDM(
+                id=user.id,
+                photo_url=user.photo_url,
+                name=user.first_name,
+                count_referrals=referrals.get(user.id, 0),
+                chance_win=100
+                if all_win
+                else min(
+                    entry.tickets * ticket_chance + referrals.get(user.id, 0) * referral_chance,
+                    95,
                 ),
+                is_win=user.id in winners_ids,
+            )
+            for entry in entries
+            if (user := users.get(entry.user_id))
+        ]
+
+        next_cursor = None
+        if len(entries) == limit:
+            next_cursor = encode_cursor(
+                {"created_at": entries[-1].created_at, "user_id": entries[-1].user_id}
             )
-        return result
+        return GiveawayParticipantsPageDM(participants=participants, next_cursor=next_cursor)
+
+    def _decode_cursor(self, cursor: str) -> GiveawayParticipantCursorDM:
+        if not (data := decode_cursor(cursor)):
+            raise InvalidCursorError("Cursor is invalid")
+        try:
+            return GiveawayParticipantCursorDM(**data)
+        except ValidationError:
+            raise InvalidCursorError("Cursor is invalid")
 
 
 class GetAllGiveawaysInteractor(Interactor[str, list[GiveawayDM]]):
@@ -229,7 +266,7 @@ class GetAllGiveawaysInteractor(Interactor[str, list[GiveawayDM]]):
         return await self._giveaway_gateway.get_many(type, self._user.id)
 
 
-class GetGiveawayInteractor(Interactor[int, FullGiveawayDM]):
+class GetGiveawayInteractor(Interactor):
     def __init__(
         self,
         giveaway_gateway: GiveawayReader,
@@ -240,8 +277,8 @@ class GetGiveawayInteractor(Interactor[int, FullGiveawayDM]):
         self._market_gateway = market_gateway
         self._telegram_channel_interactor = telegram_channel_interactor
 
-    async def __call__(self, giveaway_id: int) -> FullGiveawayDM:
-        giveaway = await self._giveaway_gateway.get_one(id=giveaway_id)
+    async def __call__(self, giveaway_id: int, user_id: int | None = None) -> FullGiveawayDM:
+        giveaway = await self._giveaway_gateway.get_one(participant_id=user_id, id=giveaway_id)
         if not giveaway:
             raise NotFoundError("Giveaway not found")
 
@@ -252,19 +289,33 @@ class GetGiveawayInteractor(Interactor[int, FullGiveawayDM]):
 
 
 class TelegramChannelInfoInteractor(Interactor[str, TelegramChannelDM]):
-    def __init__(self, bot: Bot) -> None:
+    def __init__(self, bot: Bot, channel_cache: ChannelCache) -> None:
         self._bot = bot
+        self._channel_cache = channel_cache
 
     async def __call__(self, username: str) -> TelegramChannelDM:
         try:
-            channel_info = await self._bot.get_chat(f"@{username}")
+            channel = await self._channel_cache.get_channel(username, self._load_channel)
         except TelegramAPIError:
             raise NotFoundError("Channel not found")
+        if not channel:
+            raise NotFoundError("Channel not found")
+        return channel
+
+    async def _load_channel(self, username: str) -> TelegramChannelDM | None:
+        try:
+            channel_info = await self._bot.get_chat(f"@{username}")
+        except TelegramBadRequest:
+            return None
         image_url = DEFAULT_AVATAR_URL
         if channel_info.photo:
-            file_id = channel_info.photo.small_file_id
-            file = await self._bot.get_file(file_id)
-            image_url = f"https://api.telegram.org/file/bot{self._bot.token}/{file.file_path}"
+            image_url = await self._channel_cache.get_file_url(
+                channel_info.photo.small_file_id, self._load_file_url
+            )
         return TelegramChannelDM(
             id=channel_info.id, title=channel_info.title or "", username=username, image_url=image_url
         )
+
+    async def _load_file_url(self, file_id: str) -> str:
+        file = await self._bot.get_file(file_id)
+        return f"https://api.telegram.org/file/bot{self._bot.token}/{file.file_path}"
@@ -1,24 +1,59 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from hashlib import sha1
+from json import dumps
 
 from aiogram import Bot
-from fastapi import BackgroundTasks
+from pydantic import ValidationError
 from pyrogram.client import Client
 
 from src.application.common.cart import CartGiftDTO
-from src.application.common.const import MAX_GIFT_NUMBER, GiftRarity, HistoryType, PriceList, ShopType
-from src.application.common.send_gift import send_gift
+from src.application.common.const import (
+    MARKET_CACHE_VERSION_KEY,
+    MAX_GIFT_NUMBER,
+    TRANSFER_PURCHASE_JOB,
+    GiftRarity,
+    GiftTransferResult,
+    HistoryType,
+    LedgerRecordType,
+    MarketEventType,
+    PriceList,
+    PurchaseStatus,
+    ShopType,
+)
+from src.application.common.cursor import decode_cursor, encode_cursor
+from src.application.common.send_gift import transfer_gift
 from src.application.common.utils import build_direct_link, get_file_logger, send_message
 from src.application.dto.market import BidDTO, CreateOrderDTO
 from src.application.interactors import errors
+from src.application.interfaces.auction import AuctionScheduler
+from src.application.interfaces.cache import CacheStorage, UserCache
 from src.application.interfaces.database import DBSession
+from src.application.interfaces.events import EventPublisher
 from src.application.interfaces.history import HistorySaver
 from src.application.interfaces.interactor import Interactor
 from src.application.interfaces.market import OrderManager, OrderReader
+from src.application.interfaces.purchase import PurchaseReader, PurchaseSaver
+from src.application.interfaces.queue import TaskQueue
 from src.application.interfaces.user import UserSaver
 from src.domain.entities.bot import BotInfoDM
 from src.domain.entities.cart import CartGiftDM
 from src.domain.entities.history import CreateHistoryDM
-from src.domain.entities.market import BidDM, BidSuccessDM, GiftFiltersDM, OrderDM, ReadOrderDM
+from src.domain.entities.market import (
+    BidCursorDM,
+    BidDM,
+    BidsPageDM,
+    BidsSummaryDM,
+    BidSuccessDM,
+    CreatePurchaseDM,
+    GiftCursorDM,
+    GiftFacetsDM,
+    GiftFiltersDM,
+    GiftsPageDM,
+    MarketEventDM,
+    OrderDM,
+    PurchaseDM,
+    ReadOrderDM,
+)
 from src.domain.entities.user import UpdateUserBalanceDM, UserDM
 from src.entrypoint.config import Config
 from src.presentation.api.market.params import GiftFilterParams, GiftSortParams
@@ -37,12 +72,16 @@ class CreateOrderInteractor(Interactor[CreateOrderDTO, None]):
         user: UserDM,
         user_gateway: UserSaver,
         config: Config,
+        event_publisher: EventPublisher,
+        auction_scheduler: AuctionScheduler,
     ) -> None:
         self._db_session = db_session
         self._market_gateway = market_gateway
         self._user = user
         self._user_gateway = user_gateway
         self._config = config
+        self._event_publisher = event_publisher
+        self._auction_scheduler = auction_scheduler
 
     async def __call__(self, data: CreateOrderDTO) -> None:
         if not data.min_step and data.auction_end_time or data.min_step and not data.auction_end_time:
@@ -57,6 +96,8 @@ class CreateOrderInteractor(Interactor[CreateOrderDTO, None]):
             },
             id=data.gift_id,
             seller_id=self._user.id,
+            is_completed=False,
+            buyer_id=None,
         )
         if not order:
             raise errors.NotAccessError("Gift not found")
@@ -67,7 +108,12 @@ class CreateOrderInteractor(Interactor[CreateOrderDTO, None]):
         amount = PriceList.VIP_ORDER if data.is_vip else amount
         if amount:
             updated_user = await self._user_gateway.update_balance(
-                UpdateUserBalanceDM(id=self._user.id, amount=-amount)
+                UpdateUserBalanceDM(
+                    id=self._user.id,
+                    amount=-amount,
+                    type=LedgerRecordType.LISTING_FEE,
+                    reference_id=order.id,
+                )
             )
             if not updated_user or updated_user.balance < 0:
                 await self._db_session.rollback()
@@ -78,23 +124,44 @@ class CreateOrderInteractor(Interactor[CreateOrderDTO, None]):
                 BidDM(gift_id=data.gift_id, amount=data.price, buyer_id=self._user.id)
             )
         await self._db_session.commit()
+        if data.min_step and data.auction_end_time:
+            await self._auction_scheduler.schedule({order.id: data.auction_end_time})
+        await self._event_publisher.publish(
+            MarketEventDM(type=MarketEventType.LISTING_CREATED, gift_id=order.id, price=order.price)
+        )
 
         logger.info(f"CreateOrderInteractor: @{self._user.username} #{self._user.id} created the order")
 
 
-class GetGiftsInteractor:
-    def __init__(self, market_gateway: OrderReader, user: UserDM) -> None:
+class GiftListingMixin:
+    """Filters and cache keys shared by the listing and the facets of the market"""
+
+    def __init__(
+        self, market_gateway: OrderReader, user: UserDM, cache: CacheStorage, config: Config
+    ) -> None:
         self._market_gateway = market_gateway
         self._user = user
+        self._cache = cache
+        self._config = config
 
-    async def __call__(self, data: GiftFilterParams, sort_by: GiftSortParams | None) -> list[OrderDM]:
-        filters = self._prepare_filters(data, self._user.id)
-        return await self._market_gateway.get_all_gifts(filters, sort_by)
+    async def _get_cache_key(self, prefix: str, filters: dict, *parts: str) -> str:
+        """Listings do not depend on the user, so equal filters share one entry per market version"""
+
+        version = await self._cache.get(MARKET_CACHE_VERSION_KEY) or 0
+        filters.pop("user_id", None)
+        for name in ("rarities", "types", "model_names"):
+            if filters.get(name):
+                filters[name] = sorted(set(filters[name]))
+        digest = sha1(dumps(filters, sort_keys=True).encode()).hexdigest()
+        return ":".join(("market", prefix, str(version), *parts, digest))
 
-    def _prepare_filters(self, filters: GiftFilterParams, user_id: int) -> GiftFiltersDM:
+    def _prepare_filters(
+        self, filters: GiftFilterParams, user_id: int, cursor: GiftCursorDM | None = None
+    ) -> GiftFiltersDM:
         return GiftFiltersDM(
             limit=filters.limit,
-            offset=filters.offset,
+            offset=None if cursor else filters.offset,
+            cursor=cursor,
             from_price=filters.from_price if filters.from_price else 0,
             to_price=filters.to_price if filters.to_price else 99999,
             from_gift_number=filters.from_gift_number if filters.from_gift_number else 1,
@@ -107,41 +174,127 @@ class GetGiftsInteractor:
         )
 
 
+class GetGiftsInteractor(GiftListingMixin, Interactor):
+    async def __call__(self, data: GiftFilterParams, sort_by: GiftSortParams | None) -> GiftsPageDM:
+        sort_by = sort_by or GiftSortParams.RECENTLY_ADDED
+        cursor = self._decode_cursor(data.cursor, sort_by) if data.cursor else None
+        filters = self._prepare_filters(data, self._user.id, cursor)
+        cache_key = await self._get_cache_key("gifts", filters.model_dump(mode="json"), sort_by)
+        if cached_page := await self._cache.get(cache_key):
+            return GiftsPageDM.model_validate_json(cached_page)
+
+        gifts = await self._market_gateway.get_all_gifts(filters, sort_by)
+        next_cursor = None
+        if filters.limit and len(gifts) == filters.limit:
+            next_cursor = self._encode_cursor(gifts[-1], sort_by)
+        page = GiftsPageDM(gifts=gifts, next_cursor=next_cursor)
+        await self._cache.set(cache_key, page.model_dump_json(), self._config.cache.MARKET_CACHE_TTL)
+        return page
+
+    def _encode_cursor(self, gift: OrderDM, sort_by: GiftSortParams) -> str:
+        data = {"sort": sort_by, "is_vip": gift.is_vip, "id": gift.id}
+        if sort_by in (GiftSortParams.PRICE_LOW_TO_HIGH, GiftSortParams.PRICE_HIGH_TO_LOW):
+            data["price"] = gift.price
+        else:
+            data["created_at"] = gift.created_at
+        return encode_cursor(data)
+
+    def _decode_cursor(self, cursor: str, sort_by: GiftSortParams) -> GiftCursorDM:
+        data = decode_cursor(cursor)
+        if not data or data.pop("sort", None) != sort_by:
+            raise errors.InvalidCursorError("Cursor is invalid")
+        try:
+            cursor_dm = GiftCursorDM(**data)
+        except ValidationError:
+            raise errors.InvalidCursorError("Cursor is invalid")
+        if sort_by in (GiftSortParams.PRICE_LOW_TO_HIGH, GiftSortParams.PRICE_HIGH_TO_LOW):
+            sort_value = cursor_dm.price
+        else:
+            sort_value = cursor_dm.created_at
+        if sort_value is None:
+            raise errors.InvalidCursorError("Cursor is invalid")
+        return cursor_dm
+
+
+class GetGiftFacetsInteractor(GiftListingMixin, Interactor[GiftFilterParams, GiftFacetsDM]):
+    async def __call__(self, data: GiftFilterParams) -> GiftFacetsDM:
+        filters = self._prepare_filters(data, self._user.id)
+        cache_key = await self._get_cache_key(
+            "facets", filters.model_dump(mode="json", exclude={"limit", "offset", "cursor"})
+        )
+        if cached_facets := await self._cache.get(cache_key):
+            return GiftFacetsDM.model_validate_json(cached_facets)
+
+        facets = await self._market_gateway.get_gift_facets(filters)
+        await self._cache.set(
+            cache_key, facets.model_dump_json(), self._config.cache.FACETS_CACHE_TTL
+        )
+        return facets
+
+
 class GetGiftInteractor(Interactor[int, ReadOrderDM]):
     def __init__(self, market_gateway: OrderReader) -> None:
         self._market_gateway = market_gateway
 
     async def __call__(self, gift_id: int) -> ReadOrderDM:
-        gift = await self._market_gateway.get_full_order(id=gift_id, is_active=True, is_completed=False)
+        gift = await self._market_gateway.get_listed_order(gift_id)
         if not gift:
             raise errors.NotFoundError("Gift not found")
         return gift
 
 
-class BuyGiftInteractor(Interactor[int, OrderDM]):
+class GetGiftBidsInteractor(Interactor):
+    def __init__(self, market_gateway: OrderReader) -> None:
+        self._market_gateway = market_gateway
+
+    async def __call__(self, gift_id: int, limit: int, cursor: str | None) -> BidsPageDM:
+        bids = await self._market_gateway.get_bids(
+            gift_id, limit, self._decode_cursor(cursor) if cursor else None
+        )
+        next_cursor = None
+        if len(bids) == limit:
+            next_cursor = encode_cursor({"created_at": bids[-1].created_at, "id": bids[-1].id})
+        return BidsPageDM(bids=bids, next_cursor=next_cursor)
+
+    def _decode_cursor(self, cursor: str) -> BidCursorDM:
+        if not (data := decode_cursor(cursor)):
+            raise errors.InvalidCursorError("Cursor is invalid")
+        try:
+            return BidCursorDM(**data)
+        except ValidationError:
+            raise errors.InvalidCursorError("Cursor is invalid")
+
+
+class GetGiftBidsSummaryInteractor(Interactor):
+    def __init__(self, market_gateway: OrderReader) -> None:
+        self._market_gateway = market_gateway
+
+    async def __call__(self, gift_id: int, top: int) -> BidsSummaryDM:
+        return await self._market_gateway.get_bids_summary(gift_id, top)
+
+
+class BuyGiftInteractor(Interactor[int, PurchaseDM]):
+    """Reserves the gift and charges the buyer, the transfer runs in TransferPurchaseInteractor"""
+
     def __init__(
         self,
         db_session: DBSession,
         market_gateway: OrderManager,
         user_gateway: UserSaver,
-        history_gateway: HistorySaver,
+        purchase_gateway: PurchaseSaver,
         user: UserDM,
-        bot: Bot,
-        bot_info: BotInfoDM,
-        config: Config,
-        client: Client,
+        task_queue: TaskQueue,
+        event_publisher: EventPublisher,
     ) -> None:
         self._db_session = db_session
         self._market_gateway = market_gateway
         self._user_gateway = user_gateway
-        self._history_gateway = history_gateway
+        self._purchase_gateway = purchase_gateway
         self._user = user
-        self._bot = bot
-        self._bot_info = bot_info
-        self._config = config
-        self._client = client
+        self._task_queue = task_queue
+        self._event_publisher = event_publisher
 
-    async def __call__(self, gift_id: int) -> OrderDM:
+    async def __call__(self, gift_id: int) -> PurchaseDM:
         order = await self._market_gateway.get_one(id=gift_id, is_completed=False, is_active=True)
 
         if not order:
@@ -151,59 +304,226 @@ class BuyGiftInteractor(Interactor[int, OrderDM]):
         if order.min_step is not None:
             raise errors.NotAccessError("This gift on auction")
 
+        reserved_order = await self._market_gateway.update_order(
+            dict(is_active=False, buyer_id=self._user.id),
+            id=gift_id,
+            is_active=True,
+            is_completed=False,
+            min_step=None,
+            buyer_id=None,
+        )
+        if not reserved_order:
+            await self._db_session.rollback()
+            raise errors.NotFoundError("Gift not found")
+
+        amount = order.price * 1.05
         buyer = await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=self._user.id, amount=-(order.price * 1.05))
+            UpdateUserBalanceDM(
+                id=self._user.id,
+                amount=-amount,
+                type=LedgerRecordType.PURCHASE,
+                reference_id=order.id,
+            )
         )
         if buyer.balance < 0:  # type: ignore
             await self._db_session.rollback()
             raise errors.NotEnoughBalanceError("User not enough balance")
 
-        is_success = await send_gift(self._user.id, order.gift_id, self._client, self._bot, self._config)
-        if not is_success:
-            await self._db_session.rollback()
-            raise errors.GiftSendError("Error when sending a gift")
-
+        purchase = await self._purchase_gateway.save(
+            CreatePurchaseDM(
+                order_id=order.id,
+                buyer_id=self._user.id,
+                seller_id=order.seller_id,
+                price=order.price,
+                amount=amount,
+            )
+        )
         await self._db_session.commit()
+        await self._event_publisher.publish(
+            MarketEventDM(type=MarketEventType.DELISTED, gift_id=order.id)
+        )
+        try:
+            await self._task_queue.add(TRANSFER_PURCHASE_JOB, {"purchase_id": purchase.id})
+        except Exception as e:
+            # the worker's reconciliation pass enqueues reserved purchases that went stale
+            logger.error(f"BuyGiftInteractor: failed to enqueue purchase #{purchase.id}: {e}")
 
-        await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=order.seller_id, amount=order.price)
+        logger.info(
+            "BuyGiftInteractor: "
+            f"@{self._user.username} #{self._user.id} reserved the order with id: {gift_id}"
+        )
+        return purchase
+
+
+class TransferPurchaseInteractor(Interactor[int, None]):
+    """Transfers a reserved gift, then settles, refunds or holds the purchase for review"""
+
+    def __init__(
+        self,
+        db_session: DBSession,
+        market_gateway: OrderManager,
+        user_gateway: UserSaver,
+        history_gateway: HistorySaver,
+        purchase_gateway: PurchaseSaver,
+        bot: Bot,
+        bot_info: BotInfoDM,
+        config: Config,
+        client: Client,
+        event_publisher: EventPublisher,
+    ) -> None:
+        self._db_session = db_session
+        self._market_gateway = market_gateway
+        self._user_gateway = user_gateway
+        self._history_gateway = history_gateway
+        self._purchase_gateway = purchase_gateway
+        self._bot = bot
+        self._bot_info = bot_info
+        self._config = config
+        self._client = client
+        self._event_publisher = event_publisher
+
+    async def __call__(self, purchase_id: int) -> None:
+        purchase = await self._purchase_gateway.update_purchase(
+            dict(status=PurchaseStatus.TRANSFERRING), id=purchase_id, status=PurchaseStatus.RESERVED
         )
-        values = dict(buyer_id=self._user.id, is_completed=True, completed_order_date=datetime.now())
-        await self._market_gateway.update_order(values, id=gift_id, is_completed=False, is_active=True)
+        if not purchase:
+            await self._db_session.rollback()
+            return
+        order = await self._market_gateway.get_one(id=purchase.order_id)
         await self._db_session.commit()
+        if not order:
+            logger.error(f"TransferPurchaseInteractor: order of purchase #{purchase_id} not found")
+            return
 
-        buyer_history_data = CreateHistoryDM(
-            user_id=self._user.id,
-            type=HistoryType.BUY_GIFT,
-            price=order.price,
-            gift=order.type,
-            gift_number=order.number,
-            model_name=order.model_name,
+        result = await transfer_gift(
+            purchase.buyer_id, order.gift_id, self._client, self._bot, self._config
         )
-        seller_history_data = CreateHistoryDM(
-            user_id=order.seller_id,
-            type=HistoryType.SELL_GIFT,
-            price=order.price,
-            gift=order.type,
-            gift_number=order.number,
-            model_name=order.model_name,
+        if result is GiftTransferResult.SENT:
+            await self._settle(purchase, order)
+        elif result is GiftTransferResult.REJECTED:
+            await self._compensate(purchase, order)
+        else:
+            await self._hold_for_review(purchase)
+
+    async def _settle(self, purchase: PurchaseDM, order: OrderDM) -> None:
+        """Safe to retry: only a purchase still in TRANSFERRING is settled"""
+
+        completed_purchase = await self._purchase_gateway.update_purchase(
+            dict(status=PurchaseStatus.COMPLETED, completed_at=datetime.now(tz=timezone.utc)),
+            id=purchase.id,
+            status=PurchaseStatus.TRANSFERRING,
+        )
+        if not completed_purchase:
+            await self._db_session.rollback()
+            logger.error(
+                f"TransferPurchaseInteractor: gift of purchase #{purchase.id} was sent, "
+                "but the purchase is no longer transferring"
+            )
+            return
+        now = datetime.now()
+        await self._market_gateway.update_order(
+            dict(is_completed=True, completed_order_date=now),
+            id=order.id,
+            buyer_id=purchase.buyer_id,
+            is_completed=False,
+        )
+        await self._user_gateway.update_balance(
+            UpdateUserBalanceDM(
+                id=purchase.seller_id,
+                amount=purchase.price,
+                type=LedgerRecordType.SALE,
+                reference_id=order.id,
+            )
+        )
+        await self._history_gateway.save_many(
+            [
+                CreateHistoryDM(
+                    user_id=user_id,
+                    type=history_type,
+                    price=purchase.price,
+                    gift=order.type,
+                    gift_number=order.number,
+                    model_name=order.model_name,
+                )
+                for user_id, history_type in (
+                    (purchase.buyer_id, HistoryType.BUY_GIFT),
+                    (purchase.seller_id, HistoryType.SELL_GIFT),
+                )
+            ]
         )
-        await self._history_gateway.save_many([buyer_history_data, seller_history_data])
         await self._db_session.commit()
+        await self._event_publisher.publish(
+            MarketEventDM(type=MarketEventType.SOLD, gift_id=order.id, price=purchase.price)
+        )
 
         direct_link = build_direct_link(self._bot_info.username, f"order_{order.id}")
         await send_message(
             self._bot,
             text.get_buy_gift_text(order.type, order.number),
-            [order.seller_id],
+            [purchase.seller_id],
             reply_markup=order_kb(order.type, order.number, direct_link),
         )
-
         logger.info(
-            "BuyGiftInteractor: "
-            f"@{self._user.username} #{self._user.id} buy the order with id: {gift_id}"
+            f"TransferPurchaseInteractor: #{purchase.buyer_id} bought the order with id: {order.id}"
+        )
+
+    async def _compensate(self, purchase: PurchaseDM, order: OrderDM) -> None:
+        """Safe to retry: only a purchase still in TRANSFERRING is refunded"""
+
+        failed_purchase = await self._purchase_gateway.update_purchase(
+            dict(status=PurchaseStatus.FAILED, completed_at=datetime.now(tz=timezone.utc)),
+            id=purchase.id,
+            status=PurchaseStatus.TRANSFERRING,
+        )
+        if not failed_purchase:
+            await self._db_session.rollback()
+            return
+        await self._user_gateway.update_balance(
+            UpdateUserBalanceDM(
+                id=purchase.buyer_id,
+                amount=purchase.amount,
+                type=LedgerRecordType.PURCHASE_REFUND,
+                reference_id=order.id,
+            )
+        )
+        await self._market_gateway.update_order(
+            dict(is_active=True, buyer_id=None),
+            id=order.id,
+            buyer_id=purchase.buyer_id,
+            is_completed=False,
         )
-        return order
+        await self._db_session.commit()
+        await self._event_publisher.publish(
+            MarketEventDM(type=MarketEventType.LISTING_CREATED, gift_id=order.id, price=order.price)
+        )
+        logger.warning(
+            f"TransferPurchaseInteractor: transfer of purchase #{purchase.id} failed, "
+            f"refunded #{purchase.buyer_id}"
+        )
+
+    async def _hold_for_review(self, purchase: PurchaseDM) -> None:
+        """The gift may have been sent, so neither settle nor refund until someone checks it"""
+
+        await self._purchase_gateway.update_purchase(
+            dict(status=PurchaseStatus.REVIEW), id=purchase.id, status=PurchaseStatus.TRANSFERRING
+        )
+        await self._db_session.commit()
+        logger.error(
+            f"TransferPurchaseInteractor: transfer of purchase #{purchase.id} has an unknown outcome, "
+            "held for review"
+        )
+
+
+class GetPurchaseInteractor(Interactor[int, PurchaseDM]):
+    def __init__(self, purchase_gateway: PurchaseReader, user: UserDM) -> None:
+        self._purchase_gateway = purchase_gateway
+        self._user = user
+
+    async def __call__(self, purchase_id: int) -> PurchaseDM:
+        purchase = await self._purchase_gateway.get_one(id=purchase_id, buyer_id=self._user.id)
+        if not purchase:
+            raise errors.NotFoundError("Purchase not found")
+        return purchase
 
 
 class NewBidInteractor(Interactor[BidDTO, BidSuccessDM]):
@@ -212,48 +532,43 @@ class NewBidInteractor(Interactor[BidDTO, BidSuccessDM]):
         db_session: DBSession,
         market_gateway: OrderManager,
         user: UserDM,
-        user_gateway: UserSaver,
         history_gateway: HistorySaver,
         bot: Bot,
         bot_info: BotInfoDM,
+        event_publisher: EventPublisher,
+        auction_scheduler: AuctionScheduler,
+        user_cache: UserCache,
+        config: Config,
     ) -> None:
         self._db_session = db_session
         self._market_gateway = market_gateway
         self._user = user
-        self._user_gateway = user_gateway
         self._history_gateway = history_gateway
         self._bot = bot
         self._bot_info = bot_info
+        self._event_publisher = event_publisher
+        self._auction_scheduler = auction_scheduler
+        self._user_cache = user_cache
+        self._config = config
 
     async def __call__(self, data: BidDTO) -> BidSuccessDM:
-        if not (
-            order := await self._market_gateway.get_one(id=data.id, is_completed=False, is_active=True)
-        ):
+        placed_bid = await self._market_gateway.place_bid(
+            BidDM(gift_id=data.id, amount=data.amount, buyer_id=self._user.id),
+            extend_window=timedelta(seconds=self._config.auction.AUCTION_EXTEND_WINDOW),
+            extend_by=timedelta(seconds=self._config.auction.AUCTION_EXTEND_SECONDS),
+        )
+        if not placed_bid:
+            await self._db_session.rollback()
             raise errors.NotFoundError("Gift not found")
-        if not order.min_step or order.min_step > data.amount - order.price + 0.01:
-            raise errors.AuctionBidError("Amount is too low or this gift not on auction")
-        if order.auction_end_time and order.auction_end_time < datetime.now(tz=timezone.utc):
-            raise errors.AuctionBidError("Auction already ended")
-        if self._user.balance < data.amount:
+        order, new_balance = placed_bid.order, placed_bid.user_balance
+        if new_balance is None:
+            await self._db_session.rollback()
+            if not order.min_step or order.min_step > data.amount - order.price + 0.01:
+                raise errors.AuctionBidError("Amount is too low or this gift not on auction")
+            if order.auction_end_time and order.auction_end_time < datetime.now(tz=timezone.utc):
+                raise errors.AuctionBidError("Auction already ended")
             raise errors.NotEnoughBalanceError("User does not have enough balance")
 
-        new_balance = self._user.balance - data.amount
-        if order.buyer_id == self._user.id:
-            new_balance += order.price
-
-        await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=self._user.id, amount=-data.amount)
-        )
-        if order.buyer_id:
-            await self._user_gateway.update_balance(
-                UpdateUserBalanceDM(id=order.buyer_id, amount=order.price)
-            )
-
-        updated_data = {"buyer_id": self._user.id, "price": data.amount}
-        await self._market_gateway.update_order(updated_data, id=data.id)
-        await self._market_gateway.save_auction_bid(
-            BidDM(gift_id=data.id, amount=data.amount, buyer_id=self._user.id)
-        )
         history_data = CreateHistoryDM(
             user_id=self._user.id,
             type=HistoryType.BID_GIFT,
@@ -264,6 +579,20 @@ class NewBidInteractor(Interactor[BidDTO, BidSuccessDM]):
         )
         await self._history_gateway.save(history_data)
         await self._db_session.commit()
+        await self._user_cache.invalidate(
+            [user_id for user_id in (self._user.id, order.buyer_id) if user_id]
+        )
+        end_time = placed_bid.auction_end_time
+        if end_time and end_time != order.auction_end_time:
+            await self._auction_scheduler.schedule({order.id: end_time})
+        await self._event_publisher.publish(
+            MarketEventDM(
+                type=MarketEventType.NEW_BID,
+                gift_id=order.id,
+                price=data.amount,
+                auction_end_time=end_time,
+            )
+        )
         if order.buyer_id:
             direct_link = build_direct_link(self._bot_info.username, f"order_{order.id}")
             await send_message(
@@ -272,36 +601,86 @@ class NewBidInteractor(Interactor[BidDTO, BidSuccessDM]):
                 [order.buyer_id],
                 reply_markup=order_kb(order.type, order.number, direct_link),
             )
-        return BidSuccessDM(user_balance=new_balance, created_at=datetime.now(tz=timezone.utc))
+        return BidSuccessDM(
+            user_balance=new_balance,
+            created_at=datetime.now(tz=timezone.utc),
+            auction_end_time=end_time,
+        )
 
 
 class BuyGiftsFromCartInteractor(Interactor):
+    """Reserves the whole cart in one transaction, transfers run as purchases on the queue"""
+
     def __init__(
         self,
         db_session: DBSession,
         user: UserDM,
         market_gateway: OrderManager,
-        buy_gift_interactor: BuyGiftInteractor,
+        user_gateway: UserSaver,
+        purchase_gateway: PurchaseSaver,
+        task_queue: TaskQueue,
+        event_publisher: EventPublisher,
     ) -> None:
         self._db_session = db_session
         self._user = user
         self._market_gateway = market_gateway
-        self._buy_gift_interactor = buy_gift_interactor
-
-    async def __call__(
-        self, data: list[CartGiftDTO], background_tasks: BackgroundTasks
-    ) -> tuple[bool, list[CartGiftDM]]:
-        gifts_ids = [gift.id for gift in data]
-        gifts = await self._market_gateway.get_gifts_by_ids(gifts_ids, self._user.id)
-        if len(gifts) != len(data):
-            return False, gifts
-
-        for gift_data in data:
-            for gift in gifts:
-                if gift.id == gift_data.id:
-                    if gift.price != gift_data.price:
-                        return False, gifts
+        self._user_gateway = user_gateway
+        self._purchase_gateway = purchase_gateway
+        self._task_queue = task_queue
+        self._event_publisher = event_publisher
+
+    async def __call__(self, data: list[CartGiftDTO]) -> tuple[bool, list[CartGiftDM]]:
+        prices = {gift.id: gift.price for gift in data}
+        if not prices:
+            return False, []
+        gifts = await self._market_gateway.update_cart_orders(
+            dict(is_active=False, buyer_id=self._user.id), list(prices), self._user.id
+        )
+        if len(gifts) != len(prices) or any(gift.price != prices[gift.id] for gift in gifts):
+            await self._db_session.rollback()
+            return False, await self._market_gateway.get_gifts_by_ids(list(prices), self._user.id)
+
+        balances = await self._user_gateway.update_balances(
+            [
+                UpdateUserBalanceDM(
+                    id=self._user.id,
+                    amount=-gift.price * 1.05,
+                    type=LedgerRecordType.PURCHASE,
+                    reference_id=gift.id,
+                )
+                for gift in gifts
+            ]
+        )
+        if balances[self._user.id] < 0:
+            await self._db_session.rollback()
+            raise errors.NotEnoughBalanceError("User not enough balance")
 
+        purchases = await self._purchase_gateway.save_many(
+            [
+                CreatePurchaseDM(
+                    order_id=gift.id,
+                    buyer_id=self._user.id,
+                    seller_id=gift.seller_id,
+                    price=gift.price,
+                    amount=gift.price * 1.05,
+                )
+                for gift in gifts
+            ]
+        )
+        await self._db_session.commit()
         for gift in gifts:
-            background_tasks.add_task(self._buy_gift_interactor, gift.id)
+            await self._event_publisher.publish(
+                MarketEventDM(type=MarketEventType.DELISTED, gift_id=gift.id)
+            )
+        try:
+            await self._task_queue.add_bulk(
+                [(TRANSFER_PURCHASE_JOB, {"purchase_id": purchase.id}) for purchase in purchases]
+            )
+        except Exception as e:
+            logger.error(f"BuyGiftsFromCartInteractor: failed to enqueue purchases: {e}")
+
+        logger.info(
+            "BuyGiftsFromCartInteractor: "
+            f"@{self._user.username} #{self._user.id} reserved {len(gifts)} orders from the cart"
+        )
         return True, gifts
@@ -2,7 +2,12 @@ from datetime import datetime, timedelta
 
 from aiogram import Bot
 
-from src.application.common.const import MINUTES_TO_SEND_GIFT, OrderStatus, PriceList
+from src.application.common.const import (
+    MINUTES_TO_SEND_GIFT,
+    LedgerRecordType,
+    OrderStatus,
+    PriceList,
+)
 from src.application.common.utils import build_direct_link, get_file_logger, send_message
 from src.application.dto.star import CreateStarOrderDTO, StarsIdDTO
 from src.application.interactors import errors
@@ -41,7 +46,11 @@ class CreateStarOrderInteractor(Interactor[CreateStarOrderDTO, None]):
 
         if self._user.id not in self._config.bot.nft_holders_id:
             updated_user = await self._user_gateway.update_balance(
-                UpdateUserBalanceDM(id=self._user.id, amount=-PriceList.UP_FOR_SALE)
+                UpdateUserBalanceDM(
+                    id=self._user.id,
+                    amount=-PriceList.UP_FOR_SALE,
+                    type=LedgerRecordType.LISTING_FEE,
+                )
             )
             if not updated_user or updated_user.balance < 0:
                 await self._db_session.rollback()
@@ -79,7 +88,12 @@ class BuyStarsInteractor(Interactor[StarsIdDTO, None]):
             raise errors.NotAccessError("Forbidden")
 
         buyer = await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=self._user.id, amount=-order.price)
+            UpdateUserBalanceDM(
+                id=self._user.id,
+                amount=-order.price,
+                type=LedgerRecordType.STAR_PURCHASE,
+                reference_id=order.id,
+            )
         )
         if buyer.balance < 0:  # type: ignore
             await self._db_session.rollback()
@@ -129,7 +143,12 @@ class CancelStarOrderInteractor(Interactor[StarsIdDTO, None]):
             raise errors.NotFoundError("Order not found")
 
         await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=self._user.id, amount=order.price)
+            UpdateUserBalanceDM(
+                id=self._user.id,
+                amount=order.price,
+                type=LedgerRecordType.STAR_REFUND,
+                reference_id=order.id,
+            )
         )
 
         await self._db_session.commit()
@@ -238,7 +257,12 @@ class SellerCancelStarOrderInteractor(Interactor[StarsIdDTO, None]):
             )
 
         await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=order.buyer_id, amount=order.price)
+            UpdateUserBalanceDM(
+                id=order.buyer_id,
+                amount=order.price,
+                type=LedgerRecordType.STAR_REFUND,
+                reference_id=order.id,
+            )
         )
         values = dict(status=OrderStatus.ON_MARKET, buyer_id=None, created_order_date=None)
         await self._star_gateway.update(values, id=data.id)
@@ -344,7 +368,12 @@ class AcceptTransferStarOrderInteractor(Interactor[StarsIdDTO, None]):
         if order.seller_id in self._config.bot.nft_holders_id:
             commission = 0
         await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=order.seller_id, amount=order.price - commission)
+            UpdateUserBalanceDM(
+                id=order.seller_id,
+                amount=order.price - commission,
+                type=LedgerRecordType.STAR_SALE,
+                reference_id=order.id,
+            )
         )
         referrer = await self._user_gateway.get_referrer(user_id=order.seller_id)
         if referrer:
@@ -352,7 +381,7 @@ class AcceptTransferStarOrderInteractor(Interactor[StarsIdDTO, None]):
             if referrer.id in self._config.app.vip_users_id:
                 referrer_percent = PriceList.VIP_REFERRAL_PERCENT
             referrer_reward = commission * referrer_percent / 100
-            await self._user_gateway.update_referrer_balance(referrer.id, referrer_reward)
+            await self._user_gateway.update_referrer_balance(referrer.id, referrer_reward, order.id)
         await self._db_session.commit()
 
         direct_link = build_direct_link(self._bot_info.username, f"star_{data.id}")
@@ -421,7 +450,7 @@ class GetAllStarOrderInteractor(Interactor[None, list[StarOrderDM]]):
         return result
 
 
-class UpdateStarOrderInteractor:
+class UpdateStarOrderInteractor(Interactor):
     def __init__(
         self,
         db_session: DBSession,
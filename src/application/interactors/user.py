@@ -1,21 +1,33 @@
+from datetime import datetime
+
 from aiogram import Bot
 from aiogram.utils.payload import decode_payload, encode_payload
+from pydantic import ValidationError
 from pyrogram.client import Client
 
-from src.application.common.const import DEFAULT_AVATAR_URL
+from src.application.common.const import DEFAULT_AVATAR_URL, MarketEventType
+from src.application.common.cursor import decode_cursor, encode_cursor
 from src.application.common.send_gift import send_gift
 from src.application.common.utils import build_direct_link, generate_deposit_comment, get_file_logger
 from src.application.dto.market import UpdateOrderDTO
 from src.application.dto.user import LoginDTO, UserDTO
-from src.application.interactors.errors import GiftSendError, NotFoundError
+from src.application.interactors.errors import GiftSendError, InvalidCursorError, NotFoundError
 from src.application.interfaces.auth import InitDataValidator, TokenEncoder
-from src.application.interfaces.database import DBSession
+from src.application.interfaces.database import DBSession, PrimaryPin
+from src.application.interfaces.events import EventPublisher
 from src.application.interfaces.interactor import Interactor
+from src.application.interfaces.ledger import LedgerReader
 from src.application.interfaces.market import OrderReader, OrderSaver
-from src.application.interfaces.user import UserManager, UserReader, UserSaver
+from src.application.interfaces.user import UserReader, UserSaver
 from src.domain.entities.bot import BotInfoDM
-from src.domain.entities.market import OrderDM, UserGiftDM
-from src.domain.entities.user import CreateUserDM, UserDM
+from src.domain.entities.market import MarketEventDM, OrderDM, UserGiftDM
+from src.domain.entities.user import (
+    BalanceAtDM,
+    CreateUserDM,
+    LedgerCursorDM,
+    LedgerPageDM,
+    UserDM,
+)
 from src.entrypoint.config import Config
 
 
@@ -28,12 +40,14 @@ class LoginInteractor(Interactor[LoginDTO, str]):
         db_session: DBSession,
         token_gateway: TokenEncoder,
         telegram_gateway: InitDataValidator,
-        user_gateway: UserManager,
+        user_gateway: UserSaver,
+        primary_pin: PrimaryPin,
     ) -> None:
         self._db_session = db_session
         self._token_gateway = token_gateway
         self._telegram_gateway = telegram_gateway
         self._user_gateway = user_gateway
+        self._primary_pin = primary_pin
 
     async def __call__(self, data: LoginDTO) -> str | None:
         try:
@@ -45,36 +59,20 @@ class LoginInteractor(Interactor[LoginDTO, str]):
 
         user_data = valid_data.user
         user_id = user_data["id"]
-        user = await self._user_gateway.get_by_id(user_id)
-        photo_url = user_data.get("photo_url")
-        if not photo_url:
-            photo_url = DEFAULT_AVATAR_URL
-        if not user:
-            deposit_comment = generate_deposit_comment()
-            user_dm = CreateUserDM(
-                id=user_id,
-                photo_url=photo_url,
-                username=user_data.get("username"),
-                first_name=user_data.get("first_name"),
-                deposit_comment=deposit_comment,
-            )
-            user = await self._user_gateway.save(user_dm)
-            await self._db_session.commit()
-
+        user_dm = CreateUserDM(
+            id=user_id,
+            photo_url=user_data.get("photo_url") or DEFAULT_AVATAR_URL,
+            username=user_data.get("username"),
+            first_name=user_data.get("first_name"),
+            deposit_comment=generate_deposit_comment(),
+        )
         referrer_id = self._get_referrer_id(valid_data.start_param)
-        if referrer_id and referrer_id != user_id:
-            if not await self._user_gateway.get_referrer(user_id):
-                await self._user_gateway.add_referral(referrer_id, user)
-            else:
-                await self._user_gateway.update_referrer(referrer_id, user)
-            await self._db_session.commit()
-
-        if user.username != user_data.get("username"):
-            await self._user_gateway.update_user(dict(username=user_data.get("username")), id=user_id)
-            await self._db_session.commit()
-        if user.photo_url != photo_url:
-            await self._user_gateway.update_user(dict(photo_url=photo_url), id=user_id)
-            await self._db_session.commit()
+        if referrer_id == user_id:
+            referrer_id = None
+        await self._user_gateway.upsert(user_dm, referrer_id)
+        await self._db_session.commit()
+        # a new user authenticates right away, before the replicas may have the row
+        await self._primary_pin.pin(user_id)
         return self._token_gateway.encode(user_id)
 
     def _get_referrer_id(self, encoded_payload: str | None) -> int | None:
@@ -103,7 +101,42 @@ class GetUserInteractor(Interactor[None, UserDTO]):
         )
 
 
-class GetUserGiftsInteractor:
+class GetLedgerInteractor(Interactor):
+    def __init__(self, ledger_gateway: LedgerReader, user: UserDM) -> None:
+        self._ledger_gateway = ledger_gateway
+        self._user = user
+
+    async def __call__(self, limit: int, cursor: str | None) -> LedgerPageDM:
+        records = await self._ledger_gateway.get_records(
+            self._user.id, limit, self._decode_cursor(cursor) if cursor else None
+        )
+        next_cursor = None
+        if len(records) == limit:
+            next_cursor = encode_cursor(
+                {"created_at": records[-1].created_at, "id": records[-1].id}
+            )
+        return LedgerPageDM(records=records, next_cursor=next_cursor)
+
+    def _decode_cursor(self, cursor: str) -> LedgerCursorDM:
+        if not (data := decode_cursor(cursor)):
+            raise InvalidCursorError("Cursor is invalid")
+        try:
+            return LedgerCursorDM(**data)
+        except ValidationError:
+            raise InvalidCursorError("Cursor is invalid")
+
+
+class GetBalanceAtInteractor(Interactor[datetime, BalanceAtDM]):
+    def __init__(self, ledger_gateway: LedgerReader, user: UserDM) -> None:
+        self._ledger_gateway = ledger_gateway
+        self._user = user
+
+    async def __call__(self, at: datetime) -> BalanceAtDM:
+        balance = await self._ledger_gateway.get_balance_at(self._user.id, at)
+        return BalanceAtDM(balance=balance, at=at)
+
+
+class GetUserGiftsInteractor(Interactor):
     def __init__(self, market_gateway: OrderReader, user: UserDM) -> None:
         self._market_gateway = market_gateway
         self._user = user
@@ -124,14 +157,20 @@ class GetUserGiftInteractor(Interactor[int, UserGiftDM]):
         return gift
 
 
-class UpdateUserGiftInteractor:
+class UpdateUserGiftInteractor(Interactor):
     def __init__(
-        self, market_gateway: OrderSaver, user: UserDM, db_session: DBSession, config: Config
+        self,
+        market_gateway: OrderSaver,
+        user: UserDM,
+        db_session: DBSession,
+        config: Config,
+        event_publisher: EventPublisher,
     ) -> None:
         self._market_gateway = market_gateway
         self._user = user
         self._db_session = db_session
         self._config = config
+        self._event_publisher = event_publisher
 
     async def __call__(self, id: int, data: UpdateOrderDTO) -> OrderDM:
         updated_order = await self._market_gateway.update_order(
@@ -141,6 +180,11 @@ class UpdateUserGiftInteractor:
             await self._db_session.rollback()
             raise NotFoundError("Gift not found")
         await self._db_session.commit()
+        await self._event_publisher.publish(
+            MarketEventDM(
+                type=MarketEventType.PRICE_CHANGED, gift_id=updated_order.id, price=updated_order.price
+            )
+        )
 
         logger.info(
             "UpdateUserGiftInteractor: "
@@ -156,11 +200,13 @@ class RemoveOrderInteractor(Interactor[int, None]):
         user: UserDM,
         db_session: DBSession,
         user_gateway: UserSaver,
+        event_publisher: EventPublisher,
     ) -> None:
         self._market_gateway = market_gateway
         self._user_gateway = user_gateway
         self._user = user
         self._db_session = db_session
+        self._event_publisher = event_publisher
 
     async def __call__(self, gift_id: int) -> None:
         data = dict(is_active=False, min_step=None, auction_end_time=None, price=None)
@@ -173,6 +219,9 @@ class RemoveOrderInteractor(Interactor[int, None]):
         await self._market_gateway.delete_auction_bids(gift_id=gift_id)
 
         await self._db_session.commit()
+        await self._event_publisher.publish(
+            MarketEventDM(type=MarketEventType.DELISTED, gift_id=gift_id)
+        )
 
         logger.info(
             "RemoveOrderInteractor: "
@@ -199,7 +248,7 @@ class WithdrawGiftInteractor(Interactor[int, None]):
 
     async def __call__(self, gift_id: int) -> None:
         deleted_order = await self._market_gateway.delete_order(
-            id=gift_id, is_active=False, is_completed=False, seller_id=self._user.id
+            id=gift_id, is_active=False, is_completed=False, seller_id=self._user.id, buyer_id=None
         )
         if not deleted_order:
             await self._db_session.rollback()
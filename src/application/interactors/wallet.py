@@ -1,11 +1,11 @@
-from src.application.common.const import MAX_WITHDRAW_AMOUNT
+from src.application.common.const import MAX_WITHDRAW_AMOUNT, LedgerRecordType
 from src.application.dto.wallet import WithdrawRequestDTO
 from src.application.interactors.errors import NotAccessError, NotEnoughBalanceError
 from src.application.interfaces.database import DBSession
 from src.application.interfaces.interactor import Interactor
 from src.application.interfaces.user import UserSaver
 from src.application.interfaces.wallet import WithdrawRequestSaver
-from src.domain.entities.user import UpdateUserBalanceDM, UserDM
+from src.domain.entities.user import FreshUserDM, UpdateUserBalanceDM
 from src.domain.entities.wallet import CreateWithdrawRequestDM
 
 
@@ -14,7 +14,7 @@ class WithdrawRequestInteractor(Interactor[WithdrawRequestDTO, None]):
         self,
         user_gateway: UserSaver,
         wallet_gateway: WithdrawRequestSaver,
-        user: UserDM,
+        user: FreshUserDM,
         db_session: DBSession,
     ) -> None:
         self._db_session = db_session
@@ -28,7 +28,9 @@ class WithdrawRequestInteractor(Interactor[WithdrawRequestDTO, None]):
         if data.amount > MAX_WITHDRAW_AMOUNT:
             raise NotAccessError("Amount is too large")
         await self._user_gateway.update_balance(
-            UpdateUserBalanceDM(id=self._user.id, amount=-data.amount)
+            UpdateUserBalanceDM(
+                id=self._user.id, amount=-data.amount, type=LedgerRecordType.WITHDRAW
+            )
         )
         await self._wallet_gateway.save(
             CreateWithdrawRequestDM(user_id=self._user.id, amount=data.amount, wallet=data.wallet)
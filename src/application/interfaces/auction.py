@@ -0,0 +1,14 @@
+from abc import abstractmethod
+from datetime import datetime
+from typing import Protocol
+
+
+class AuctionScheduler(Protocol):
+    @abstractmethod
+    async def schedule(self, end_times: dict[int, datetime]) -> None: ...
+
+    @abstractmethod
+    async def pop_due(self, now: datetime) -> list[int]: ...
+
+    @abstractmethod
+    async def get_next_end_time(self) -> datetime | None: ...
@@ -0,0 +1,37 @@
+from abc import abstractmethod
+from typing import Awaitable, Callable, Protocol
+
+from src.domain.entities.giveaway import TelegramChannelDM
+from src.domain.entities.user import UserDM
+
+
+class CacheStorage(Protocol):
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: int) -> None: ...
+
+    @abstractmethod
+    async def incr(self, key: str) -> int: ...
+
+
+class UserCache(Protocol):
+    @abstractmethod
+    async def get(self, user_id: int) -> UserDM | None: ...
+
+    @abstractmethod
+    async def set(self, user: UserDM) -> None: ...
+
+    @abstractmethod
+    async def invalidate(self, users_ids: list[int]) -> None: ...
+
+
+class ChannelCache(Protocol):
+    @abstractmethod
+    async def get_channel(
+        self, username: str, load: Callable[[str], Awaitable[TelegramChannelDM | None]]
+    ) -> TelegramChannelDM | None: ...
+
+    @abstractmethod
+    async def get_file_url(self, file_id: str, load: Callable[[str], Awaitable[str]]) -> str: ...
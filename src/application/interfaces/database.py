@@ -14,3 +14,15 @@ class DBSession(Protocol):
     @abstractmethod
     async def flush(self) -> None:
         ...
+
+
+class PrimaryPin(Protocol):
+    """Sends the reads of a user to the primary while the replicas catch up with their writes"""
+
+    @abstractmethod
+    async def pin(self, user_id: int) -> None:
+        ...
+
+    @abstractmethod
+    async def is_pinned(self, user_id: int) -> bool:
+        ...
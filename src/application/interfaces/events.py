@@ -0,0 +1,23 @@
+from abc import abstractmethod
+from typing import AsyncIterator, Protocol
+
+from src.domain.entities.market import MarketEventDM
+
+
+class EventPublisher(Protocol):
+    @abstractmethod
+    async def publish(self, event: MarketEventDM) -> None: ...
+
+
+class EventSubscriber(Protocol):
+    @abstractmethod
+    def listen(self, timeout: float) -> AsyncIterator[MarketEventDM | None]:
+        """Yield events as they arrive, None when nothing happened within the timeout.
+        A slow listener loses its oldest events
+        """
+
+    @abstractmethod
+    def follow(self) -> AsyncIterator[MarketEventDM | None]:
+        """Yield every event, None when the subscription was (re)started and the events
+        published in the meantime were missed
+        """
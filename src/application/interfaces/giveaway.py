@@ -1,7 +1,12 @@
 from abc import abstractmethod
 from typing import Protocol
 
-from src.domain.entities.giveaway import CreateGiveawayDM, GiveawayDM
+from src.domain.entities.giveaway import (
+    CreateGiveawayDM,
+    GiveawayDM,
+    GiveawayEntryDM,
+    GiveawayParticipantCursorDM,
+)
 
 
 class GiveawaySaver(Protocol):
@@ -9,15 +14,41 @@ class GiveawaySaver(Protocol):
     async def save(self, data: CreateGiveawayDM) -> GiveawayDM: ...
 
     @abstractmethod
-    async def update_giveaway(self, data: dict, **filters) -> GiveawayDM | None: ...
+    async def add_entry(
+        self, entry: GiveawayEntryDM, quantity_members: int, add_tickets: bool
+    ) -> bool: ...
+
+    @abstractmethod
+    async def complete(self, giveaway_id: int, winners: dict[int, int]) -> None: ...
 
 
 class GiveawayReader(Protocol):
     @abstractmethod
-    async def get_one(self, **filters) -> GiveawayDM | None: ...
+    async def get_one(
+        self, participant_id: int | None = None, **filters
+    ) -> GiveawayDM | None: ...
 
     @abstractmethod
     async def get_many(self, type: str, user_id: int) -> list[GiveawayDM]: ...
 
+    @abstractmethod
+    async def is_participant(self, giveaway_id: int, user_id: int) -> bool: ...
+
+    @abstractmethod
+    async def get_entries(
+        self,
+        giveaway_id: int,
+        limit: int | None = None,
+        cursor: GiveawayParticipantCursorDM | None = None,
+    ) -> list[GiveawayEntryDM]: ...
+
+    @abstractmethod
+    async def get_tickets(self, giveaway_id: int, limit: int) -> list[GiveawayEntryDM]: ...
+
+    @abstractmethod
+    async def get_referral_counts(
+        self, giveaway_id: int, referrers_ids: list[int]
+    ) -> dict[int, int]: ...
+
 
 class GiveawayManager(GiveawaySaver, GiveawayReader): ...
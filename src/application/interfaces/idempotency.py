@@ -0,0 +1,21 @@
+from abc import abstractmethod
+from typing import Protocol
+
+
+class IdempotencyStorage(Protocol):
+    @abstractmethod
+    async def acquire(self, key: str, value: str, ttl: int) -> bool:
+        """Store the value only if the key is free, True when this call took the key"""
+
+    @abstractmethod
+    async def get(self, key: str) -> str | None: ...
+
+    @abstractmethod
+    async def save(self, key: str, value: str, ttl: int) -> None: ...
+
+    @abstractmethod
+    async def refresh(self, key: str, ttl: int) -> None:
+        """Extend the ttl of a key that is still held"""
+
+    @abstractmethod
+    async def release(self, key: str) -> None: ...
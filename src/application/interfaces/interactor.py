@@ -1,10 +1,32 @@
+from contextvars import ContextVar
+from functools import wraps
 from typing import Generic, TypeVar
 
 
 InputData = TypeVar("InputData")
 OutputData = TypeVar("OutputData")
 
+# The interactor that is running in the current task, used to attribute database queries
+current_interactor: ContextVar[str | None] = ContextVar("current_interactor", default=None)
+
 
 class Interactor(Generic[InputData, OutputData]):
+    def __init_subclass__(cls, **kwargs) -> None:
+        super().__init_subclass__(**kwargs)
+        if "__call__" in cls.__dict__:
+            cls.__call__ = _track_interactor(cls.__call__, cls.__name__)  # type: ignore
+
     async def __call__(self, data: InputData) -> OutputData:
         raise NotImplementedError
+
+
+def _track_interactor(call, name: str):
+    @wraps(call)
+    async def wrapper(self, *args, **kwargs):
+        token = current_interactor.set(name)
+        try:
+            return await call(self, *args, **kwargs)
+        finally:
+            current_interactor.reset(token)
+
+    return wrapper
@@ -0,0 +1,18 @@
+from abc import abstractmethod
+from datetime import datetime
+from typing import Protocol
+
+from src.domain.entities.user import BalanceCheckDM, LedgerCursorDM, LedgerRecordDM
+
+
+class LedgerReader(Protocol):
+    @abstractmethod
+    async def get_records(
+        self, user_id: int, limit: int, cursor: LedgerCursorDM | None = None
+    ) -> list[LedgerRecordDM]: ...
+
+    @abstractmethod
+    async def get_balance_at(self, user_id: int, at: datetime) -> float: ...
+
+    @abstractmethod
+    async def get_balance_checks(self, after_user_id: int, limit: int) -> list[BalanceCheckDM]: ...
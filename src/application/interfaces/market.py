@@ -1,12 +1,18 @@
 from abc import abstractmethod
+from datetime import datetime, timedelta
 from typing import Protocol
 
 from src.domain.entities.cart import CartGiftDM
 from src.domain.entities.market import (
+    BidCursorDM,
     BidDM,
+    BidsSummaryDM,
     CreateOrderDM,
+    GiftFacetsDM,
     GiftFiltersDM,
     OrderDM,
+    PlacedBidDM,
+    ReadBidDM,
     ReadOrderDM,
     UserGiftDM,
 )
@@ -19,6 +25,9 @@ class OrderReader(Protocol):
         self, filters: GiftFiltersDM, sort_by: GiftSortParams | None
     ) -> list[OrderDM]: ...
 
+    @abstractmethod
+    async def get_gift_facets(self, filters: GiftFiltersDM) -> GiftFacetsDM: ...
+
     @abstractmethod
     async def get_user_gifts(
         self, user_id: int, limit: int | None, offset: int | None
@@ -33,12 +42,26 @@ class OrderReader(Protocol):
     @abstractmethod
     async def get_full_order(self, **filters) -> ReadOrderDM | None: ...
 
+    @abstractmethod
+    async def get_listed_order(self, order_id: int) -> ReadOrderDM | None: ...
+
+    @abstractmethod
+    async def get_bids(
+        self, gift_id: int, limit: int, cursor: BidCursorDM | None = None
+    ) -> list[ReadBidDM]: ...
+
+    @abstractmethod
+    async def get_bids_summary(self, gift_id: int, top: int) -> BidsSummaryDM: ...
+
     @abstractmethod
     async def get_gifts_by_ids(self, gifts_ids: list[int], user_id: int) -> list[CartGiftDM]: ...
 
     @abstractmethod
     async def get_many(self, **filters) -> list[OrderDM]: ...
 
+    @abstractmethod
+    async def get_pending_auctions(self, orders_ids: list[int] | None = None) -> list[OrderDM]: ...
+
     @abstractmethod
     async def get_user_gifts_by_ids(self, gifts_ids: list[int], **filters) -> list[UserGiftDM]: ...
 
@@ -59,14 +82,29 @@ class OrderSaver(Protocol):
     @abstractmethod
     async def withdraw_from_market(self, data: dict, **filters) -> UserGiftDM | None: ...
 
+    @abstractmethod
+    async def complete_auctions(
+        self, orders_ids: list[int], completed_order_date: datetime
+    ) -> list[OrderDM]: ...
+
+    @abstractmethod
+    async def withdraw_auctions(self, orders_ids: list[int]) -> list[int]: ...
+
     @abstractmethod
     async def save_auction_bid(self, data: BidDM) -> None: ...
 
+    @abstractmethod
+    async def place_bid(
+        self, data: BidDM, extend_window: timedelta, extend_by: timedelta
+    ) -> PlacedBidDM | None: ...
+
     @abstractmethod
     async def delete_auction_bids(self, **filters) -> None: ...
 
     @abstractmethod
-    async def update_cart_orders(self, values: dict, gifts_ids: list[int], user_id: int) -> None: ...
+    async def update_cart_orders(
+        self, values: dict, gifts_ids: list[int], user_id: int
+    ) -> list[CartGiftDM]: ...
 
 
 class OrderManager(OrderReader, OrderSaver): ...
@@ -0,0 +1,33 @@
+from abc import abstractmethod
+from datetime import datetime
+from typing import Protocol
+
+from src.application.common.const import PurchaseStatus
+from src.domain.entities.market import CreatePurchaseDM, PurchaseDM
+
+
+class PurchaseSaver(Protocol):
+    @abstractmethod
+    async def save(self, data: CreatePurchaseDM) -> PurchaseDM: ...
+
+    @abstractmethod
+    async def save_many(self, data: list[CreatePurchaseDM]) -> list[PurchaseDM]: ...
+
+    @abstractmethod
+    async def update_purchase(self, data: dict, **filters) -> PurchaseDM | None: ...
+
+    @abstractmethod
+    async def update_stale(
+        self, data: dict, status: PurchaseStatus, updated_before: datetime
+    ) -> list[PurchaseDM]: ...
+
+
+class PurchaseReader(Protocol):
+    @abstractmethod
+    async def get_one(self, **filters) -> PurchaseDM | None: ...
+
+    @abstractmethod
+    async def get_many(self, **filters) -> list[PurchaseDM]: ...
+
+
+class PurchaseManager(PurchaseReader, PurchaseSaver): ...
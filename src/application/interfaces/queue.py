@@ -0,0 +1,10 @@
+from abc import abstractmethod
+from typing import Protocol
+
+
+class TaskQueue(Protocol):
+    @abstractmethod
+    async def add(self, name: str, data: dict) -> None: ...
+
+    @abstractmethod
+    async def add_bulk(self, jobs: list[tuple[str, dict]]) -> None: ...
@@ -9,6 +9,10 @@ class UserReader(Protocol):
     async def get_by_id(self, user_id: int) -> UserDM | None:
         ...
 
+    @abstractmethod
+    async def get_by_ids(self, users_ids: list[int]) -> list[UserDM]:
+        ...
+
     async def get_referrer(self, user_id: int) -> UserDM | None:
         ...
 
@@ -24,6 +28,10 @@ class UserSaver(Protocol):
     async def save(self, user: CreateUserDM) -> UserDM:
         ...
 
+    @abstractmethod
+    async def upsert(self, user: CreateUserDM, referrer_id: int | None = None) -> None:
+        ...
+
     @abstractmethod
     async def update_user(self, data: dict, **filters) -> UserDM | None:
         ...
@@ -33,7 +41,13 @@ class UserSaver(Protocol):
         ...
 
     @abstractmethod
-    async def update_referrer_balance(self, referrer_id: int, amount: float) -> None:
+    async def update_balances(self, data: list[UpdateUserBalanceDM]) -> dict[int, float]:
+        ...
+
+    @abstractmethod
+    async def update_referrer_balance(
+        self, referrer_id: int, amount: float, reference_id: int | None = None
+    ) -> None:
         ...
 
     @abstractmethod
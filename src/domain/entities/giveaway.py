@@ -21,15 +21,25 @@ class CreateGiveawayDM(BaseModel):
     end_time: datetime
     price: float
     is_premium: bool
-    participants_ids: list[int] = []
-    winners_ids: list[int] = []
-    referrers_ids: list[int] = []
 
     user_id: int
 
 
 class GiveawayDM(CreateGiveawayDM):
     id: int
+    count_participants: int = 0
+    count_tickets: int = 0
+    count_referrals: int = 0
+    winners_ids: list[int] = []
+    is_participant: bool = False
+
+
+class GiveawayEntryDM(BaseModel):
+    giveaway_id: int
+    user_id: int
+    tickets: int = 1
+    referrer_id: int | None = None
+    created_at: datetime | None = None
 
 
 class FullGiveawayDM(GiveawayDM):
@@ -44,3 +54,13 @@ class GiveawayParticipantDM(BaseModel):
     chance_win: float
     count_referrals: int
     is_win: bool
+
+
+class GiveawayParticipantCursorDM(BaseModel):
+    created_at: datetime
+    user_id: int
+
+
+class GiveawayParticipantsPageDM(BaseModel):
+    participants: list[GiveawayParticipantDM]
+    next_cursor: str | None = None
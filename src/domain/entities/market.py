@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from src.application.common.const import GiftRarity, ShopType
+from src.application.common.const import GiftRarity, MarketEventType, PurchaseStatus, ShopType
 from src.application.dto.base import BaseDTO
 
 
@@ -24,13 +24,15 @@ class OrderDM(CreateOrderDM):
     buyer_id: int | None = None
     price: float
     completed_order_date: datetime | None = None
-    is_vip: bool | None = None
+    is_vip: bool = False
     min_step: float | None = None
     auction_end_time: datetime | None = None
+    created_at: datetime | None = None
 
 
 class ReadOrderDM(OrderDM):
     bids: list["ReadBidDM"]
+    bids_count: int = 0
 
 
 class UserGiftDM(BaseDTO):
@@ -47,14 +49,22 @@ class UserGiftDM(BaseDTO):
     rarity: GiftRarity
     is_active: bool
     price: float | None = None
-    is_vip: bool | None = None
+    is_vip: bool = False
     min_step: float | None = None
     auction_end_time: datetime | None = None
 
 
+class GiftCursorDM(BaseDTO):
+    is_vip: bool
+    price: float | None = None
+    created_at: datetime | None = None
+    id: int
+
+
 class GiftFiltersDM(BaseDTO):
     limit: int | None
     offset: int | None
+    cursor: GiftCursorDM | None = None
     from_price: float
     to_price: float
     from_gift_number: int
@@ -66,6 +76,25 @@ class GiftFiltersDM(BaseDTO):
     user_id: int
 
 
+class GiftsPageDM(BaseDTO):
+    gifts: list[OrderDM]
+    next_cursor: str | None = None
+
+
+class FacetCountDM(BaseDTO):
+    value: str
+    count: int
+
+
+class GiftFacetsDM(BaseDTO):
+    count: int
+    min_price: float | None = None
+    max_price: float | None = None
+    rarities: list[FacetCountDM]
+    types: list[FacetCountDM]
+    model_names: list[FacetCountDM]
+
+
 class BidDM(BaseDTO):
     amount: float
     gift_id: int
@@ -73,10 +102,56 @@ class BidDM(BaseDTO):
 
 
 class ReadBidDM(BaseDTO):
+    id: int
     amount: float
     created_at: datetime
 
 
+class BidCursorDM(BaseDTO):
+    created_at: datetime
+    id: int
+
+
+class BidsPageDM(BaseDTO):
+    bids: list[ReadBidDM]
+    next_cursor: str | None = None
+
+
+class BidsSummaryDM(BaseDTO):
+    count: int
+    bidders_count: int
+    top: list[ReadBidDM]
+
+
+class PlacedBidDM(BaseDTO):
+    order: OrderDM
+    user_balance: float | None = None
+    auction_end_time: datetime | None = None
+
+
 class BidSuccessDM(BaseDTO):
     user_balance: float
     created_at: datetime
+    auction_end_time: datetime | None = None
+
+
+class CreatePurchaseDM(BaseDTO):
+    order_id: int
+    buyer_id: int
+    seller_id: int
+    price: float
+    amount: float
+
+
+class PurchaseDM(CreatePurchaseDM):
+    id: int
+    status: PurchaseStatus
+    completed_at: datetime | None = None
+    created_at: datetime
+
+
+class MarketEventDM(BaseDTO):
+    type: MarketEventType
+    gift_id: int
+    price: float | None = None
+    auction_end_time: datetime | None = None
@@ -2,6 +2,8 @@ from datetime import datetime
 
 from pydantic import BaseModel
 
+from src.application.common.const import LedgerRecordType
+from src.application.dto.base import BaseDTO
 from src.domain.entities.market import OrderDM
 from src.domain.entities.wallet import WithdrawRequestDM
 
@@ -26,10 +28,47 @@ class UserDM(BaseModel):
     created_at: datetime
 
 
+class FreshUserDM(UserDM):
+    """The current user read from the database, past the authentication cache"""
+
+
 class UpdateUserBalanceDM(BaseModel):
     id: int | None = None
     deposit_comment: str | None = None
     amount: float
+    type: LedgerRecordType
+    reference_id: int | None = None
+
+
+class LedgerRecordDM(BaseDTO):
+    id: int
+    type: LedgerRecordType
+    amount: float
+    balance: float
+    reference_id: int | None
+    created_at: datetime
+
+
+class LedgerCursorDM(BaseDTO):
+    created_at: datetime
+    id: int
+
+
+class LedgerPageDM(BaseDTO):
+    records: list[LedgerRecordDM]
+    next_cursor: str | None = None
+
+
+class BalanceAtDM(BaseDTO):
+    balance: float
+    at: datetime
+
+
+class BalanceCheckDM(BaseDTO):
+    user_id: int
+    balance: float
+    ledger_sum: float
+    ledger_balance: float | None
 
 
 class FullUserInfoDM(UserDM):
@@ -1,7 +1,11 @@
 from aiogram import Dispatcher
+from redis.asyncio import Redis
 
 from src.application.common.utils import get_bot
 from src.entrypoint.config import Config
+from src.infrastructure.database.session import dispose_engines
+from src.infrastructure.gateways.cache import RedisUserCache
+from src.infrastructure.gateways.events import RedisEventGateway
 from src.presentation.bot.handlers.base import router
 from src.presentation.bot.handlers.inline import inline_router
 
@@ -10,7 +14,20 @@ async def start_bot() -> None:
     config = Config()
     bot = get_bot(config.bot.BOT_TOKEN)
     bot_username = (await bot.get_me()).username
-    dp = Dispatcher(config=config, bot=bot, bot_username=bot_username)
+    redis = Redis.from_url(config.redis.REDIS_URL, decode_responses=True)
+    user_cache = RedisUserCache(redis, config.cache)
+    dp = Dispatcher(
+        config=config,
+        bot=bot,
+        bot_username=bot_username,
+        user_cache=user_cache,
+        event_publisher=RedisEventGateway(redis),
+    )
     dp.include_routers(router, inline_router)
     await bot.delete_webhook(drop_pending_updates=True)
-    await dp.start_polling(bot)
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await user_cache.close()
+        await redis.aclose()
+        await dispose_engines()
@@ -1,4 +1,5 @@
 from os import environ
+from typing import Literal
 
 from pydantic import BaseModel, Field
 
@@ -35,6 +36,16 @@ class PostgresConfig(BaseModel):
     POSTGRES_HOST: str
     POSTGRES_PORT: int
     POSTGRES_DB: str
+    POSTGRES_POOL_SIZE: int = Field(default=20)
+    POSTGRES_MAX_OVERFLOW: int = Field(default=10)
+    POSTGRES_POOL_RECYCLE: int = Field(default=1800)
+    POSTGRES_POOL_TIMEOUT: int = Field(default=30)
+    POSTGRES_CONNECT_TIMEOUT: int = Field(default=10)
+    POSTGRES_COMMAND_TIMEOUT: int = Field(default=60)
+    POSTGRES_REPLICA_URLS: str = Field(default="")
+    POSTGRES_PRIMARY_PIN_SECONDS: int = Field(default=5)
+    POSTGRES_SQL_STATS: bool = Field(default=False)
+    POSTGRES_REPEATED_QUERY_THRESHOLD: int = Field(default=3)
 
     @property
     def database_url(self) -> str:
@@ -43,6 +54,10 @@ class PostgresConfig(BaseModel):
             f"{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}?async_fallback=True"
         )
 
+    @property
+    def replica_urls(self) -> list[str]:
+        return self.POSTGRES_REPLICA_URLS.split()
+
 
 class BotConfig(BaseModel):
     BOT_TOKEN: str
@@ -79,9 +94,44 @@ class RedisConfig(BaseModel):
     REDIS_URL: str = Field(default="redis://localhost:6379")
 
 
+class CacheConfig(BaseModel):
+    CACHE_BACKEND: Literal["memory", "redis"] = Field(default="memory")
+    CACHE_MAX_SIZE: int = Field(default=1024)
+    MARKET_CACHE_TTL: int = Field(default=5)
+    FACETS_CACHE_TTL: int = Field(default=15)
+    USER_CACHE_TTL: int = Field(default=10)
+    USER_CACHE_MAX_SIZE: int = Field(default=10000)
+    CHANNEL_CACHE_TTL: int = Field(default=1800)
+    CHANNEL_CACHE_REFRESH: int = Field(default=300)
+    CHANNEL_NOT_FOUND_CACHE_TTL: int = Field(default=60)
+    CHANNEL_PHOTO_CACHE_TTL: int = Field(default=1500)
+
+
+class OrderBookConfig(BaseModel):
+    ORDER_BOOK_ENABLED: bool = Field(default=False)
+    ORDER_BOOK_CHECK_INTERVAL: int = Field(default=60)
+
+
+class AuctionConfig(BaseModel):
+    AUCTION_EXTEND_WINDOW: int = Field(default=30)
+    AUCTION_EXTEND_SECONDS: int = Field(default=30)
+
+
+class IdempotencyConfig(BaseModel):
+    IDEMPOTENCY_TTL: int = Field(default=86400)
+    IDEMPOTENCY_LOCK_TTL: int = Field(default=60)
+    IDEMPOTENCY_WAIT_TIMEOUT: int = Field(default=10)
+
+
 class Config(BaseModel):
     app: AppConfig = Field(default_factory=lambda: AppConfig(**environ))  # type: ignore
     postgres: PostgresConfig = Field(default_factory=lambda: PostgresConfig(**environ))  # type: ignore
     bot: BotConfig = Field(default_factory=lambda: BotConfig(**environ))  # type: ignore
     tonapi: TonapiConfig = Field(default_factory=lambda: TonapiConfig(**environ))  # type: ignore
     redis: RedisConfig = Field(default_factory=lambda: RedisConfig(**environ))  # type: ignore
+    cache: CacheConfig = Field(default_factory=lambda: CacheConfig(**environ))  # type: ignore
+    order_book: OrderBookConfig = Field(default_factory=lambda: OrderBookConfig(**environ))  # type: ignore
+    auction: AuctionConfig = Field(default_factory=lambda: AuctionConfig(**environ))  # type: ignore
+    idempotency: IdempotencyConfig = Field(
+        default_factory=lambda: IdempotencyConfig(**environ)  # type: ignore
+    )
@@ -1,35 +1,62 @@
+from random import choice
 from typing import AsyncIterable
 
 from aiogram import Bot
+from bullmq import Queue
 from dishka import AnyOf, Scope, from_context, provide
 from dishka.integrations.fastapi import FastapiProvider
 from fastapi import Request
 from pyrogram.client import Client
+from redis.asyncio import Redis
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.application.interactors import giveaway, market, star, user
 from src.application.interactors.history import ActivityInteractor, HistoryInteractor
 from src.application.interactors.wallet import WithdrawRequestInteractor
+from src.application.interfaces.auction import AuctionScheduler
 from src.application.interfaces.auth import InitDataValidator, TokenDecoder, TokenEncoder
-from src.application.interfaces.database import DBSession
+from src.application.interfaces.cache import CacheStorage, ChannelCache, UserCache
+from src.application.interfaces.database import DBSession, PrimaryPin
+from src.application.interfaces.events import EventPublisher, EventSubscriber
 from src.application.interfaces.giveaway import GiveawayManager, GiveawayReader, GiveawaySaver
 from src.application.interfaces.history import HistoryReader, HistorySaver
+from src.application.interfaces.idempotency import IdempotencyStorage
+from src.application.interfaces.ledger import LedgerReader
 from src.application.interfaces.market import OrderManager, OrderReader, OrderSaver
+from src.application.interfaces.purchase import PurchaseManager, PurchaseReader, PurchaseSaver
+from src.application.interfaces.queue import TaskQueue
 from src.application.interfaces.star import StarManager, StarOrderReader, StarOrderSaver
 from src.application.interfaces.user import UserManager, UserReader, UserSaver
 from src.application.interfaces.wallet import WithdrawRequestSaver
 from src.domain.entities.bot import BotInfoDM
-from src.domain.entities.user import UserDM
+from src.domain.entities.user import FreshUserDM, UserDM
 from src.entrypoint.config import Config
-from src.infrastructure.database.session import new_session_maker
+from src.infrastructure.database.session import (
+    ReplicaSession,
+    new_replica_session_makers,
+    new_session_maker,
+)
+from src.infrastructure.gateways.auction import RedisAuctionScheduler
 from src.infrastructure.gateways.auth import TelegramGateway, TokenGateway
+from src.infrastructure.gateways.cache import (
+    RedisChannelCache,
+    RedisUserCache,
+    new_cache_storage,
+)
+from src.infrastructure.gateways.events import MarketEventHub, RedisEventGateway
 from src.infrastructure.gateways.giveaway import GiveawayGateway
 from src.infrastructure.gateways.history import HistoryGateway
+from src.infrastructure.gateways.idempotency import RedisIdempotencyGateway
+from src.infrastructure.gateways.ledger import LedgerGateway
 from src.infrastructure.gateways.market import MarketGateway
+from src.infrastructure.gateways.purchase import PurchaseGateway
+from src.infrastructure.gateways.queue import BullMQTaskQueue
+from src.infrastructure.gateways.replica import RedisPrimaryPin
 from src.infrastructure.gateways.star import StarGateway
 from src.infrastructure.gateways.user import UserGateway
 from src.infrastructure.gateways.wallet import WalletGateway
-from src.presentation.api.authentication import get_user_by_token
+from src.infrastructure.order_book import OrderBook
+from src.presentation.api.authentication import get_token_user_id, get_user_by_token
 
 
 class AppProvider(FastapiProvider):
@@ -46,11 +73,70 @@ class AppProvider(FastapiProvider):
     def get_session_maker(self, config: Config) -> async_sessionmaker[AsyncSession]:
         return new_session_maker(config.postgres)
 
+    @provide(scope=Scope.APP)
+    def get_replica_session_makers(self, config: Config) -> list[async_sessionmaker[AsyncSession]]:
+        return new_replica_session_makers(config.postgres)
+
+    @provide(scope=Scope.APP)
+    async def get_redis(self, config: Config) -> AsyncIterable[Redis]:
+        redis = Redis.from_url(config.redis.REDIS_URL, decode_responses=True)
+        yield redis
+        await redis.aclose()
+
+    event_publisher = provide(RedisEventGateway, scope=Scope.APP, provides=EventPublisher)
+    event_subscriber = provide(MarketEventHub, scope=Scope.APP, provides=EventSubscriber)
+    auction_scheduler = provide(RedisAuctionScheduler, scope=Scope.APP, provides=AuctionScheduler)
+    idempotency_storage = provide(
+        RedisIdempotencyGateway, scope=Scope.APP, provides=IdempotencyStorage
+    )
+
+    @provide(scope=Scope.APP)
+    async def get_task_queue(self, config: Config) -> AsyncIterable[TaskQueue]:
+        queue = Queue("gifts", {"connection": config.redis.REDIS_URL})  # type: ignore
+        task_queue = BullMQTaskQueue(queue)
+        yield task_queue
+        await task_queue.close()
+
+    @provide(scope=Scope.APP)
+    async def get_cache_storage(self, config: Config) -> AsyncIterable[CacheStorage]:
+        cache = new_cache_storage(config.cache, config.redis)
+        yield cache
+        await cache.close()
+
+    @provide(scope=Scope.APP)
+    async def get_user_cache(self, redis: Redis, config: Config) -> AsyncIterable[UserCache]:
+        user_cache = RedisUserCache(redis, config.cache)
+        yield user_cache
+        await user_cache.close()
+
+    @provide(scope=Scope.APP)
+    async def get_channel_cache(
+        self, redis: Redis, config: Config
+    ) -> AsyncIterable[ChannelCache]:
+        channel_cache = RedisChannelCache(redis, config.cache)
+        yield channel_cache
+        await channel_cache.close()
+
+    @provide(scope=Scope.APP)
+    def get_primary_pin(self, redis: Redis, config: Config) -> PrimaryPin:
+        return RedisPrimaryPin(redis, config.postgres)
+
     @provide(scope=Scope.REQUEST)
     async def authentication(
-        self, request: Request, user_gateway: UserReader, token_gateway: TokenDecoder
+        self,
+        request: Request,
+        user_gateway: UserReader,
+        token_gateway: TokenDecoder,
+        user_cache: UserCache,
     ) -> UserDM:
-        return await get_user_by_token(request, user_gateway, token_gateway)
+        return await get_user_by_token(request, user_gateway, token_gateway, user_cache)
+
+    @provide(scope=Scope.REQUEST)
+    async def fresh_authentication(
+        self, request: Request, user_gateway: UserManager, token_gateway: TokenDecoder
+    ) -> FreshUserDM:
+        user = await get_user_by_token(request, user_gateway, token_gateway)
+        return FreshUserDM(**user.model_dump())
 
     @provide(scope=Scope.REQUEST)
     async def get_session(
@@ -68,6 +154,24 @@ class AppProvider(FastapiProvider):
                 await session.rollback()
                 raise
 
+    @provide(scope=Scope.REQUEST)
+    async def get_replica_session(
+        self,
+        request: Request,
+        session: AsyncSession,
+        replica_session_makers: list[async_sessionmaker[AsyncSession]],
+        token_gateway: TokenDecoder,
+        primary_pin: PrimaryPin,
+    ) -> AsyncIterable[ReplicaSession]:
+        """A random replica, the primary session when there are none or the user is pinned"""
+
+        user_id = get_token_user_id(request, token_gateway)
+        if not replica_session_makers or (user_id and await primary_pin.is_pinned(user_id)):
+            yield ReplicaSession(session)
+            return
+        async with choice(replica_session_makers)() as replica_session:
+            yield ReplicaSession(replica_session)
+
     @provide(scope=Scope.REQUEST, provides=AnyOf[TokenEncoder, TokenDecoder])
     async def get_token_gateway(self, config: Config) -> TokenGateway:
         return TokenGateway(app_config=config.app)
@@ -76,28 +180,66 @@ class AppProvider(FastapiProvider):
     async def get_telegram_gateway(self, config: Config) -> TelegramGateway:
         return TelegramGateway(bot_config=config.bot)
 
-    user_gateway = provide(
-        UserGateway, scope=Scope.REQUEST, provides=AnyOf[UserManager, UserReader, UserSaver]
-    )
-    market_gateway = provide(
-        MarketGateway, scope=Scope.REQUEST, provides=AnyOf[OrderManager, OrderSaver, OrderReader]
-    )
+    @provide(scope=Scope.APP)
+    def get_order_book(
+        self, session_maker: async_sessionmaker[AsyncSession], config: Config
+    ) -> OrderBook:
+        return OrderBook(session_maker, config.order_book.ORDER_BOOK_ENABLED)
+
+    @provide(scope=Scope.REQUEST, provides=AnyOf[OrderManager, OrderSaver])
+    async def get_market_gateway(
+        self, session: AsyncSession, cache: CacheStorage, order_book: OrderBook
+    ) -> MarketGateway:
+        return MarketGateway(session, cache, order_book)
+
+    @provide(scope=Scope.REQUEST, provides=OrderReader)
+    async def get_market_reader(
+        self, session: ReplicaSession, cache: CacheStorage, order_book: OrderBook
+    ) -> MarketGateway:
+        return MarketGateway(session, cache, order_book)
+
+    @provide(scope=Scope.REQUEST, provides=AnyOf[UserManager, UserSaver])
+    async def get_user_gateway(self, session: AsyncSession, user_cache: UserCache) -> UserGateway:
+        return UserGateway(session, user_cache)
+
+    @provide(scope=Scope.REQUEST, provides=UserReader)
+    async def get_user_reader(self, session: ReplicaSession, user_cache: UserCache) -> UserGateway:
+        return UserGateway(session, user_cache)
+
+    @provide(scope=Scope.REQUEST, provides=StarOrderReader)
+    async def get_star_reader(self, session: ReplicaSession) -> StarGateway:
+        return StarGateway(session)
+
+    @provide(scope=Scope.REQUEST, provides=HistoryReader)
+    async def get_history_reader(self, session: ReplicaSession) -> HistoryGateway:
+        return HistoryGateway(session)
+
+    @provide(scope=Scope.REQUEST, provides=GiveawayReader)
+    async def get_giveaway_reader(self, session: ReplicaSession) -> GiveawayGateway:
+        return GiveawayGateway(session)
+
+    ledger_gateway = provide(LedgerGateway, scope=Scope.REQUEST, provides=LedgerReader)
     wallet_gateway = provide(WalletGateway, scope=Scope.REQUEST, provides=AnyOf[WithdrawRequestSaver])
     star_gateway = provide(
-        StarGateway, scope=Scope.REQUEST, provides=AnyOf[StarManager, StarOrderReader, StarOrderSaver]
+        StarGateway, scope=Scope.REQUEST, provides=AnyOf[StarManager, StarOrderSaver]
     )
-    history_gateway = provide(
-        HistoryGateway, scope=Scope.REQUEST, provides=AnyOf[HistoryReader, HistorySaver]
+    history_gateway = provide(HistoryGateway, scope=Scope.REQUEST, provides=HistorySaver)
+    purchase_gateway = provide(
+        PurchaseGateway,
+        scope=Scope.REQUEST,
+        provides=AnyOf[PurchaseManager, PurchaseReader, PurchaseSaver],
     )
     giveaway_gateway = provide(
         GiveawayGateway,
         scope=Scope.REQUEST,
-        provides=AnyOf[GiveawayManager, GiveawayReader, GiveawaySaver],
+        provides=AnyOf[GiveawayManager, GiveawaySaver],
     )
 
     # User
     login_interactor = provide(user.LoginInteractor, scope=Scope.REQUEST)
     get_user_interactor = provide(user.GetUserInteractor, scope=Scope.REQUEST)
+    get_ledger_interactor = provide(user.GetLedgerInteractor, scope=Scope.REQUEST)
+    get_balance_at_interactor = provide(user.GetBalanceAtInteractor, scope=Scope.REQUEST)
     get_user_gifts_interactor = provide(user.GetUserGiftsInteractor, scope=Scope.REQUEST)
     get_user_gift_interactor = provide(user.GetUserGiftInteractor, scope=Scope.REQUEST)
     update_user_gift_interactor = provide(user.UpdateUserGiftInteractor, scope=Scope.REQUEST)
@@ -107,8 +249,15 @@ class AppProvider(FastapiProvider):
     # Gift
     create_order_interactor = provide(market.CreateOrderInteractor, scope=Scope.REQUEST)
     buy_gift_interactor = provide(market.BuyGiftInteractor, scope=Scope.REQUEST)
+    transfer_purchase_interactor = provide(market.TransferPurchaseInteractor, scope=Scope.REQUEST)
+    get_purchase_interactor = provide(market.GetPurchaseInteractor, scope=Scope.REQUEST)
     get_gifts_interactor = provide(market.GetGiftsInteractor, scope=Scope.REQUEST)
+    get_gift_facets_interactor = provide(market.GetGiftFacetsInteractor, scope=Scope.REQUEST)
     get_gift_interactor = provide(market.GetGiftInteractor, scope=Scope.REQUEST)
+    get_gift_bids_interactor = provide(market.GetGiftBidsInteractor, scope=Scope.REQUEST)
+    get_gift_bids_summary_interactor = provide(
+        market.GetGiftBidsSummaryInteractor, scope=Scope.REQUEST
+    )
     new_bid_interactor = provide(market.NewBidInteractor, scope=Scope.REQUEST)
     buy_gifts_from_cart_interactor = provide(market.BuyGiftsFromCartInteractor, scope=Scope.REQUEST)
 
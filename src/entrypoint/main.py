@@ -7,9 +7,12 @@ from fastapi import FastAPI
 from pyrogram.client import Client
 
 from src.application.common.utils import get_bot
+from src.application.interfaces.events import EventSubscriber
 from src.entrypoint.config import Config
 from src.entrypoint.ioc import AppProvider
 from src.entrypoint.queue import run_queue
+from src.infrastructure.database.session import dispose_engines
+from src.infrastructure.order_book import OrderBook, run_order_book
 from src.presentation.api.middlewares import setup_middlewares
 from src.presentation.api.routers import setup_routers
 from src.presentation.client.handlers.setup import setup_client_handlers
@@ -23,12 +26,19 @@ def get_fastapi_app() -> FastAPI:
 
     async def on_startup() -> None:
         await client.start()
-        if not config.app.DEBUG:
-            create_task(run_queue(client, bot, config))
+        create_task(run_queue(client, bot, config, container))
+        if config.order_book.ORDER_BOOK_ENABLED:
+            order_book = await container.get(OrderBook)
+            events = await container.get(EventSubscriber)
+            create_task(
+                run_order_book(order_book, config.order_book.ORDER_BOOK_CHECK_INTERVAL, events)
+            )
 
     async def on_shutdown() -> None:
         await bot.session.close()
         await client.stop()
+        await container.close()
+        await dispose_engines()
 
     app = FastAPI(
         debug=config.app.DEBUG,
@@ -1,25 +1,40 @@
 import asyncio
 import signal
+from datetime import datetime, timedelta, timezone
 from typing import Callable
 
 from aiogram import Bot
 from bullmq.job import Job
 from bullmq.types import WorkerOptions
 from bullmq.worker import Worker
+from dishka import AsyncContainer
 from pyrogram.client import Client
 
+from src.application.common.const import TRANSFER_PURCHASE_JOB, PurchaseStatus
 from src.application.common.send_gift import send_gift
+from src.application.common.utils import get_file_logger, send_message
+from src.application.interactors.market import TransferPurchaseInteractor
+from src.application.interfaces.database import DBSession
+from src.application.interfaces.purchase import PurchaseManager
+from src.application.interfaces.queue import TaskQueue
 from src.entrypoint.config import Config
 
 
+logger = get_file_logger(__name__, "src/logs/queue.log")
+
+RECONCILE_INTERVAL_SECONDS = 60
+STALE_PURCHASE_SECONDS = 600
+
+
 class CustomWorker(Worker):
     def __init__(
         self,
         name: str,
-        processor: Callable[[Job, str, Client, Bot, Config], asyncio.Future],
+        processor: Callable[[Job, str, Client, Bot, Config, AsyncContainer], asyncio.Future],
         client: Client,
         bot: Bot,
         config: Config,
+        container: AsyncContainer,
         opts: WorkerOptions = {},
     ) -> None:
         super().__init__(name, processor, opts)  # type: ignore
@@ -27,32 +42,99 @@ class CustomWorker(Worker):
         self.processor = processor
         self.bot = bot
         self.config = config
+        self.container = container
 
     async def processJob(self, job: Job, token: str) -> None:
         self.jobs.add((job, token))
-        result = await self.processor(job, token, self.telegram_client, self.bot, self.config)
-        if not self.forceClosing:
-            await self.scripts.moveToCompleted(
-                job,
-                result,
-                job.opts.get("removeOnComplete", False),
-                token,
-                self.opts,
-                fetchNext=False,
+        try:
+            result = await self.processor(
+                job, token, self.telegram_client, self.bot, self.config, self.container
             )
-            job.returnvalue = result
-            job.attemptsMade = job.attemptsMade + 1
-        self.emit("completed", job, result)
-        self.jobs.remove((job, token))
+            if not self.forceClosing:
+                await self.scripts.moveToCompleted(
+                    job,
+                    result,
+                    job.opts.get("removeOnComplete", False),
+                    token,
+                    self.opts,
+                    fetchNext=False,
+                )
+                job.returnvalue = result
+                job.attemptsMade = job.attemptsMade + 1
+            self.emit("completed", job, result)
+        except Exception as e:
+            logger.error(f"CustomWorker: job {job.name} #{job.id} failed: {e}")
+            try:
+                if not self.forceClosing:
+                    await job.moveToFailed(e, token)
+                self.emit("failed", job, e)
+            except Exception as e:
+                logger.error(f"CustomWorker: could not mark job #{job.id} as failed: {e}")
+        finally:
+            self.jobs.remove((job, token))
 
 
-async def process(job, _, client: Client, bot: Bot, config: Config) -> None:
+async def process(
+    job, _, client: Client, bot: Bot, config: Config, container: AsyncContainer
+) -> None:
+    if job.name == TRANSFER_PURCHASE_JOB:
+        async with container() as request_container:
+            interactor = await request_container.get(TransferPurchaseInteractor)
+            await interactor(int(job.data.get("purchase_id") or 0))
+        return
     await send_gift(
         int(job.data.get("user_id") or 0), int(job.data.get("gift_id") or 0), client, bot, config
     )
 
 
-async def run_queue(client: Client, bot: Bot, config: Config) -> None:
+async def reconcile_purchases(container: AsyncContainer, bot: Bot, config: Config) -> None:
+    """Enqueue purchases that never reached the queue and hold transfers that got stuck.
+
+    A purchase left in TRANSFERRING by a crashed or failed job may or may not have had its gift
+    sent, so it is moved to REVIEW for the owners instead of being retried or refunded.
+    """
+
+    now = datetime.now(tz=timezone.utc)
+    updated_before = now - timedelta(seconds=STALE_PURCHASE_SECONDS)
+    async with container() as request_container:
+        db_session = await request_container.get(DBSession)
+        purchase_gateway = await request_container.get(PurchaseManager)
+        # touching the reserved rows enqueues each one once per stale window, however many
+        # processes run the pass and however long the queue is
+        reserved = await purchase_gateway.update_stale(
+            dict(updated_at=now), PurchaseStatus.RESERVED, updated_before
+        )
+        held = await purchase_gateway.update_stale(
+            dict(status=PurchaseStatus.REVIEW), PurchaseStatus.TRANSFERRING, updated_before
+        )
+        await db_session.commit()
+
+    if reserved:
+        task_queue = await container.get(TaskQueue)
+        await task_queue.add_bulk(
+            [(TRANSFER_PURCHASE_JOB, {"purchase_id": purchase.id}) for purchase in reserved]
+        )
+    if held:
+        purchases_ids = ", ".join(f"#{purchase.id}" for purchase in held)
+        logger.error(f"reconcile_purchases: stuck transfers held for review: {purchases_ids}")
+        await send_message(
+            bot,
+            f"Purchases stuck in transfer, check the gifts by hand: {purchases_ids}",
+            config.bot.owners_chat_id,
+            parse_mode=None,
+        )
+
+
+async def run_reconciliation(container: AsyncContainer, bot: Bot, config: Config) -> None:
+    while True:
+        try:
+            await reconcile_purchases(container, bot, config)
+        except Exception as e:
+            logger.error(f"run_reconciliation: {e}")
+        await asyncio.sleep(RECONCILE_INTERVAL_SECONDS)
+
+
+async def run_queue(client: Client, bot: Bot, config: Config, container: AsyncContainer) -> None:
     shutdown_event = asyncio.Event()
 
     def signal_handler(signal, frame) -> None:
@@ -62,8 +144,10 @@ async def run_queue(client: Client, bot: Bot, config: Config) -> None:
     signal.signal(signal.SIGTERM, signal_handler)
     signal.signal(signal.SIGINT, signal_handler)
 
-    worker = CustomWorker("gifts", process, client, bot, config, {"connection": config.redis.REDIS_URL})  # type: ignore
+    worker = CustomWorker("gifts", process, client, bot, config, container, {"connection": config.redis.REDIS_URL})  # type: ignore
+    reconciliation_task = asyncio.create_task(run_reconciliation(container, bot, config))
 
     await shutdown_event.wait()
+    reconciliation_task.cancel()
     await worker.close()
     asyncio.get_running_loop().stop()
@@ -1,63 +1,189 @@
 import asyncio
 import sys
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from bullmq import Queue
+from redis.asyncio import Redis
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 
 BASE_DIR = Path(__file__).resolve().parents[3]
 sys.path.append(str(BASE_DIR))
 
-from src.application.common.const import HistoryType  # noqa: E402
+from src.application.common.const import HistoryType, LedgerRecordType, MarketEventType  # noqa: E402
+from src.application.common.utils import get_file_logger  # noqa: E402
+from src.application.interfaces.cache import CacheStorage, UserCache  # noqa: E402
 from src.domain.entities.history import CreateHistoryDM  # noqa: E402
+from src.domain.entities.market import MarketEventDM  # noqa: E402
 from src.domain.entities.user import UpdateUserBalanceDM  # noqa: E402
 from src.entrypoint.config import Config  # noqa: E402
-from src.infrastructure.database.session import new_session_maker  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.auction import RedisAuctionScheduler  # noqa: E402
+from src.infrastructure.gateways.cache import RedisUserCache, new_cache_storage  # noqa: E402
+from src.infrastructure.gateways.events import RedisEventGateway  # noqa: E402
 from src.infrastructure.gateways.history import HistoryGateway  # noqa: E402
 from src.infrastructure.gateways.market import MarketGateway  # noqa: E402
 from src.infrastructure.gateways.user import UserGateway  # noqa: E402
 
 
-async def start_auction_tracker() -> None:
-    config = Config()
-    session_maker = new_session_maker(config.postgres)
-    queue = Queue("gifts", {"connection": config.redis.REDIS_URL})  # type: ignore
+logger = get_file_logger(__name__, "src/logs/market.log")
+
+MAX_SLEEP_SECONDS = 1
+RESCHEDULE_INTERVAL_SECONDS = 60
+SETTLE_RETRY_SECONDS = 5
+
+
+class AuctionTracker:
+    """Settles auctions from the end time schedule as soon as they end.
 
-    async with session_maker() as session:
-        market_gateway, user_gateway = MarketGateway(session), UserGateway(session)
-        history_gateway = HistoryGateway(session)
-        orders = await market_gateway.get_auction_orders()
-        if not orders:
-            return
-        for order in orders:
-            if not order.buyer_id:
-                data = dict(is_active=False, min_step=None, auction_end_time=None, price=None)
-                await market_gateway.withdraw_from_market(data, id=order.id)
-                await market_gateway.delete_auction_bids(gift_id=order.id)
-                await session.commit()
-                return
-            now = datetime.now()
-            updated_data = {"is_completed": True, "completed_order_date": now}
-            await market_gateway.update_order(updated_data, id=order.id)
-            await user_gateway.update_balance(
-                UpdateUserBalanceDM(id=order.seller_id, amount=order.price)
+    The schedule is filled by CreateOrderInteractor and re-synced from the database every
+    RESCHEDULE_INTERVAL_SECONDS, so auctions created elsewhere are picked up as well
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        scheduler: RedisAuctionScheduler,
+        queue: Queue,
+        cache: CacheStorage,
+        event_publisher: RedisEventGateway,
+        user_cache: UserCache,
+    ) -> None:
+        self._session_maker = session_maker
+        self._scheduler = scheduler
+        self._queue = queue
+        self._cache = cache
+        self._event_publisher = event_publisher
+        self._user_cache = user_cache
+
+    async def run(self) -> None:
+        rescheduled_at = 0.0
+        while True:
+            loop_time = asyncio.get_running_loop().time()
+            try:
+                if loop_time - rescheduled_at >= RESCHEDULE_INTERVAL_SECONDS:
+                    await self.reschedule()
+                    rescheduled_at = loop_time
+                if orders_ids := await self._scheduler.pop_due(datetime.now(tz=timezone.utc)):
+                    await self._settle_or_reschedule(orders_ids)
+            except Exception as e:
+                logger.error(f"AuctionTracker: {e}")
+            await asyncio.sleep(await self._get_sleep_seconds())
+
+    async def reschedule(self) -> None:
+        async with self._session_maker() as session:
+            orders = await MarketGateway(session).get_pending_auctions()
+        await self._scheduler.schedule(
+            {order.id: order.auction_end_time for order in orders if order.auction_end_time}
+        )
+
+    async def settle(self, orders_ids: list[int]) -> None:
+        now = datetime.now(tz=timezone.utc)
+        async with self._session_maker() as session:
+            market_gateway = MarketGateway(session, self._cache)
+            orders = await market_gateway.get_pending_auctions(orders_ids)
+            extended = {
+                order.id: order.auction_end_time
+                for order in orders
+                if order.auction_end_time and order.auction_end_time > now
+            }
+            ended = [order for order in orders if order.id not in extended]
+
+            withdrawn_ids = await market_gateway.withdraw_auctions(
+                [order.id for order in ended if not order.buyer_id]
             )
-            await history_gateway.save(
-                CreateHistoryDM(
-                    user_id=order.buyer_id,
-                    type=HistoryType.FINAL_BID_GIFT,
-                    price=order.price,
-                    gift=order.type,
-                    gift_number=order.number,
-                    model_name=order.model_name,
-                )
+            sold = await market_gateway.complete_auctions(
+                [order.id for order in ended if order.buyer_id], datetime.now()
             )
+            await UserGateway(session, self._user_cache).update_balances(
+                [
+                    UpdateUserBalanceDM(
+                        id=order.seller_id,
+                        amount=order.price,
+                        type=LedgerRecordType.SALE,
+                        reference_id=order.id,
+                    )
+                    for order in sold
+                ]
+            )
+            if sold:
+                await HistoryGateway(session).save_many(
+                    [
+                        CreateHistoryDM(
+                            user_id=order.buyer_id,  # type: ignore
+                            type=HistoryType.FINAL_BID_GIFT,
+                            price=order.price,
+                            gift=order.type,
+                            gift_number=order.number,
+                            model_name=order.model_name,
+                        )
+                        for order in sold
+                    ]
+                )
             await session.commit()
 
-            await queue.add("send_gift", {"user_id": order.buyer_id, "gift_id": order.gift_id})
+        await self._scheduler.schedule(extended)
+        if sold:
+            await self._queue.addBulk(
+                [
+                    {
+                        "name": "send_gift",
+                        "data": {"user_id": order.buyer_id, "gift_id": order.gift_id},
+                    }
+                    for order in sold
+                ]
+            )
+        for order in sold:
+            await self._event_publisher.publish(
+                MarketEventDM(type=MarketEventType.SOLD, gift_id=order.id, price=order.price)
+            )
+        for order_id in withdrawn_ids:
+            await self._event_publisher.publish(
+                MarketEventDM(type=MarketEventType.DELISTED, gift_id=order_id)
+            )
+        logger.info(f"AuctionTracker: sold {len(sold)}, withdrawn {len(withdrawn_ids)} auctions")
+
+    async def _settle_or_reschedule(self, orders_ids: list[int]) -> None:
+        """Put the auctions back on the schedule when settling fails, they are taken off it
+        before they are settled
+        """
+
+        try:
+            await self.settle(orders_ids)
+        except Exception:
+            retry_at = datetime.now(tz=timezone.utc) + timedelta(seconds=SETTLE_RETRY_SECONDS)
+            await self._scheduler.schedule({order_id: retry_at for order_id in orders_ids})
+            raise
 
-    await queue.close()
+    async def _get_sleep_seconds(self) -> float:
+        if not (next_end_time := await self._scheduler.get_next_end_time()):
+            return MAX_SLEEP_SECONDS
+        seconds = (next_end_time - datetime.now(tz=timezone.utc)).total_seconds()
+        return min(max(seconds, 0), MAX_SLEEP_SECONDS)
+
+
+async def start_auction_tracker() -> None:
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+    queue = Queue("gifts", {"connection": config.redis.REDIS_URL})  # type: ignore
+    cache = new_cache_storage(config.cache, config.redis)
+    redis = Redis.from_url(config.redis.REDIS_URL, decode_responses=True)
+    tracker = AuctionTracker(
+        session_maker,
+        RedisAuctionScheduler(redis),
+        queue,
+        cache,
+        RedisEventGateway(redis),
+        RedisUserCache(redis, config.cache),
+    )
+    try:
+        await tracker.run()
+    finally:
+        await queue.close()
+        await cache.close()
+        await redis.aclose()
+        await dispose_engines()
 
 
 if __name__ == "__main__":
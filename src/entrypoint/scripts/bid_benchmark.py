@@ -0,0 +1,160 @@
+import asyncio
+import sys
+from datetime import timedelta
+from pathlib import Path
+from time import perf_counter
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.domain.entities.market import BidDM  # noqa: E402
+from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.market import MarketGateway  # noqa: E402
+
+
+BIDDERS_COUNT = 50
+BIDS_PER_BIDDER = 20
+START_BALANCE = 1_000_000
+START_PRICE = 1
+MIN_STEP = 1
+SEED_USER_ID = 9_100_000_000
+SEED_ORDER_ID = 1_100_000_000
+
+SEED_QUERIES = (
+    f"""
+    INSERT INTO users (id, photo_url, username, first_name, deposit_comment, balance, commission, is_banned)
+    SELECT {SEED_USER_ID} + g, '', 'bidder' || g, 'bidder', 'bidder-' || g, {START_BALANCE}, 0, false
+    FROM generate_series(0, {BIDDERS_COUNT}) AS g
+    """,
+    f"""
+    INSERT INTO orders (
+        id, gift_id, number, type, price, model, pattern, background, model_name, pattern_name,
+        background_name, rarity, min_step, auction_end_time, is_active, is_vip, is_completed,
+        seller_id
+    )
+    VALUES (
+        {SEED_ORDER_ID}, {SEED_ORDER_ID}, 1, 'Type', {START_PRICE}, 1, 1, 1, 'Model', 'Pattern',
+        'Background', 'COMMON', {MIN_STEP}, now() + interval '1 hour', true, false, false,
+        {SEED_USER_ID}
+    )
+    """,
+)
+CLEANUP_QUERIES = (
+    f"DELETE FROM orders WHERE id = {SEED_ORDER_ID}",
+    f"DELETE FROM users WHERE id BETWEEN {SEED_USER_ID} AND {SEED_USER_ID + BIDDERS_COUNT}",
+)
+
+
+async def run_bidder(
+    session_maker: async_sessionmaker[AsyncSession], buyer_id: int, accepted: list[BidDM]
+) -> int:
+    """Keep outbidding the current price, return the number of rejected bids"""
+
+    rejected = 0
+    for _ in range(BIDS_PER_BIDDER):
+        async with session_maker() as session:
+            market_gateway = MarketGateway(session)
+            order = await market_gateway.get_one(id=SEED_ORDER_ID)
+            amount = order.price + MIN_STEP  # type: ignore
+            bid = BidDM(gift_id=SEED_ORDER_ID, amount=amount, buyer_id=buyer_id)
+            placed_bid = await market_gateway.place_bid(bid, timedelta(0), timedelta(0))
+            if placed_bid and placed_bid.user_balance is not None:
+                await session.commit()
+                accepted.append(bid)
+            else:
+                await session.rollback()
+                rejected += 1
+    return rejected
+
+
+async def check_final_state(session: AsyncSession, accepted: list[BidDM]) -> list[str]:
+    errors = []
+    order = await MarketGateway(session).get_one(id=SEED_ORDER_ID)
+    if not order:
+        return ["order not found"]
+    best_bid = max(accepted, key=lambda bid: bid.amount)
+    if (order.price, order.buyer_id) != (best_bid.amount, best_bid.buyer_id):
+        errors.append(f"order is at {order.price} by {order.buyer_id}, best bid {best_bid}")
+
+    amounts = (
+        await session.execute(
+            text(f"SELECT amount FROM bids WHERE gift_id = {SEED_ORDER_ID} ORDER BY id")
+        )
+    ).scalars().all()
+    if len(amounts) != len(accepted):
+        errors.append(f"{len(amounts)} bids recorded, {len(accepted)} accepted")
+    if any(previous >= amount for previous, amount in zip(amounts, amounts[1:])):
+        errors.append("recorded bids are not strictly increasing")
+
+    total_balance = (
+        await session.execute(
+            text(
+                "SELECT sum(balance) FROM users "
+                f"WHERE id BETWEEN {SEED_USER_ID + 1} AND {SEED_USER_ID + BIDDERS_COUNT}"
+            )
+        )
+    ).scalar_one()
+    if total_balance != START_BALANCE * BIDDERS_COUNT - best_bid.amount:
+        errors.append(f"bidders hold {total_balance}, only the winning bid should be debited")
+
+    ledger_total = (
+        await session.execute(
+            text(
+                "SELECT sum(amount) FROM ledger_records "
+                f"WHERE user_id BETWEEN {SEED_USER_ID + 1} AND {SEED_USER_ID + BIDDERS_COUNT}"
+            )
+        )
+    ).scalar_one()
+    if ledger_total != -best_bid.amount:
+        errors.append(f"bidders ledger sums to {ledger_total}, expected {-best_bid.amount}")
+    return errors
+
+
+async def run_bid_benchmark() -> bool:
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+
+    async with session_maker() as session:
+        for query in SEED_QUERIES:
+            await session.execute(text(query))
+        await session.commit()
+
+    try:
+        accepted: list[BidDM] = []
+        started_at = perf_counter()
+        rejected = await asyncio.gather(
+            *(
+                run_bidder(session_maker, SEED_USER_ID + number, accepted)
+                for number in range(1, BIDDERS_COUNT + 1)
+            )
+        )
+        elapsed = perf_counter() - started_at
+        attempts = BIDDERS_COUNT * BIDS_PER_BIDDER
+        print(
+            f"{BIDDERS_COUNT} bidders, {attempts} attempts in {elapsed:.2f}s: "
+            f"{attempts / elapsed:.0f} bids/s, {len(accepted)} accepted, {sum(rejected)} outbid"
+        )
+
+        async with session_maker() as session:
+            errors = await check_final_state(session, accepted)
+    finally:
+        async with session_maker() as session:
+            for query in CLEANUP_QUERIES:
+                await session.execute(text(query))
+            await session.commit()
+        await dispose_engines()
+
+    for error in errors:
+        print(f"FAIL {error}")
+    if not errors:
+        print("OK final order, bids and balances are consistent")
+    return not errors
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run_bid_benchmark()) else 1)
@@ -11,7 +11,7 @@ sys.path.append(str(BASE_DIR))
 
 from src.application.common.utils import get_bot  # noqa: E402
 from src.entrypoint.config import Config  # noqa: E402
-from src.infrastructure.database.session import new_session_maker  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
 from src.infrastructure.gateways.user import UserGateway  # noqa: E402
 
 
@@ -32,6 +32,7 @@ async def send_broadcast_message(message: str, photo_path: str) -> None:
         await asyncio.sleep(0.2)
 
     await bot.session.close()
+    await dispose_engines()
 
 
 if __name__ == "__main__":
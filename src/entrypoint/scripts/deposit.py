@@ -4,6 +4,7 @@ from pathlib import Path
 from traceback import format_exc
 
 from aiogram.utils.markdown import hpre
+from redis.asyncio import Redis
 
 
 BASE_DIR = Path(__file__).resolve().parents[3]
@@ -11,20 +12,25 @@ sys.path.append(str(BASE_DIR))
 
 from src.application.common.utils import get_bot, send_message  # noqa: E402
 from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines  # noqa: E402
+from src.infrastructure.gateways.cache import RedisUserCache  # noqa: E402
 from src.infrastructure.tonapi.deposit import run_tracker  # noqa: E402
 
 
 async def start_deposit_tracker() -> None:
     config = Config()
     bot = get_bot(config.bot.BOT_TOKEN)
+    redis = Redis.from_url(config.redis.REDIS_URL, decode_responses=True)
     try:
-        await run_tracker(config, bot)
+        await run_tracker(config, bot, RedisUserCache(redis, config.cache))
     except Exception:
         message = f"DEPOSIT TRACKER ERROR:\n{format_exc(chain=False)[:4000]}"
         await send_message(bot, hpre(message), config.bot.owners_chat_id)
         raise
     finally:
         await bot.session.close()
+        await dispose_engines()
+        await redis.aclose()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,430 @@
+import asyncio
+import sys
+from datetime import datetime, timedelta, timezone
+from json import loads
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.elements import ClauseElement
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.application.common.const import MAX_GIFT_NUMBER, GiftRarity, ShopType  # noqa: E402
+from src.domain.entities.giveaway import GiveawayParticipantCursorDM  # noqa: E402
+from src.domain.entities.market import BidCursorDM, GiftCursorDM, GiftFiltersDM  # noqa: E402
+from src.domain.entities.user import LedgerCursorDM  # noqa: E402
+from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.giveaway import GiveawayGateway  # noqa: E402
+from src.infrastructure.gateways.history import HistoryGateway  # noqa: E402
+from src.infrastructure.gateways.ledger import LedgerGateway  # noqa: E402
+from src.infrastructure.gateways.market import MarketGateway  # noqa: E402
+from src.infrastructure.gateways.user import UserGateway  # noqa: E402
+from src.infrastructure.gateways.wallet import WalletGateway  # noqa: E402
+from src.presentation.api.market.params import GiftSortParams  # noqa: E402
+
+
+SEED_USER_ID = 9_000_000_000
+SEED_ORDER_ID = 1_000_000_000
+SEED_GIVEAWAY_ID = 1_000_000_000
+# the listing index each sort of the market reads in order
+LISTING_INDEXES = {
+    GiftSortParams.PRICE_LOW_TO_HIGH: "ix_orders_listing_price_vip_desc",
+    GiftSortParams.PRICE_HIGH_TO_LOW: "ix_orders_listing_price",
+    GiftSortParams.RECENTLY_ADDED: "ix_orders_listing_created_at",
+    GiftSortParams.OLDEST: "ix_orders_listing_created_at_vip_desc",
+}
+
+SEED_QUERIES = (
+    f"""
+    INSERT INTO users (id, photo_url, username, first_name, deposit_comment, balance, commission, is_banned)
+    SELECT {SEED_USER_ID} + g, '', 'seed' || g, 'seed', 'seed-' || g, 100, 0, false
+    FROM generate_series(1, 5000) AS g
+    """,
+    f"""
+    INSERT INTO orders (
+        id, gift_id, number, type, price, model, pattern, background, model_name, pattern_name,
+        background_name, rarity, min_step, auction_end_time, is_active, is_vip, is_completed,
+        seller_id, created_at
+    )
+    SELECT
+        {SEED_ORDER_ID} + g, g, g % 100000, 'Type ' || (g % 40), (g % 5000) / 10.0 + 0.1,
+        1, 1, 1, 'Model ' || (g % 300), 'Pattern', 'Background',
+        (ARRAY['COMMON', 'RARE', 'MYTHICAL', 'LEGEND'])[g % 4 + 1]::giftrarity,
+        CASE WHEN g % 7 = 0 THEN 1 END,
+        CASE WHEN g % 7 = 0 THEN now() + (g % 100 - 50) * interval '1 hour' END,
+        g % 20 = 0, g % 200 = 0, g % 20 != 0 AND g % 3 = 0,
+        {SEED_USER_ID} + g % 5000 + 1, now() - g * interval '1 minute'
+    FROM generate_series(1, 200000) AS g
+    """,
+    f"""
+    INSERT INTO bids (amount, gift_id, buyer_id)
+    SELECT g % 100 + 1, {SEED_ORDER_ID} + (g % 200000) + 1, {SEED_USER_ID} + g % 5000 + 1
+    FROM generate_series(1, 100000) AS g
+    """,
+    f"""
+    INSERT INTO historys (type, price, user_id, created_at)
+    SELECT 'DEPOSIT', 1, {SEED_USER_ID} + g % 5000 + 1, now() - g * interval '1 minute'
+    FROM generate_series(1, 200000) AS g
+    """,
+    f"""
+    INSERT INTO ledger_records (type, amount, balance, user_id, created_at)
+    SELECT 'DEPOSIT', 1, g / 5000 + 1, {SEED_USER_ID} + g % 5000 + 1, now() - g * interval '1 minute'
+    FROM generate_series(1, 200000) AS g
+    """,
+    f"""
+    INSERT INTO user_referrals (referrer_id, referral_id)
+    SELECT {SEED_USER_ID} + g % 100 + 1, {SEED_USER_ID} + g
+    FROM generate_series(1, 5000) AS g
+    """,
+    f"""
+    INSERT INTO withdraw_requests (user_id, amount, wallet, is_completed)
+    SELECT {SEED_USER_ID} + g % 5000 + 1, 1, 'wallet', g % 100 != 0
+    FROM generate_series(1, 50000) AS g
+    """,
+    f"""
+    INSERT INTO giveaways (
+        id, type, price, channels_usernames, quantity_members, is_premium, end_time, is_completed,
+        user_id
+    )
+    SELECT
+        {SEED_GIVEAWAY_ID} + g, 'SUBSCRIPTION', 0, '[]', 0, false,
+        now() + (CASE WHEN g % 50 = 0 THEN 1 ELSE -1 END) * interval '1 day',
+        g % 50 != 0 AND g % 97 != 0, {SEED_USER_ID} + g % 5000 + 1
+    FROM generate_series(1, 20000) AS g
+    """,
+    f"""
+    INSERT INTO giveaway_participants (giveaway_id, user_id, tickets, referrer_id)
+    SELECT giveaways.id, {SEED_USER_ID} + g, 1, CASE WHEN g % 10 = 0 THEN {SEED_USER_ID} + 1 END
+    FROM giveaways CROSS JOIN generate_series(1, 20) AS g
+    WHERE giveaways.user_id > {SEED_USER_ID}
+    """,
+    f"""
+    INSERT INTO giveaway_participants (giveaway_id, user_id, tickets)
+    SELECT {SEED_GIVEAWAY_ID} + 1, {SEED_USER_ID} + g, 1 FROM generate_series(21, 5000) AS g
+    """,
+    f"""
+    INSERT INTO giveaway_tickets (giveaway_id, user_id, tickets)
+    SELECT giveaway_id, user_id, tickets FROM giveaway_participants
+    WHERE user_id > {SEED_USER_ID}
+    ORDER BY giveaway_id, user_id
+    """,
+    f"""
+    INSERT INTO giveaway_gifts (giveaway_id, order_id)
+    SELECT id, {SEED_ORDER_ID} + id % 200000 + 1 FROM giveaways WHERE user_id > {SEED_USER_ID}
+    """,
+)
+
+
+Check = tuple[Callable[[], Awaitable], dict[str, set[str]]]
+
+
+class Explain(Executable, ClauseElement):
+    inherit_cache = False
+    # the compiler reads this of the top level statement once it has visited an insert or update
+    _inline = False
+
+    def __init__(self, statement: ClauseElement) -> None:
+        self.statement = statement
+
+
+@compiles(Explain, "postgresql")
+def compile_explain(element: Explain, compiler, **kw) -> str:
+    statement = compiler.process(element.statement, **kw)
+    # the plan is the only column, the result types of the explained statement do not apply
+    compiler._result_columns = []
+    return "EXPLAIN (FORMAT JSON) " + statement
+
+
+class EmptyResult:
+    def scalar_one(self) -> int:
+        return 0
+
+    def scalar_one_or_none(self) -> None:
+        return None
+
+    def scalars(self) -> "EmptyResult":
+        return self
+
+    def tuples(self) -> "EmptyResult":
+        return self
+
+    def one_or_none(self) -> None:
+        return None
+
+    def all(self) -> list:
+        return []
+
+    def keys(self) -> list[str]:
+        return []
+
+    def __iter__(self):
+        return iter([])
+
+
+class ExplainSession:
+    """Session stand-in for gateways that records the query plan instead of fetching rows"""
+
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+        self.plans: list[dict] = []
+
+    async def execute(self, statement, *args, **kwargs) -> EmptyResult:
+        result = await self._session.execute(Explain(statement))
+        plan = result.scalar_one()
+        self.plans.append((loads(plan) if isinstance(plan, str) else plan)[0]["Plan"])
+        return EmptyResult()
+
+
+def find_bitmap_indexes(plan: dict) -> list[str]:
+    indexes = [plan["Index Name"]] if plan["Node Type"] == "Bitmap Index Scan" else []
+    for child in plan.get("Plans", []):
+        indexes.extend(find_bitmap_indexes(child))
+    return indexes
+
+
+def find_scans(plan: dict) -> list[tuple[str, str | None]]:
+    """Relation and index of every scan in the plan, the index is None for a sequential scan"""
+
+    found = []
+    if "Relation Name" in plan and plan["Node Type"] != "ModifyTable":
+        if plan["Node Type"] == "Bitmap Heap Scan":
+            indexes = find_bitmap_indexes(plan)
+        else:
+            indexes = [plan.get("Index Name")]
+        found.extend((plan["Relation Name"], index) for index in indexes)
+    for child in plan.get("Plans", []):
+        found.extend(find_scans(child))
+    return found
+
+
+def check_scans(
+    scans: list[tuple[str, str | None]], expected: dict[str, set[str]]
+) -> list[str]:
+    """Problems of the scans: an expected relation that is not scanned, or is scanned
+    sequentially or by an index other than the expected ones
+    """
+
+    problems = []
+    for relation, indexes in expected.items():
+        used = {index for scan_relation, index in scans if scan_relation == relation}
+        if not used:
+            problems.append(f"{relation} is not scanned")
+        problems.extend(
+            f"{relation} scanned by {index or 'Seq Scan'}"
+            for index in sorted(used - indexes, key=str)
+        )
+    return problems
+
+
+def build_filters(
+    shop_type: ShopType, cursor: GiftCursorDM | None = None, types: list[str] | None = None
+) -> GiftFiltersDM:
+    return GiftFiltersDM(
+        limit=50,
+        offset=None,
+        cursor=cursor,
+        from_price=0,
+        to_price=99999,
+        from_gift_number=1,
+        to_gift_number=MAX_GIFT_NUMBER,
+        rarities=[rarity for rarity in GiftRarity],
+        types=types,
+        model_names=None,
+        shop_type=shop_type,
+        user_id=SEED_USER_ID + 1,
+    )
+
+
+def build_checks(session: ExplainSession) -> dict[str, Check]:
+    market_gateway, history_gateway = MarketGateway(session), HistoryGateway(session)  # type: ignore
+    giveaway_gateway, wallet_gateway = GiveawayGateway(session), WalletGateway(session)  # type: ignore
+    user_gateway, ledger_gateway = UserGateway(session), LedgerGateway(session)  # type: ignore
+    user_id, now = SEED_USER_ID + 1, datetime.now(tz=timezone.utc)
+    giveaway_id = SEED_GIVEAWAY_ID + 1
+    cursor = GiftCursorDM(is_vip=False, price=250, created_at=now - timedelta(days=30), id=SEED_ORDER_ID)
+    # counts of participants and tickets are read by giveaway_id, either index on it serves
+    giveaway_indexes = {
+        "giveaway_participants": {
+            "giveaway_participants_pkey",
+            "ix_giveaway_participants_giveaway_id_created_at",
+            "ix_giveaway_participants_giveaway_id_referrer_id",
+        },
+        "giveaway_gifts": {"giveaway_gifts_pkey"},
+    }
+    # the lists also tell whether the user takes part in each giveaway
+    user_giveaway_indexes = {
+        **giveaway_indexes,
+        "giveaway_participants": {
+            "ix_giveaway_participants_user_id",
+            *giveaway_indexes["giveaway_participants"],
+        },
+    }
+
+    checks: dict[str, Check] = {}
+    for sort_by, index in LISTING_INDEXES.items():
+        for shop_type in ShopType:
+            checks[f"MarketGateway.get_all_gifts[{sort_by}, {shop_type.value}]"] = (
+                lambda sort_by=sort_by, shop_type=shop_type: market_gateway.get_all_gifts(
+                    build_filters(shop_type), sort_by
+                ),
+                {"orders": {index}},
+            )
+        checks[f"MarketGateway.get_all_gifts[{sort_by}, cursor]"] = (
+            lambda sort_by=sort_by: market_gateway.get_all_gifts(
+                build_filters(ShopType.MARKET, cursor), sort_by
+            ),
+            {"orders": {index}},
+        )
+    checks.update(
+        {
+            "MarketGateway.get_all_gifts[type filter]": (
+                lambda: market_gateway.get_all_gifts(
+                    build_filters(ShopType.MARKET, types=["Type 1"]), None
+                ),
+                {"orders": {"ix_orders_listing_type_model_name"}},
+            ),
+            "MarketGateway.get_user_gifts": (
+                lambda: market_gateway.get_user_gifts(user_id, 50, None),
+                {"orders": {"ix_orders_seller_id_created_at"}},
+            ),
+            "MarketGateway.get_many[type, number]": (
+                lambda: market_gateway.get_many(type="Type 1", number=41),
+                {"orders": {"ix_orders_type_number"}},
+            ),
+            "MarketGateway.get_pending_auctions": (
+                market_gateway.get_pending_auctions,
+                {"orders": {"ix_orders_auction_end_time"}},
+            ),
+            "MarketGateway.get_bids": (
+                lambda: market_gateway.get_bids(SEED_ORDER_ID + 1, 50),
+                {"bids": {"ix_bids_gift_id_created_at_id"}},
+            ),
+            "MarketGateway.get_bids[cursor]": (
+                lambda: market_gateway.get_bids(
+                    SEED_ORDER_ID + 1, 50, BidCursorDM(created_at=now, id=1)
+                ),
+                {"bids": {"ix_bids_gift_id_created_at_id"}},
+            ),
+            "MarketGateway.delete_auction_bids": (
+                lambda: market_gateway.delete_auction_bids(gift_id=SEED_ORDER_ID + 7),
+                {"bids": {"ix_bids_gift_id_amount"}, "orders": {"orders_pkey"}},
+            ),
+            "HistoryGateway.get_many[user_id]": (
+                lambda: history_gateway.get_many(user_id=user_id),
+                {"historys": {"ix_historys_user_id_created_at"}},
+            ),
+            "GiveawayGateway.get_many[all]": (
+                lambda: giveaway_gateway.get_many("all", user_id),
+                {"giveaways": {"ix_giveaways_end_time"}, **user_giveaway_indexes},
+            ),
+            "GiveawayGateway.get_many[user]": (
+                lambda: giveaway_gateway.get_many("user", user_id),
+                {"giveaways": {"ix_giveaways_end_time"}, **user_giveaway_indexes},
+            ),
+            "GiveawayGateway.get_ended_giveaways": (
+                giveaway_gateway.get_ended_giveaways,
+                {"giveaways": {"ix_giveaways_end_time_not_completed"}, **giveaway_indexes},
+            ),
+            "GiveawayGateway.get_one": (
+                lambda: giveaway_gateway.get_one(id=giveaway_id),
+                {"giveaways": {"giveaways_pkey"}, **giveaway_indexes},
+            ),
+            "GiveawayGateway.is_participant": (
+                lambda: giveaway_gateway.is_participant(giveaway_id, user_id),
+                {"giveaway_participants": {"giveaway_participants_pkey"}},
+            ),
+            "GiveawayGateway.get_entries": (
+                lambda: giveaway_gateway.get_entries(giveaway_id, 50),
+                {"giveaway_participants": {"ix_giveaway_participants_giveaway_id_created_at"}},
+            ),
+            "GiveawayGateway.get_entries[cursor]": (
+                lambda: giveaway_gateway.get_entries(
+                    giveaway_id, 50, GiveawayParticipantCursorDM(created_at=now, user_id=user_id)
+                ),
+                {"giveaway_participants": {"ix_giveaway_participants_giveaway_id_created_at"}},
+            ),
+            "GiveawayGateway.get_tickets": (
+                lambda: giveaway_gateway.get_tickets(giveaway_id, 50),
+                {"giveaway_tickets": {"ix_giveaway_tickets_giveaway_id_id"}},
+            ),
+            "GiveawayGateway.get_referral_counts": (
+                lambda: giveaway_gateway.get_referral_counts(
+                    giveaway_id, [user_id + number for number in range(50)]
+                ),
+                {"giveaway_participants": {"ix_giveaway_participants_giveaway_id_referrer_id"}},
+            ),
+            "WalletGateway.get_by_user_id": (
+                lambda: wallet_gateway.get_by_user_id(user_id),
+                {"withdraw_requests": {"ix_withdraw_requests_user_id_is_completed"}},
+            ),
+            "WalletGateway.get_many[is_completed]": (
+                lambda: wallet_gateway.get_many(is_completed=False),
+                {"withdraw_requests": {"ix_withdraw_requests_pending"}},
+            ),
+            "UserGateway.get_count_referrals": (
+                lambda: user_gateway.get_count_referrals(user_id),
+                {"user_referrals": {"ix_user_referrals_referrer_id"}},
+            ),
+            "UserGateway.get_referrer": (
+                lambda: user_gateway.get_referrer(user_id),
+                {"user_referrals": {"user_referrals_pkey"}, "users": {"users_pkey"}},
+            ),
+            "UserGateway.get_by_ids": (
+                lambda: user_gateway.get_by_ids([user_id + number for number in range(50)]),
+                {"users": {"users_pkey"}},
+            ),
+            "LedgerGateway.get_records": (
+                lambda: ledger_gateway.get_records(user_id, 50),
+                {"ledger_records": {"ix_ledger_records_user_id_created_at_id"}},
+            ),
+            "LedgerGateway.get_records[cursor]": (
+                lambda: ledger_gateway.get_records(
+                    user_id, 50, LedgerCursorDM(created_at=now - timedelta(days=30), id=1)
+                ),
+                {"ledger_records": {"ix_ledger_records_user_id_created_at_id"}},
+            ),
+            "LedgerGateway.get_balance_at": (
+                lambda: ledger_gateway.get_balance_at(user_id, now - timedelta(days=30)),
+                {"ledger_records": {"ix_ledger_records_user_id_created_at_id"}},
+            ),
+        }
+    )
+    return checks
+
+
+async def run_explain_check() -> bool:
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+    is_success = True
+
+    async with session_maker() as session:
+        for query in SEED_QUERIES:
+            await session.execute(text(query))
+        await session.execute(text("ANALYZE"))
+
+        explain_session = ExplainSession(session)
+        for name, (check, expected) in build_checks(explain_session).items():
+            explain_session.plans.clear()
+            await check()
+            scans = [scan for plan in explain_session.plans for scan in find_scans(plan)]
+            problems = check_scans(scans, expected)
+            is_success = is_success and not problems
+            used = sorted({f"{relation}.{index or 'Seq Scan'}" for relation, index in scans})
+            print(f"{'FAIL' if problems else 'OK':<5} {name}: {', '.join(used) or '-'}")
+            for problem in problems:
+                print(f"      {problem}")
+
+        await session.rollback()
+    await dispose_engines()
+    return is_success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run_explain_check()) else 1)
@@ -11,7 +11,8 @@ sys.path.append(str(BASE_DIR))
 
 from src.application.common.utils import get_bot, send_photo  # noqa: E402
 from src.entrypoint.config import Config  # noqa: E402
-from src.infrastructure.database.session import new_session_maker  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.cache import new_cache_storage  # noqa: E402
 from src.infrastructure.gateways.giveaway import GiveawayGateway  # noqa: E402
 from src.infrastructure.gateways.market import MarketGateway  # noqa: E402
 from src.presentation.bot.services.text import get_ended_giveaway_text  # noqa: E402
@@ -21,33 +22,39 @@ async def start_giveaway_tracker() -> None:
     config = Config()
     bot = get_bot(config.bot.BOT_TOKEN)
     queue = Queue("gifts", {"connection": config.redis.REDIS_URL})  # type: ignore
+    cache = new_cache_storage(config.cache, config.redis)
     session_maker = new_session_maker(config.postgres)
 
     async with session_maker() as session:
-        giveaway_gateway, market_gateway = GiveawayGateway(session), MarketGateway(session)
+        giveaway_gateway, market_gateway = GiveawayGateway(session), MarketGateway(session, cache)
         gateways = await giveaway_gateway.get_ended_giveaways()
         if not gateways:
             return
         for giveaway in gateways:
-            winners_ids = []
+            winners = {}
             gifts = await market_gateway.get_user_gifts_by_ids(giveaway.gifts_ids)
-            count_participants = len(giveaway.participants_ids)
-            if count_participants:
+            # only the first len(gifts) tickets in the order they were bought can win
+            entries = await giveaway_gateway.get_tickets(giveaway.id, limit=len(gifts))
+            tickets = [
+                entry.user_id for entry in entries for _ in range(min(entry.tickets, len(gifts)))
+            ]
+            if tickets:
                 tasks = []
                 for index, gift in enumerate(gifts):
-                    user_id = giveaway.participants_ids[index % count_participants]
-                    winners_ids.append(user_id)
+                    user_id = tickets[index % len(tickets)]
+                    winners[gift.id] = user_id
                     tasks.append(queue.add("send_gift", {"user_id": user_id, "gift_id": gift.gift_id}))
                 await asyncio.gather(*tasks)
             else:
                 await market_gateway.update_giveaway_gifts({"is_completed": False}, giveaway.gifts_ids)
 
-            await giveaway_gateway.update_giveaway(
-                {"is_completed": True, "winners_ids": winners_ids}, id=giveaway.id
-            )
+            await giveaway_gateway.complete(giveaway.id, winners)
             await session.commit()
             message = get_ended_giveaway_text(
-                count_participants, giveaway.is_premium, gifts, giveaway.channels_usernames
+                giveaway.count_participants,
+                giveaway.is_premium,
+                gifts,
+                giveaway.channels_usernames,
             )
             count_gifts = len(gifts)
             file_path = "src/media/giveaways/ended_rare.jpg"
@@ -62,6 +69,8 @@ async def start_giveaway_tracker() -> None:
                 [f"@{username}" for username in giveaway.channels_usernames],
             )
     await queue.close()
+    await cache.close()
+    await dispose_engines()
 
 
 if __name__ == "__main__":
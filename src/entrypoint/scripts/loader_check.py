@@ -0,0 +1,91 @@
+import asyncio
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy import text
+from sqlalchemy.exc import InvalidRequestError
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.domain.entities.user import UserDM  # noqa: E402
+from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.user import UserGateway  # noqa: E402
+from src.infrastructure.migrations.base import Base  # noqa: E402
+
+
+EXPLICIT_LOADING = ("raise", "raise_on_sql", "noload")
+SEED_USER_ID = 9_300_000_000
+
+SEED_QUERY = f"""
+    INSERT INTO users (id, photo_url, username, first_name, deposit_comment, balance, commission, is_banned)
+    SELECT {SEED_USER_ID} + g, '', 'loader' || g, 'loader', 'loader-' || g, 0, 0, false
+    FROM generate_series(0, 2) AS g
+"""
+
+
+def find_implicit_relationships() -> list[str]:
+    """Relationships that load without an option of the query, each one is an N+1 waiting"""
+
+    return [
+        f"{mapper.class_.__name__}.{relationship.key}: lazy={relationship.lazy!r}"
+        for mapper in Base.registry.mappers
+        for relationship in mapper.relationships
+        if relationship.lazy not in EXPLICIT_LOADING
+    ]
+
+
+def build_checks(user_gateway: UserGateway) -> dict[str, Callable[[], Awaitable]]:
+    """Gateway methods that return mapped objects, the rest select columns only"""
+
+    referral = UserDM(
+        id=SEED_USER_ID + 1,
+        photo_url="",
+        username="loader1",
+        first_name="loader",
+        deposit_comment="loader-1",
+        balance=0,
+        commission=0,
+        is_banned=False,
+        created_at=datetime.now(),
+    )
+    return {
+        "UserGateway.get_by_id": lambda: user_gateway.get_by_id(SEED_USER_ID),
+        "UserGateway.get_by_comment": lambda: user_gateway.get_by_comment("loader-0"),
+        "UserGateway.add_referral": lambda: user_gateway.add_referral(SEED_USER_ID, referral),
+        "UserGateway.get_referrer": lambda: user_gateway.get_referrer(referral.id),
+        "UserGateway.update_referrer": lambda: user_gateway.update_referrer(
+            SEED_USER_ID + 2, referral
+        ),
+    }
+
+
+async def run_loader_check() -> bool:
+    is_success = True
+    for relationship in find_implicit_relationships():
+        is_success = False
+        print(f"FAIL {relationship}")
+
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+    async with session_maker() as session:
+        await session.execute(text(SEED_QUERY))
+        for name, check in build_checks(UserGateway(session)).items():
+            try:
+                await check()
+            except InvalidRequestError as e:
+                is_success = False
+                print(f"FAIL {name}: {e}")
+            else:
+                print(f"OK   {name}")
+        await session.rollback()
+    await dispose_engines()
+    return is_success
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(run_loader_check()) else 1)
@@ -0,0 +1,123 @@
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.application.common.utils import generate_deposit_comment  # noqa: E402
+from src.domain.entities.user import CreateUserDM  # noqa: E402
+from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.user import UserGateway  # noqa: E402
+
+
+LOGINS_COUNT = 500
+CONCURRENCY = 20
+REFERRER_ID = 9_200_000_000
+SEED_USER_ID = 9_200_000_001
+
+SEED_QUERY = f"""
+    INSERT INTO users (id, photo_url, username, first_name, deposit_comment, balance, commission, is_banned)
+    VALUES ({REFERRER_ID}, '', 'referrer', 'referrer', 'login-referrer', 0, 0, false)
+"""
+CLEANUP_QUERY = (
+    f"DELETE FROM users WHERE id BETWEEN {REFERRER_ID} AND {SEED_USER_ID + 2 * LOGINS_COUNT}"
+)
+
+Login = Callable[[AsyncSession, CreateUserDM], Awaitable[None]]
+
+
+async def legacy_login(session: AsyncSession, user_dm: CreateUserDM) -> None:
+    """The login as it was before the upsert: read, create, attach and update separately"""
+
+    user_gateway = UserGateway(session)
+    user = await user_gateway.get_by_id(user_dm.id)
+    if not user:
+        user = await user_gateway.save(user_dm)
+        await session.commit()
+    if not await user_gateway.get_referrer(user_dm.id):
+        await user_gateway.add_referral(REFERRER_ID, user)
+    else:
+        await user_gateway.update_referrer(REFERRER_ID, user)
+    await session.commit()
+    if user.username != user_dm.username:
+        await user_gateway.update_user(dict(username=user_dm.username), id=user_dm.id)
+        await session.commit()
+    if user.photo_url != user_dm.photo_url:
+        await user_gateway.update_user(dict(photo_url=user_dm.photo_url), id=user_dm.id)
+        await session.commit()
+
+
+async def upsert_login(session: AsyncSession, user_dm: CreateUserDM) -> None:
+    await UserGateway(session).upsert(user_dm, REFERRER_ID)
+    await session.commit()
+
+
+async def run_logins(
+    session_maker: async_sessionmaker[AsyncSession], login: Login, first_user_id: int
+) -> float:
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def run_login(user_id: int) -> None:
+        user_dm = CreateUserDM(
+            id=user_id,
+            photo_url="photo",
+            username=f"user{user_id}",
+            first_name="user",
+            deposit_comment=generate_deposit_comment(),
+        )
+        async with semaphore, session_maker() as session:
+            await login(session, user_dm)
+
+    started_at = perf_counter()
+    await asyncio.gather(*(run_login(first_user_id + number) for number in range(LOGINS_COUNT)))
+    return perf_counter() - started_at
+
+
+async def run_login_benchmark() -> None:
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+    engine = session_maker.kw["bind"]
+    counters = {"statements": 0, "commits": 0}
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def count_statement(*_) -> None:
+        counters["statements"] += 1
+
+    @event.listens_for(engine.sync_engine, "commit")
+    def count_commit(*_) -> None:
+        counters["commits"] += 1
+
+    async with session_maker() as session:
+        await session.execute(text(SEED_QUERY))
+        await session.commit()
+
+    try:
+        for name, login, first_user_id in (
+            ("legacy", legacy_login, SEED_USER_ID),
+            ("upsert", upsert_login, SEED_USER_ID + LOGINS_COUNT),
+        ):
+            for phase in ("first login", "next login"):
+                counters.update(statements=0, commits=0)
+                elapsed = await run_logins(session_maker, login, first_user_id)
+                print(
+                    f"{name:<7} {phase:<12} {LOGINS_COUNT / elapsed:>7.0f} logins/s, "
+                    f"{counters['statements'] / LOGINS_COUNT:.1f} statements and "
+                    f"{counters['commits'] / LOGINS_COUNT:.1f} commits per login"
+                )
+    finally:
+        async with session_maker() as session:
+            await session.execute(text(CLEANUP_QUERY))
+            await session.commit()
+        await dispose_engines()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_login_benchmark())
@@ -0,0 +1,79 @@
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from timeit import timeit
+
+from pydantic import BaseModel
+from sqlalchemy.engine.result import IteratorResult, SimpleResultMetaData
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.application.common.const import (  # noqa: E402
+    GiftRarity,
+    GiveawayType,
+    HistoryType,
+    OrderStatus,
+)
+from src.domain.entities.giveaway import GiveawayDM  # noqa: E402
+from src.domain.entities.history import HistoryDM  # noqa: E402
+from src.domain.entities.market import OrderDM, UserGiftDM  # noqa: E402
+from src.domain.entities.star import StarOrderDM  # noqa: E402
+from src.infrastructure.database.mapping import to_dms  # noqa: E402
+
+
+ROWS_COUNT = 1000
+REPEAT = 20
+NOW = datetime.now(tz=timezone.utc)
+
+GIFT_ROW = dict(
+    id=1, gift_id=1, number=4242, type="Plush Pepe", model_name="Model", pattern_name="Pattern",
+    background_name="Background", model=1.5, pattern=0.5, background=2.0,
+    rarity=GiftRarity.RARE, is_active=True, price=12.5, is_vip=False, min_step=None,
+    auction_end_time=None,
+)
+SAMPLE_ROWS: dict[type[BaseModel], dict] = {
+    OrderDM: dict(
+        GIFT_ROW, seller_id=1, buyer_id=None, completed_order_date=None, created_at=NOW
+    ),
+    UserGiftDM: GIFT_ROW,
+    HistoryDM: dict(
+        id=1, type=HistoryType.BUY_GIFT, price=12.5, stars=None, gift="Plush Pepe",
+        gift_number=4242, model_name="Model", user_id=1, created_at=NOW,
+    ),
+    StarOrderDM: dict(
+        id=1, amount=100.0, price=1.5, seller_id=1, buyer_id=2, seller_name="seller",
+        buyer_name="buyer", status=OrderStatus.ON_MARKET, created_order_date=NOW,
+        completed_order_date=None, created_at=NOW,
+    ),
+    GiveawayDM: dict(
+        id=1, type=GiveawayType.SUBSCRIPTION, gifts_ids=[1, 2, 3], channels_usernames=["channel"],
+        quantity_members=100, end_time=NOW, price=0.0, is_premium=False,
+        count_participants=100, count_tickets=100, winners_ids=[], user_id=1,
+    ),
+}
+
+
+def build_result(dm: type[BaseModel], row: dict) -> IteratorResult:
+    keys = tuple(name for name in dm.model_fields if name in row)
+    values = tuple(row[key] for key in keys)
+    return IteratorResult(SimpleResultMetaData(keys), iter([values] * ROWS_COUNT))
+
+
+def run_mapping_benchmark() -> None:
+    print(f"{ROWS_COUNT} rows x {REPEAT}, ms per batch")
+    print(f"{'DM':<14}{'validated':>12}{'construct':>12}{'speedup':>10}")
+    for dm, row in SAMPLE_ROWS.items():
+        validated = timeit(
+            lambda: [dm(**item._mapping) for item in build_result(dm, row)], number=REPEAT
+        )
+        constructed = timeit(lambda: to_dms(dm, build_result(dm, row)), number=REPEAT)
+        print(
+            f"{dm.__name__:<14}{validated / REPEAT * 1000:>12.2f}"
+            f"{constructed / REPEAT * 1000:>12.2f}{validated / constructed:>9.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    run_mapping_benchmark()
@@ -0,0 +1,58 @@
+import asyncio
+import sys
+from pathlib import Path
+
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+sys.path.append(str(BASE_DIR))
+
+from src.application.common.const import LEDGER_TOLERANCE  # noqa: E402
+from src.application.common.utils import get_file_logger  # noqa: E402
+from src.domain.entities.user import BalanceCheckDM  # noqa: E402
+from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines, new_session_maker  # noqa: E402
+from src.infrastructure.gateways.ledger import LedgerGateway  # noqa: E402
+
+
+logger = get_file_logger(__name__, "src/logs/ledger.log")
+
+BATCH_SIZE = 1000
+
+
+def is_consistent(check: BalanceCheckDM) -> bool:
+    """The snapshot equals both the sum of the ledger and the balance of its last record"""
+
+    if abs(check.balance - check.ledger_sum) > LEDGER_TOLERANCE:
+        return False
+    if check.ledger_balance is None:
+        return abs(check.balance) <= LEDGER_TOLERANCE
+    return abs(check.balance - check.ledger_balance) <= LEDGER_TOLERANCE
+
+
+async def reconcile_ledger() -> bool:
+    config = Config()
+    session_maker = new_session_maker(config.postgres)
+    checked, mismatches, after_user_id = 0, 0, 0
+    while True:
+        async with session_maker() as session:
+            checks = await LedgerGateway(session).get_balance_checks(after_user_id, BATCH_SIZE)
+        for check in checks:
+            if not is_consistent(check):
+                mismatches += 1
+                logger.error(
+                    f"reconcile_ledger: user #{check.user_id} balance {check.balance}, "
+                    f"ledger sum {check.ledger_sum}, last ledger balance {check.ledger_balance}"
+                )
+        checked += len(checks)
+        if len(checks) < BATCH_SIZE:
+            break
+        after_user_id = checks[-1].user_id
+    await dispose_engines()
+
+    logger.info(f"reconcile_ledger: checked {checked} users, {mismatches} mismatches")
+    print(f"checked {checked} users, {mismatches} mismatches")
+    return not mismatches
+
+
+if __name__ == "__main__":
+    sys.exit(0 if asyncio.run(reconcile_ledger()) else 1)
@@ -11,6 +11,7 @@ sys.path.append(str(BASE_DIR))
 
 from src.application.common.utils import get_bot, send_message  # noqa: E402
 from src.entrypoint.config import Config  # noqa: E402
+from src.infrastructure.database.session import dispose_engines  # noqa: E402
 from src.infrastructure.tonapi.withdraw import run_tracker  # noqa: E402
 
 
@@ -25,6 +26,7 @@ async def start_deposit_tracker() -> None:
         raise
     finally:
         await bot.session.close()
+        await dispose_engines()
 
 
 if __name__ == "__main__":
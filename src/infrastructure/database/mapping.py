@@ -0,0 +1,72 @@
+from copy import deepcopy
+from functools import cache, partial
+from typing import Any, Callable, TypeVar
+
+from pydantic import BaseModel
+from sqlalchemy import Result, Row
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.infrastructure.models.base import Base
+
+
+DM = TypeVar("DM", bound=BaseModel)
+
+_set_attribute = object.__setattr__
+IMMUTABLE_TYPES = (type(None), bool, int, float, str, bytes, tuple, frozenset)
+
+
+@cache
+def dm_columns(model: type[Base], dm: type[BaseModel]) -> tuple[InstrumentedAttribute, ...]:
+    return tuple(
+        getattr(model, name) for name in dm.model_fields if name in model.__table__.columns
+    )
+
+
+@cache
+def _dm_layout(
+    dm: type[BaseModel], keys: tuple[str, ...]
+) -> tuple[tuple[str, ...], dict[str, Any], dict[str, Callable[[], Any]]]:
+    defaults, factories = {}, {}
+    for name, field in dm.model_fields.items():
+        if name in keys or field.is_required():
+            continue
+        # like pydantic, every instance gets its own list, dict or other mutable default
+        if field.default_factory:
+            factories[name] = field.default_factory
+        elif not isinstance(field.default, IMMUTABLE_TYPES):
+            factories[name] = partial(deepcopy, field.default)
+        defaults[name] = field.default
+    names = tuple(name for name in dm.model_fields if name in keys or name in defaults)
+    return names, defaults, factories
+
+
+def _construct(dm: type[DM], keys: tuple[str, ...], row: tuple, layout: tuple) -> DM:
+    names, defaults, factories = layout
+    values = dict(zip(keys, row))
+    if names != keys:
+        # serialization follows the instance dict, so keep it in the DM field order
+        values = {name: values[name] if name in values else defaults[name] for name in names}
+        for name, factory in factories.items():
+            values[name] = factory()
+    instance = dm.__new__(dm)
+    _set_attribute(instance, "__dict__", values)
+    _set_attribute(instance, "__pydantic_fields_set__", set(keys))
+    _set_attribute(instance, "__pydantic_extra__", None)
+    _set_attribute(instance, "__pydantic_private__", None)
+    return instance
+
+
+def to_dm(dm: type[DM], row: Row, **extra) -> DM:
+    """Build a DM from a row without validation, the database already returns typed values.
+
+    Every required field of the DM must be selected, use dm_columns to build the select
+    """
+
+    keys = row._fields + tuple(extra)
+    return _construct(dm, keys, tuple(row) + tuple(extra.values()), _dm_layout(dm, keys))
+
+
+def to_dms(dm: type[DM], result: Result) -> list[DM]:
+    keys = tuple(result.keys())
+    layout = _dm_layout(dm, keys)
+    return [_construct(dm, keys, row, layout) for row in result]
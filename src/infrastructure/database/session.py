@@ -1,8 +1,60 @@
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from typing import NewType
+
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 
 from src.entrypoint.config import PostgresConfig
+from src.infrastructure.database.stats import instrument_engine
+
+
+# A session for reads that tolerate replication lag, bound to a replica when there is one
+ReplicaSession = NewType("ReplicaSession", AsyncSession)
+
+_engines: dict[str, AsyncEngine] = {}
+
+
+def get_engine(postgres_config: PostgresConfig, url: str | None = None) -> AsyncEngine:
+    """The engine of the database at url (the primary by default), created on first use and
+    shared by the whole process
+    """
+
+    url = url or postgres_config.database_url
+    if url not in _engines:
+        _engines[url] = create_async_engine(
+            url,
+            pool_size=postgres_config.POSTGRES_POOL_SIZE,
+            max_overflow=postgres_config.POSTGRES_MAX_OVERFLOW,
+            pool_recycle=postgres_config.POSTGRES_POOL_RECYCLE,
+            pool_timeout=postgres_config.POSTGRES_POOL_TIMEOUT,
+            connect_args={
+                "timeout": postgres_config.POSTGRES_CONNECT_TIMEOUT,
+                "command_timeout": postgres_config.POSTGRES_COMMAND_TIMEOUT,
+            },
+        )
+        if postgres_config.POSTGRES_SQL_STATS:
+            instrument_engine(_engines[url])
+    return _engines[url]
 
 
 def new_session_maker(postgres_config: PostgresConfig) -> async_sessionmaker[AsyncSession]:
-    engine = create_async_engine(postgres_config.database_url, pool_size=20)
-    return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return async_sessionmaker(
+        get_engine(postgres_config), class_=AsyncSession, expire_on_commit=False
+    )
+
+
+def new_replica_session_makers(
+    postgres_config: PostgresConfig,
+) -> list[async_sessionmaker[AsyncSession]]:
+    return [
+        async_sessionmaker(
+            get_engine(postgres_config, url), class_=AsyncSession, expire_on_commit=False
+        )
+        for url in postgres_config.replica_urls
+    ]
+
+
+async def dispose_engines() -> None:
+    """Close the pools of the process, called once on shutdown"""
+
+    while _engines:
+        _, engine = _engines.popitem()
+        await engine.dispose()
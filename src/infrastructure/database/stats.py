@@ -0,0 +1,86 @@
+import re
+from collections import Counter
+from contextvars import ContextVar, Token
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.application.interfaces.interactor import current_interactor
+
+
+# Expanded IN lists render one placeholder per value, they are collapsed to get the statement shape
+PLACEHOLDERS_PATTERN = re.compile(r"\$\d+(?:\s*,\s*\$\d+)*")
+QUERY_STARTED_AT_KEY = "query_started_at"
+
+
+class QueryCounter:
+    def __init__(self) -> None:
+        self.queries = 0
+        self.rows = 0
+        self.duration = 0.0
+
+    def add(self, rows: int, duration: float) -> None:
+        self.queries += 1
+        self.rows += max(rows, 0)
+        self.duration += duration
+
+
+class SQLStats:
+    """Queries of one request, in total and per interactor, with the number of runs of each
+    statement shape
+    """
+
+    def __init__(self) -> None:
+        self.total = QueryCounter()
+        self.interactors: dict[str, QueryCounter] = {}
+        self.shapes: Counter[str] = Counter()
+
+    def add(self, statement: str, rows: int, duration: float) -> None:
+        self.total.add(rows, duration)
+        if interactor := current_interactor.get():
+            self.interactors.setdefault(interactor, QueryCounter()).add(rows, duration)
+        self.shapes[PLACEHOLDERS_PATTERN.sub("?", statement)] += 1
+
+    def get_repeated(self, threshold: int) -> dict[str, int]:
+        """Statement shapes run at least threshold times, usually an N+1"""
+
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+_sql_stats: ContextVar[SQLStats | None] = ContextVar("sql_stats", default=None)
+
+
+def start_sql_stats() -> tuple[SQLStats, Token]:
+    """Collect the queries of the current task and the tasks it starts"""
+
+    stats = SQLStats()
+    return stats, _sql_stats.set(stats)
+
+
+def stop_sql_stats(token: Token) -> None:
+    _sql_stats.reset(token)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine.sync_engine, "handle_error", _handle_error)
+
+
+# a connection runs one statement at a time, so one start time per connection is enough
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info[QUERY_STARTED_AT_KEY] = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started_at = conn.info.pop(QUERY_STARTED_AT_KEY, None)
+    if started_at is not None and (stats := _sql_stats.get()):
+        stats.add(statement, cursor.rowcount, perf_counter() - started_at)
+
+
+def _handle_error(exception_context) -> None:
+    """A failed statement never reaches after_cursor_execute, drop its start time"""
+
+    if exception_context.connection is not None:
+        exception_context.connection.info.pop(QUERY_STARTED_AT_KEY, None)
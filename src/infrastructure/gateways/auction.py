@@ -0,0 +1,34 @@
+from datetime import datetime, timezone
+
+from redis.asyncio import Redis
+
+from src.application.common.const import AUCTION_SCHEDULE_KEY
+from src.application.interfaces.auction import AuctionScheduler
+
+
+class RedisAuctionScheduler(AuctionScheduler):
+    """Auction end times in a sorted set, scored by timestamp"""
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+
+    async def schedule(self, end_times: dict[int, datetime]) -> None:
+        if end_times:
+            await self._redis.zadd(
+                AUCTION_SCHEDULE_KEY,
+                {str(order_id): end_time.timestamp() for order_id, end_time in end_times.items()},
+            )
+
+    async def pop_due(self, now: datetime) -> list[int]:
+        """Take the ended auctions off the schedule, so only one settler gets each of them"""
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.zrangebyscore(AUCTION_SCHEDULE_KEY, "-inf", now.timestamp())
+            pipe.zremrangebyscore(AUCTION_SCHEDULE_KEY, "-inf", now.timestamp())
+            orders_ids, _ = await pipe.execute()
+        return [int(order_id) for order_id in orders_ids]
+
+    async def get_next_end_time(self) -> datetime | None:
+        if not (items := await self._redis.zrange(AUCTION_SCHEDULE_KEY, 0, 0, withscores=True)):
+            return
+        return datetime.fromtimestamp(items[0][1], tz=timezone.utc)
@@ -0,0 +1,227 @@
+from asyncio import CancelledError, Task, create_task, sleep
+from json import dumps, loads
+from time import monotonic, time
+from typing import Awaitable, Callable
+
+from cachetools import TLRUCache, TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.application.common.const import (
+    TELEGRAM_CHANNEL_KEY_PREFIX,
+    TELEGRAM_CHANNEL_REFRESH_LOCK_TTL,
+    TELEGRAM_FILE_URL_KEY_PREFIX,
+    USERS_INVALIDATION_CHANNEL,
+)
+from src.application.common.utils import get_file_logger
+from src.application.interfaces.cache import CacheStorage, ChannelCache, UserCache
+from src.domain.entities.giveaway import TelegramChannelDM
+from src.domain.entities.user import UserDM
+from src.entrypoint.config import CacheConfig, RedisConfig
+
+
+logger = get_file_logger(__name__, "src/logs/user.log")
+
+
+class MemoryCacheGateway(CacheStorage):
+    def __init__(self, max_size: int) -> None:
+        self._cache: TLRUCache[str, tuple[str, float]] = TLRUCache(
+            maxsize=max_size, ttu=lambda _key, value, _now: value[1], timer=monotonic
+        )
+        self._counters: dict[str, int] = {}
+
+    async def get(self, key: str) -> str | None:
+        if key in self._counters:
+            return str(self._counters[key])
+        if item := self._cache.get(key):
+            return item[0]
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        self._cache[key] = (value, monotonic() + ttl)
+
+    async def incr(self, key: str) -> int:
+        self._counters[key] = self._counters.get(key, 0) + 1
+        return self._counters[key]
+
+    async def close(self) -> None:
+        self._cache.clear()
+
+
+class RedisCacheGateway(CacheStorage):
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: int) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self._redis.incr(key)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+
+class RedisUserCache(UserCache):
+    """Per-process cache of authenticated users, evicted in every process through Redis pub/sub.
+
+    A changed user is kept out of the cache for USER_CACHE_TTL, so a request that reads the row
+    before the change is committed cannot cache the old values. Nothing is served while the
+    subscription is down. Processes that only change users never subscribe
+    """
+
+    def __init__(self, redis: Redis, config: CacheConfig) -> None:
+        self._redis = redis
+        # None marks a changed user that must not be cached until the entry expires
+        self._cache: TTLCache[int, UserDM | None] = TTLCache(
+            maxsize=config.USER_CACHE_MAX_SIZE, ttl=config.USER_CACHE_TTL, timer=monotonic
+        )
+        self._is_subscribed = False
+        self._task: Task | None = None
+
+    async def get(self, user_id: int) -> UserDM | None:
+        if not self._task or self._task.done():
+            self._task = create_task(self._run())
+        if self._is_subscribed:
+            return self._cache.get(user_id)
+
+    async def set(self, user: UserDM) -> None:
+        if self._is_subscribed and user.id not in self._cache:
+            self._cache[user.id] = user
+
+    async def invalidate(self, users_ids: list[int]) -> None:
+        if not users_ids:
+            return
+        self._evict(users_ids)
+        try:
+            await self._redis.publish(USERS_INVALIDATION_CHANNEL, dumps(users_ids))
+        except RedisError as e:
+            logger.error(f"RedisUserCache: failed to publish invalidation of {users_ids}: {e}")
+
+    async def close(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(USERS_INVALIDATION_CHANNEL)
+                    self._cache.clear()
+                    self._is_subscribed = True
+                    async for message in pubsub.listen():
+                        self._evict(loads(message["data"]))
+            except RedisError as e:
+                logger.error(f"RedisUserCache: subscription lost: {e}")
+                self._is_subscribed = False
+                await sleep(1)
+
+    def _evict(self, users_ids: list[int]) -> None:
+        for user_id in users_ids:
+            self._cache[user_id] = None
+
+
+class RedisChannelCache(ChannelCache):
+    """Telegram channels shared by all processes through Redis.
+
+    A channel older than CHANNEL_CACHE_REFRESH is still served while one process loads it again
+    in the background, a channel that does not exist is remembered for
+    CHANNEL_NOT_FOUND_CACHE_TTL. Download links of Telegram files live for an hour, so
+    CHANNEL_CACHE_TTL and CHANNEL_PHOTO_CACHE_TTL together have to stay under it with some
+    margin for the time the link took to load.
+    Without Redis every request loads the channel itself
+    """
+
+    def __init__(self, redis: Redis, config: CacheConfig) -> None:
+        self._redis = redis
+        self._config = config
+        self._tasks: set[Task] = set()
+
+    async def get_channel(
+        self, username: str, load: Callable[[str], Awaitable[TelegramChannelDM | None]]
+    ) -> TelegramChannelDM | None:
+        key = f"{TELEGRAM_CHANNEL_KEY_PREFIX}{username.lower()}"
+        try:
+            cached = await self._redis.get(key)
+        except RedisError as e:
+            logger.error(f"RedisChannelCache: failed to read @{username}: {e}")
+            return await load(username)
+        if cached is None:
+            return await self._load_channel(key, username, load)
+
+        item = loads(cached)
+        if item["refresh_at"] < time() and await self._lock_refresh(key):
+            task = create_task(self._refresh_channel(key, username, load))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return TelegramChannelDM(**item["channel"]) if item["channel"] else None
+
+    async def get_file_url(self, file_id: str, load: Callable[[str], Awaitable[str]]) -> str:
+        key = f"{TELEGRAM_FILE_URL_KEY_PREFIX}{file_id}"
+        try:
+            if url := await self._redis.get(key):
+                return url
+        except RedisError as e:
+            logger.error(f"RedisChannelCache: failed to read file {file_id}: {e}")
+            return await load(file_id)
+        url = await load(file_id)
+        await self._set(key, url, self._config.CHANNEL_PHOTO_CACHE_TTL)
+        return url
+
+    async def close(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+
+    async def _load_channel(
+        self, key: str, username: str, load: Callable[[str], Awaitable[TelegramChannelDM | None]]
+    ) -> TelegramChannelDM | None:
+        channel = await load(username)
+        item = {
+            "channel": channel.model_dump() if channel else None,
+            "refresh_at": time() + self._config.CHANNEL_CACHE_REFRESH,
+        }
+        ttl = (
+            self._config.CHANNEL_CACHE_TTL if channel else self._config.CHANNEL_NOT_FOUND_CACHE_TTL
+        )
+        await self._set(key, dumps(item), ttl)
+        return channel
+
+    async def _refresh_channel(
+        self, key: str, username: str, load: Callable[[str], Awaitable[TelegramChannelDM | None]]
+    ) -> None:
+        try:
+            await self._load_channel(key, username, load)
+        except Exception as e:
+            # the cached channel is served until it expires
+            logger.error(f"RedisChannelCache: failed to refresh @{username}: {e}")
+
+    async def _lock_refresh(self, key: str) -> bool:
+        try:
+            return bool(
+                await self._redis.set(
+                    f"{key}:refresh", 1, nx=True, ex=TELEGRAM_CHANNEL_REFRESH_LOCK_TTL
+                )
+            )
+        except RedisError as e:
+            logger.error(f"RedisChannelCache: failed to lock the refresh of {key}: {e}")
+            return False
+
+    async def _set(self, key: str, value: str, ttl: int) -> None:
+        try:
+            await self._redis.set(key, value, ex=ttl)
+        except RedisError as e:
+            logger.error(f"RedisChannelCache: failed to write {key}: {e}")
+
+
+def new_cache_storage(
+    cache_config: CacheConfig, redis_config: RedisConfig
+) -> MemoryCacheGateway | RedisCacheGateway:
+    if cache_config.CACHE_BACKEND == "redis":
+        return RedisCacheGateway(Redis.from_url(redis_config.REDIS_URL, decode_responses=True))
+    return MemoryCacheGateway(cache_config.CACHE_MAX_SIZE)
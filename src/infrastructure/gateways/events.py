@@ -0,0 +1,96 @@
+from asyncio import Queue, QueueFull, Task, TimeoutError, create_task, sleep, wait_for
+from typing import AsyncIterator
+
+from pydantic import ValidationError
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.application.common.const import MARKET_EVENTS_CHANNEL
+from src.application.common.utils import get_file_logger
+from src.application.interfaces.events import EventPublisher, EventSubscriber
+from src.domain.entities.market import MarketEventDM
+
+
+logger = get_file_logger(__name__, "src/logs/market.log")
+
+CLIENT_QUEUE_SIZE = 100
+
+
+class RedisEventGateway(EventPublisher):
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+
+    async def publish(self, event: MarketEventDM) -> None:
+        try:
+            await self._redis.publish(MARKET_EVENTS_CHANNEL, event.model_dump_json())
+        except RedisError as e:
+            logger.error(f"RedisEventGateway: failed to publish {event.type}: {e}")
+
+
+class MarketEventHub(EventSubscriber):
+    """One Redis subscription per worker, fanned out to the connected clients"""
+
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+        self._queues: set[Queue[MarketEventDM]] = set()
+        self._lossless_queues: set[Queue[MarketEventDM | None]] = set()
+        self._task: Task | None = None
+
+    async def listen(self, timeout: float) -> AsyncIterator[MarketEventDM | None]:
+        """Yield events as they arrive, None when nothing happened within the timeout"""
+
+        self._start()
+        queue: Queue[MarketEventDM] = Queue(CLIENT_QUEUE_SIZE)
+        self._queues.add(queue)
+        try:
+            while True:
+                try:
+                    yield await wait_for(queue.get(), timeout)
+                except TimeoutError:
+                    yield None
+        finally:
+            self._queues.discard(queue)
+
+    async def follow(self) -> AsyncIterator[MarketEventDM | None]:
+        """Yield every event through an unbounded queue, None after each (re)subscription"""
+
+        self._start()
+        queue: Queue[MarketEventDM | None] = Queue()
+        self._lossless_queues.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._lossless_queues.discard(queue)
+
+    def _start(self) -> None:
+        if not self._task or self._task.done():
+            self._task = create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with self._redis.pubsub(ignore_subscribe_messages=True) as pubsub:
+                    await pubsub.subscribe(MARKET_EVENTS_CHANNEL)
+                    for lossless_queue in self._lossless_queues:
+                        lossless_queue.put_nowait(None)
+                    async for message in pubsub.listen():
+                        try:
+                            event = MarketEventDM.model_validate_json(message["data"])
+                        except ValidationError as e:
+                            logger.error(f"MarketEventHub: skipped a malformed event: {e}")
+                            continue
+                        self._dispatch(event)
+            except RedisError as e:
+                logger.error(f"MarketEventHub: subscription lost: {e}")
+                await sleep(1)
+
+    def _dispatch(self, event: MarketEventDM) -> None:
+        for lossless_queue in self._lossless_queues:
+            lossless_queue.put_nowait(event)
+        for queue in self._queues:
+            try:
+                queue.put_nowait(event)
+            except QueueFull:
+                queue.get_nowait()
+                queue.put_nowait(event)
@@ -1,11 +1,39 @@
 from datetime import datetime, timezone
 
-from sqlalchemy import insert, or_, select, update
+from sqlalchemy import (
+    BigInteger,
+    Exists,
+    Integer,
+    Select,
+    column,
+    exists,
+    func,
+    literal,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, aggregate_order_by
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.application.interfaces.giveaway import GiveawayReader, GiveawaySaver
-from src.domain.entities.giveaway import CreateGiveawayDM, GiveawayDM
-from src.infrastructure.models.giveaway import Giveaway
+from src.domain.entities.giveaway import (
+    CreateGiveawayDM,
+    GiveawayDM,
+    GiveawayEntryDM,
+    GiveawayParticipantCursorDM,
+)
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
+from src.infrastructure.models.giveaway import (
+    Giveaway,
+    GiveawayGift,
+    GiveawayParticipant,
+    GiveawayTicket,
+)
 
 
 class GiveawayGateway(GiveawaySaver, GiveawayReader):
@@ -13,36 +41,232 @@ class GiveawayGateway(GiveawaySaver, GiveawayReader):
         self._session = session
 
     async def save(self, data: CreateGiveawayDM) -> GiveawayDM:
-        stmt = insert(Giveaway).values(data.model_dump()).returning(Giveaway)
-        result = await self._session.execute(stmt)
-        return GiveawayDM(**result.scalar_one().__dict__)
+        """Insert the giveaway and its gifts in one statement"""
 
-    async def update_giveaway(self, data: dict, **filters) -> GiveawayDM | None:
-        stmt = update(Giveaway).values(data).filter_by(**filters).returning(Giveaway)
+        gifts_ids = list(dict.fromkeys(data.gifts_ids))
+        inserted = (
+            pg_insert(Giveaway)
+            .values(data.model_dump(exclude={"gifts_ids"}))
+            .returning(*dm_columns(Giveaway, GiveawayDM))
+            .cte("inserted")
+        )
+        gifts = (
+            pg_insert(GiveawayGift)
+            .from_select(
+                ["giveaway_id", "order_id"],
+                select(inserted.c.id, func.unnest(literal(gifts_ids, ARRAY(Integer)))),
+            )
+            .cte("gifts")
+        )
+        stmt = select(inserted).add_cte(gifts)
         result = await self._session.execute(stmt)
-        if giveaway := result.scalar_one_or_none():
-            return GiveawayDM(**giveaway.__dict__)
+        return to_dm(GiveawayDM, result.one(), gifts_ids=gifts_ids)
+
+    async def add_entry(
+        self, entry: GiveawayEntryDM, quantity_members: int, add_tickets: bool
+    ) -> bool:
+        """Insert the participant and record the tickets in the order they were bought, False
+        when the giveaway has no room for the tickets or the user already takes part and
+        add_tickets is off
+        """
+
+        entry_row = select(
+            literal(entry.giveaway_id),
+            literal(entry.user_id, BigInteger),
+            literal(entry.tickets),
+            literal(entry.referrer_id, BigInteger),
+        )
+        if quantity_members:
+            # joins of a limited giveaway queue on its row, so the sum below sees every join
+            await self._session.execute(
+                select(Giveaway.id).where(Giveaway.id == entry.giveaway_id).with_for_update()
+            )
+            taken = (
+                select(func.coalesce(func.sum(GiveawayParticipant.tickets), 0))
+                .where(GiveawayParticipant.giveaway_id == entry.giveaway_id)
+                .scalar_subquery()
+            )
+            entry_row = entry_row.where(taken + entry.tickets <= quantity_members)
+
+        stmt = pg_insert(GiveawayParticipant).from_select(
+            ["giveaway_id", "user_id", "tickets", "referrer_id"], entry_row
+        )
+        if add_tickets:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[GiveawayParticipant.giveaway_id, GiveawayParticipant.user_id],
+                set_=dict(tickets=GiveawayParticipant.tickets + stmt.excluded.tickets),
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing()
+        participant = stmt.returning(GiveawayParticipant.user_id).cte("participant")
+        tickets = (
+            pg_insert(GiveawayTicket)
+            .from_select(
+                ["giveaway_id", "user_id", "tickets"],
+                select(literal(entry.giveaway_id), participant.c.user_id, literal(entry.tickets)),
+            )
+            .returning(GiveawayTicket.user_id)
+        )
+        result = await self._session.execute(tickets)
+        return result.one_or_none() is not None
+
+    async def complete(self, giveaway_id: int, winners: dict[int, int]) -> None:
+        """Mark the giveaway completed and store the winner of each gift, keyed by order id"""
 
-    async def get_one(self, **filters) -> GiveawayDM | None:
-        stmt = select(Giveaway).filter_by(**filters)
+        stmt = update(Giveaway).values(is_completed=True).where(Giveaway.id == giveaway_id)
+        if winners:
+            items = values(
+                column("order_id", Integer), column("winner_id", BigInteger), name="winners"
+            ).data(list(winners.items()))
+            stmt = stmt.add_cte(
+                update(GiveawayGift)
+                .values(winner_id=items.c.winner_id)
+                .where(
+                    GiveawayGift.giveaway_id == giveaway_id,
+                    GiveawayGift.order_id == items.c.order_id,
+                )
+                .cte("gifts")
+            )
+        await self._session.execute(stmt)
+
+    async def get_one(self, participant_id: int | None = None, **filters) -> GiveawayDM | None:
+        stmt = self._select_giveaways(participant_id).where(
+            *(getattr(Giveaway, name) == value for name, value in filters.items())
+        )
         result = await self._session.execute(stmt)
-        if giveaway := result.scalar_one_or_none():
-            return GiveawayDM(**giveaway.__dict__)
+        if giveaway := result.one_or_none():
+            return to_dm(GiveawayDM, giveaway)
 
     async def get_many(self, type: str, user_id: int) -> list[GiveawayDM]:
         conditions = [Giveaway.end_time > datetime.now(tz=timezone.utc)]
         if type == "user":
-            conditions.append(
-                or_(Giveaway.user_id == user_id, Giveaway.participants_ids.contains([user_id]))
-            )
+            conditions.append(or_(Giveaway.user_id == user_id, self._is_participant(user_id)))
 
-        stmt = select(Giveaway).where(*conditions).order_by(Giveaway.end_time)
+        stmt = self._select_giveaways(user_id).where(*conditions).order_by(Giveaway.end_time)
         result = await self._session.execute(stmt)
-        return [GiveawayDM(**giveaway.__dict__) for giveaway in result.scalars().all()]
+        return to_dms(GiveawayDM, result)
 
     async def get_ended_giveaways(self) -> list[GiveawayDM]:
-        stmt = select(Giveaway).where(
+        stmt = self._select_giveaways().where(
             datetime.now(tz=timezone.utc) > Giveaway.end_time, Giveaway.is_completed == False
         )
         result = await self._session.execute(stmt)
-        return [GiveawayDM(**giveaway.__dict__) for giveaway in result.scalars().all()]
+        return to_dms(GiveawayDM, result)
+
+    async def is_participant(self, giveaway_id: int, user_id: int) -> bool:
+        stmt = select(
+            exists().where(
+                GiveawayParticipant.giveaway_id == giveaway_id,
+                GiveawayParticipant.user_id == user_id,
+            )
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one()
+
+    async def get_entries(
+        self,
+        giveaway_id: int,
+        limit: int | None = None,
+        cursor: GiveawayParticipantCursorDM | None = None,
+    ) -> list[GiveawayEntryDM]:
+        """Participants in the order they joined"""
+
+        stmt = select(*dm_columns(GiveawayParticipant, GiveawayEntryDM)).where(
+            GiveawayParticipant.giveaway_id == giveaway_id
+        )
+        if cursor:
+            stmt = stmt.where(
+                tuple_(GiveawayParticipant.created_at, GiveawayParticipant.user_id)
+                > (cursor.created_at, cursor.user_id)
+            )
+        stmt = stmt.order_by(GiveawayParticipant.created_at, GiveawayParticipant.user_id).limit(
+            limit
+        )
+        result = await self._session.execute(stmt)
+        return to_dms(GiveawayEntryDM, result)
+
+    async def get_tickets(self, giveaway_id: int, limit: int) -> list[GiveawayEntryDM]:
+        """The first joins and ticket purchases, in the order they happened"""
+
+        stmt = (
+            select(*dm_columns(GiveawayTicket, GiveawayEntryDM))
+            .where(GiveawayTicket.giveaway_id == giveaway_id)
+            .order_by(GiveawayTicket.id)
+            .limit(limit)
+        )
+        result = await self._session.execute(stmt)
+        return to_dms(GiveawayEntryDM, result)
+
+    async def get_referral_counts(
+        self, giveaway_id: int, referrers_ids: list[int]
+    ) -> dict[int, int]:
+        """Number of participants each of referrers_ids invited into the giveaway"""
+
+        if not referrers_ids:
+            return {}
+        stmt = (
+            select(GiveawayParticipant.referrer_id, func.count())
+            .where(
+                GiveawayParticipant.giveaway_id == giveaway_id,
+                GiveawayParticipant.referrer_id.in_(referrers_ids),
+            )
+            .group_by(GiveawayParticipant.referrer_id)
+        )
+        result = await self._session.execute(stmt)
+        return dict(result.tuples().all())
+
+    def _is_participant(self, user_id: int) -> Exists:
+        return exists().where(
+            GiveawayParticipant.giveaway_id == Giveaway.id, GiveawayParticipant.user_id == user_id
+        )
+
+    def _select_giveaways(self, participant_id: int | None = None) -> Select:
+        """Giveaways with the counts of participants, tickets and referrals and the gifts,
+        aggregated per giveaway, is_participant is filled in for participant_id
+        """
+
+        participants = (
+            select(
+                func.count().label("count_participants"),
+                func.coalesce(func.sum(GiveawayParticipant.tickets), 0).label("count_tickets"),
+            )
+            .where(GiveawayParticipant.giveaway_id == Giveaway.id)
+            .lateral("participants")
+        )
+        count_referrals = (
+            select(func.count())
+            .where(
+                GiveawayParticipant.giveaway_id == Giveaway.id,
+                GiveawayParticipant.referrer_id.is_not(None),
+            )
+            .scalar_subquery()
+        )
+        gifts = (
+            select(
+                func.coalesce(
+                    func.array_agg(
+                        aggregate_order_by(GiveawayGift.order_id, GiveawayGift.order_id)
+                    ),
+                    literal([], ARRAY(Integer)),
+                ).label("gifts_ids"),
+                func.coalesce(
+                    func.array_agg(
+                        aggregate_order_by(GiveawayGift.winner_id, GiveawayGift.order_id)
+                    ).filter(GiveawayGift.winner_id.is_not(None)),
+                    literal([], ARRAY(BigInteger)),
+                ).label("winners_ids"),
+            )
+            .where(GiveawayGift.giveaway_id == Giveaway.id)
+            .lateral("gifts")
+        )
+        stmt = select(
+            *dm_columns(Giveaway, GiveawayDM),
+            participants.c.count_participants,
+            participants.c.count_tickets,
+            count_referrals.label("count_referrals"),
+            gifts.c.gifts_ids,
+            gifts.c.winners_ids,
+        ).select_from(Giveaway.__table__.join(participants, true()).join(gifts, true()))
+        if participant_id:
+            stmt = stmt.add_columns(self._is_participant(participant_id).label("is_participant"))
+        return stmt
@@ -3,6 +3,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.application.interfaces.history import HistoryReader, HistorySaver
 from src.domain.entities.history import ActivityDM, CreateHistoryDM, HistoryDM
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
 from src.infrastructure.models.history import History
 
 
@@ -11,20 +12,24 @@ class HistoryGateway(HistoryReader, HistorySaver):
         self._session = session
 
     async def save(self, data: CreateHistoryDM) -> HistoryDM:
-        stmt = insert(History).values(data.model_dump()).returning(History)
+        stmt = insert(History).values(data.model_dump()).returning(*dm_columns(History, HistoryDM))
         result = await self._session.execute(stmt)
-        return HistoryDM(**result.scalar_one().__dict__)
+        return to_dm(HistoryDM, result.one())
 
     async def save_many(self, data: list[CreateHistoryDM]) -> None:
         stmt = insert(History).values([history.model_dump() for history in data])
         await self._session.execute(stmt)
 
     async def get_many(self, **filters) -> list[HistoryDM]:
-        stmt = select(History).filter_by(**filters).order_by(History.created_at.desc())
+        stmt = (
+            select(*dm_columns(History, HistoryDM))
+            .filter_by(**filters)
+            .order_by(History.created_at.desc())
+        )
         result = await self._session.execute(stmt)
-        return [HistoryDM(**history.__dict__) for history in result.scalars().all()]
+        return to_dms(HistoryDM, result)
 
     async def get_activity(self) -> list[ActivityDM]:
-        stmt = select(History).order_by(History.created_at.desc())
+        stmt = select(*dm_columns(History, ActivityDM)).order_by(History.created_at.desc())
         result = await self._session.execute(stmt)
-        return [ActivityDM(**history.__dict__) for history in result.scalars().all()]
+        return to_dms(ActivityDM, result)
@@ -0,0 +1,23 @@
+from redis.asyncio import Redis
+
+from src.application.interfaces.idempotency import IdempotencyStorage
+
+
+class RedisIdempotencyGateway(IdempotencyStorage):
+    def __init__(self, redis: Redis) -> None:
+        self._redis = redis
+
+    async def acquire(self, key: str, value: str, ttl: int) -> bool:
+        return bool(await self._redis.set(key, value, ex=ttl, nx=True))
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def save(self, key: str, value: str, ttl: int) -> None:
+        await self._redis.set(key, value, ex=ttl)
+
+    async def refresh(self, key: str, ttl: int) -> None:
+        await self._redis.expire(key, ttl)
+
+    async def release(self, key: str) -> None:
+        await self._redis.delete(key)
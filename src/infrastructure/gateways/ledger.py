@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from sqlalchemy import func, select, true, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.application.interfaces.ledger import LedgerReader
+from src.domain.entities.user import BalanceCheckDM, LedgerCursorDM, LedgerRecordDM
+from src.infrastructure.database.mapping import dm_columns, to_dms
+from src.infrastructure.models.user import LedgerRecord, User
+
+
+class LedgerGateway(LedgerReader):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def get_records(
+        self, user_id: int, limit: int, cursor: LedgerCursorDM | None = None
+    ) -> list[LedgerRecordDM]:
+        stmt = select(*dm_columns(LedgerRecord, LedgerRecordDM)).where(
+            LedgerRecord.user_id == user_id
+        )
+        if cursor:
+            stmt = stmt.where(
+                tuple_(LedgerRecord.created_at, LedgerRecord.id) < (cursor.created_at, cursor.id)
+            )
+        stmt = stmt.order_by(LedgerRecord.created_at.desc(), LedgerRecord.id.desc()).limit(limit)
+        result = await self._session.execute(stmt)
+        return to_dms(LedgerRecordDM, result)
+
+    async def get_balance_at(self, user_id: int, at: datetime) -> float:
+        stmt = (
+            select(LedgerRecord.balance)
+            .where(LedgerRecord.user_id == user_id, LedgerRecord.created_at <= at)
+            .order_by(LedgerRecord.created_at.desc(), LedgerRecord.id.desc())
+            .limit(1)
+        )
+        result = await self._session.execute(stmt)
+        return result.scalar_one_or_none() or 0
+
+    async def get_balance_checks(self, after_user_id: int, limit: int) -> list[BalanceCheckDM]:
+        """Snapshot balance, ledger total and last ledger balance of the next limit users"""
+
+        users = (
+            select(User.id, User.balance)
+            .where(User.id > after_user_id)
+            .order_by(User.id)
+            .limit(limit)
+            .cte("users_batch")
+        )
+        last_record = (
+            select(LedgerRecord.balance)
+            .where(LedgerRecord.user_id == users.c.id)
+            .order_by(LedgerRecord.created_at.desc(), LedgerRecord.id.desc())
+            .limit(1)
+            .lateral("last_record")
+        )
+        ledger_sum = (
+            select(func.coalesce(func.sum(LedgerRecord.amount), 0).label("amount"))
+            .where(LedgerRecord.user_id == users.c.id)
+            .lateral("ledger_sum")
+        )
+        stmt = (
+            select(
+                users.c.id.label("user_id"),
+                users.c.balance,
+                ledger_sum.c.amount.label("ledger_sum"),
+                last_record.c.balance.label("ledger_balance"),
+            )
+            .select_from(users.join(ledger_sum, true()).outerjoin(last_record, true()))
+            .order_by(users.c.id)
+        )
+        result = await self._session.execute(stmt)
+        return to_dms(BalanceCheckDM, result)
@@ -1,91 +1,214 @@
-from datetime import datetime, timezone
+from asyncio import Task, get_running_loop
+from datetime import datetime, timedelta
 
-from sqlalchemy import delete, func, insert, select, update
+from sqlalchemy import (
+    BigInteger,
+    ColumnElement,
+    and_,
+    case,
+    cast,
+    delete,
+    event,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    true,
+    tuple_,
+    update,
+)
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
 
-from src.application.common.const import ShopType
+from src.application.common.const import (
+    MARKET_CACHE_VERSION_KEY,
+    RECENT_BIDS_LIMIT,
+    LedgerRecordType,
+    ShopType,
+)
+from src.application.common.utils import get_file_logger
 from src.application.interactors.errors import AlreadyExistError
+from src.application.interfaces.cache import CacheStorage
 from src.application.interfaces.market import OrderReader, OrderSaver
 from src.domain.entities.cart import CartGiftDM
 from src.domain.entities.market import (
+    BidCursorDM,
     BidDM,
+    BidsSummaryDM,
     CreateOrderDM,
+    FacetCountDM,
+    GiftFacetsDM,
     GiftFiltersDM,
     OrderDM,
+    PlacedBidDM,
+    ReadBidDM,
     ReadOrderDM,
     UserGiftDM,
 )
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
 from src.infrastructure.models.order import Bid, Order
+from src.infrastructure.models.user import LedgerRecord, User
+from src.infrastructure.order_book import OrderBook
 from src.presentation.api.market.params import GiftSortParams
 
 
+logger = get_file_logger(__name__, "src/logs/market.log")
+
+STALE_CACHE_KEY = "market_stale_cache"
+_version_tasks: set[Task] = set()
+
+
+@event.listens_for(Session, "after_commit")
+def _bump_cache_version(session: Session) -> None:
+    """Readers racing the commit still see the old rows, so the cached pages are invalidated
+    only once the changes are visible
+    """
+
+    if not (cache := session.info.pop(STALE_CACHE_KEY, None)):
+        return
+    task = get_running_loop().create_task(_incr_cache_version(cache))
+    _version_tasks.add(task)
+    task.add_done_callback(_version_tasks.discard)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _keep_cache_version(session: Session, previous_transaction) -> None:
+    session.info.pop(STALE_CACHE_KEY, None)
+
+
+async def _incr_cache_version(cache: CacheStorage) -> None:
+    try:
+        await cache.incr(MARKET_CACHE_VERSION_KEY)
+    except Exception as e:
+        logger.error(f"MarketGateway: failed to invalidate the listings cache: {e}")
+
+
 class MarketGateway(OrderSaver, OrderReader):
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        cache: CacheStorage | None = None,
+        order_book: OrderBook | None = None,
+    ) -> None:
         self._session = session
+        self._cache = cache
+        self._order_book = order_book
 
     async def get_all_gifts(
         self, filters: GiftFiltersDM, sort_by: GiftSortParams | None
     ) -> list[OrderDM]:
-        order_by = Order.created_at.desc()
+        if self._order_book and self._order_book.is_ready:
+            return self._order_book.get_all_gifts(filters, sort_by)
+        sort_column, is_ascending = Order.created_at, False
         if sort_by is GiftSortParams.OLDEST:
-            order_by = Order.created_at.asc()
+            is_ascending = True
         elif sort_by is GiftSortParams.PRICE_LOW_TO_HIGH:
-            order_by = Order.price.asc()
+            sort_column, is_ascending = Order.price, True
         elif sort_by is GiftSortParams.PRICE_HIGH_TO_LOW:
-            order_by = Order.price.desc()
-        conditions = [
-            filters.from_price <= Order.price,
-            filters.to_price >= Order.price,
-            Order.rarity.in_(filters.rarities),
-            Order.is_active == True,
-            Order.is_completed == False,
-            filters.from_gift_number <= Order.number,
-            filters.to_gift_number >= Order.number,
-        ]
-        if filters.types:
-            conditions.append(Order.type.in_(filters.types))
-        if filters.model_names:
-            conditions.append(Order.model_name.in_(filters.model_names))
-        if filters.shop_type is ShopType.AUCTION:
-            conditions.append(Order.min_step != None)
-        elif filters.shop_type is ShopType.MARKET:
-            conditions.append(Order.min_step == None)
+            sort_column = Order.price
+        conditions = self._listing_conditions(filters)
+        conditions.extend(self._facet_conditions(filters).values())
+        if cursor := filters.cursor:
+            sort_value = cursor.price if sort_column is Order.price else cursor.created_at
+            after_key = tuple_(sort_column, Order.id) > tuple_(sort_value, cursor.id)
+            if not is_ascending:
+                after_key = tuple_(sort_column, Order.id) < tuple_(sort_value, cursor.id)
+            after_cursor = and_(Order.is_vip == cursor.is_vip, after_key)
+            if cursor.is_vip:
+                after_cursor = or_(Order.is_vip == False, after_cursor)
+            conditions.append(after_cursor)
 
+        order_by = (sort_column.asc(), Order.id.asc())
+        if not is_ascending:
+            order_by = (sort_column.desc(), Order.id.desc())
         stmt = (
-            select(Order)
+            select(*dm_columns(Order, OrderDM))
             .where(*conditions)
             .limit(filters.limit)
             .offset(filters.offset)
-            .order_by(Order.is_vip.desc(), order_by)
+            .order_by(Order.is_vip.desc(), *order_by)
         )
         result = await self._session.execute(stmt)
-        return [OrderDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(OrderDM, result)
+
+    async def get_gift_facets(self, filters: GiftFiltersDM) -> GiftFacetsDM:
+        """Each facet is counted without its own filter, so the panel can show the alternatives"""
+
+        facet_conditions = self._facet_conditions(filters)
+
+        def matching(*excluded: str) -> ColumnElement[bool]:
+            return and_(
+                true(), *(value for key, value in facet_conditions.items() if key not in excluded)
+            )
+
+        stmt = (
+            select(
+                Order.rarity,
+                Order.type,
+                Order.model_name,
+                func.grouping(Order.rarity, Order.type, Order.model_name).label("grouping_id"),
+                func.count().filter(matching()).label("count"),
+                func.count().filter(matching("rarity")).label("rarity_count"),
+                func.count().filter(matching("type")).label("type_count"),
+                func.count().filter(matching("model_name")).label("model_name_count"),
+                func.min(Order.price).filter(matching("price")).label("min_price"),
+                func.max(Order.price).filter(matching("price")).label("max_price"),
+            )
+            .where(*self._listing_conditions(filters))
+            .group_by(
+                func.grouping_sets(
+                    tuple_(Order.rarity), tuple_(Order.type), tuple_(Order.model_name), tuple_()
+                )
+            )
+        )
+        result = await self._session.execute(stmt)
+        facets = GiftFacetsDM(count=0, rarities=[], types=[], model_names=[])
+        for row in result.all():
+            if row.grouping_id == 0b011 and row.rarity_count:
+                facets.rarities.append(FacetCountDM(value=row.rarity, count=row.rarity_count))
+            elif row.grouping_id == 0b101 and row.type_count:
+                facets.types.append(FacetCountDM(value=row.type, count=row.type_count))
+            elif row.grouping_id == 0b110 and row.model_name_count:
+                facets.model_names.append(
+                    FacetCountDM(value=row.model_name, count=row.model_name_count)
+                )
+            elif row.grouping_id == 0b111:
+                facets.count, facets.min_price, facets.max_price = (
+                    row.count, row.min_price, row.max_price
+                )
+        for values in (facets.rarities, facets.types, facets.model_names):
+            values.sort(key=lambda facet: (-facet.count, facet.value))
+        return facets
 
     async def get_user_gifts(
         self, user_id: int, limit: int | None, offset: int | None
     ) -> list[UserGiftDM]:
         stmt = (
-            select(Order)
+            select(*dm_columns(Order, UserGiftDM))
             .filter_by(seller_id=user_id, is_completed=False)
             .order_by(Order.created_at.desc())
             .limit(limit)
             .offset(offset)
         )
         result = await self._session.execute(stmt)
-        return [UserGiftDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(UserGiftDM, result)
 
     async def get_user_gift(self, user_id: int, gift_id: int) -> UserGiftDM | None:
-        stmt = select(Order).filter_by(id=gift_id, seller_id=user_id, is_completed=False)
+        stmt = select(*dm_columns(Order, UserGiftDM)).filter_by(
+            id=gift_id, seller_id=user_id, is_completed=False
+        )
         result = await self._session.execute(stmt)
-        if not (gift := result.scalar_one_or_none()):
+        if not (gift := result.one_or_none()):
             return
-        return UserGiftDM(**gift.__dict__)
+        return to_dm(UserGiftDM, gift)
 
     async def get_many(self, **filters) -> list[OrderDM]:
-        stmt = select(Order).filter_by(**filters)
+        stmt = select(*dm_columns(Order, OrderDM)).filter_by(**filters)
         result = await self._session.execute(stmt)
-        return [OrderDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(OrderDM, result)
 
     async def get_count_gifts(self) -> int:
         stmt = select(func.count()).select_from(Order)
@@ -93,21 +216,62 @@ class MarketGateway(OrderSaver, OrderReader):
         return result.scalar_one()
 
     async def get_one(self, **filters) -> OrderDM | None:
-        stmt = select(Order).filter_by(**filters)
+        stmt = select(*dm_columns(Order, OrderDM)).filter_by(**filters)
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return OrderDM(**order.__dict__)
+            return to_dm(OrderDM, order)
 
     async def get_full_order(self, **filters) -> ReadOrderDM | None:
-        stmt = select(Order).filter_by(**filters)
+        stmt = select(*dm_columns(Order, OrderDM), Order.bids_count).filter_by(**filters)
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
-        if order:
-            return ReadOrderDM(**order.__dict__)
+        if not (order := result.one_or_none()):
+            return
+        bids_stmt = (
+            select(*dm_columns(Bid, ReadBidDM))
+            .where(Bid.gift_id == order.id)
+            .order_by(Bid.created_at.desc(), Bid.id.desc())
+            .limit(RECENT_BIDS_LIMIT)
+        )
+        bids = to_dms(ReadBidDM, await self._session.execute(bids_stmt))
+        return to_dm(ReadOrderDM, order, bids=bids[::-1])
+
+    async def get_listed_order(self, order_id: int) -> ReadOrderDM | None:
+        if not (self._order_book and self._order_book.is_ready):
+            return await self.get_full_order(id=order_id, is_active=True, is_completed=False)
+        if not (order := self._order_book.get_one(order_id)):
+            return
+        if order.min_step is not None:
+            return await self.get_full_order(id=order_id, is_active=True, is_completed=False)
+        return ReadOrderDM(**order.model_dump(), bids=[])
+
+    async def get_bids(
+        self, gift_id: int, limit: int, cursor: BidCursorDM | None = None
+    ) -> list[ReadBidDM]:
+        stmt = select(*dm_columns(Bid, ReadBidDM)).where(Bid.gift_id == gift_id)
+        if cursor:
+            stmt = stmt.where(tuple_(Bid.created_at, Bid.id) < (cursor.created_at, cursor.id))
+        stmt = stmt.order_by(Bid.created_at.desc(), Bid.id.desc()).limit(limit)
+        result = await self._session.execute(stmt)
+        return to_dms(ReadBidDM, result)
+
+    async def get_bids_summary(self, gift_id: int, top: int) -> BidsSummaryDM:
+        counts_stmt = select(Order.bids_count, Order.bidders_count).where(Order.id == gift_id)
+        if not (counts := (await self._session.execute(counts_stmt)).one_or_none()):
+            return BidsSummaryDM(count=0, bidders_count=0, top=[])
+        top_stmt = (
+            select(*dm_columns(Bid, ReadBidDM))
+            .where(Bid.gift_id == gift_id)
+            .order_by(Bid.amount.desc())
+            .limit(top)
+        )
+        top_bids = to_dms(ReadBidDM, await self._session.execute(top_stmt))
+        return BidsSummaryDM(
+            count=counts.bids_count, bidders_count=counts.bidders_count, top=top_bids
+        )
 
     async def get_gifts_by_ids(self, gifts_ids: list[int], user_id: int) -> list[CartGiftDM]:
-        stmt = select(Order).where(
+        stmt = select(*dm_columns(Order, CartGiftDM)).where(
             Order.id.in_(gifts_ids),
             Order.is_active == True,
             Order.is_completed == False,
@@ -115,50 +279,71 @@ class MarketGateway(OrderSaver, OrderReader):
             Order.seller_id != user_id,
         )
         result = await self._session.execute(stmt)
-        return [CartGiftDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(CartGiftDM, result)
 
     async def get_user_gifts_by_ids(self, gifts_ids: list[int], **filters) -> list[UserGiftDM]:
-        stmt = select(Order).where(Order.id.in_(gifts_ids)).filter_by(**filters)
+        stmt = (
+            select(*dm_columns(Order, UserGiftDM))
+            .where(Order.id.in_(gifts_ids))
+            .filter_by(**filters)
+        )
         result = await self._session.execute(stmt)
-        return [UserGiftDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(UserGiftDM, result)
 
-    async def get_auction_orders(self) -> list[OrderDM]:
-        stmt = select(Order).where(
-            Order.min_step != None,
-            Order.auction_end_time <= datetime.now(tz=timezone.utc),
-            Order.is_completed == False,
+    async def get_pending_auctions(self, orders_ids: list[int] | None = None) -> list[OrderDM]:
+        stmt = select(*dm_columns(Order, OrderDM)).where(
+            Order.min_step != None, Order.is_completed == False
         )
+        if orders_ids is not None:
+            stmt = stmt.where(Order.id.in_(orders_ids))
         result = await self._session.execute(stmt)
-        return [OrderDM(**order.__dict__) for order in result.scalars().all()]
+        return to_dms(OrderDM, result)
 
     async def save(self, order_dm: CreateOrderDM) -> CreateOrderDM:
         try:
-            stmt = insert(Order).values(order_dm.model_dump()).returning(Order)
+            stmt = (
+                insert(Order)
+                .values(order_dm.model_dump())
+                .returning(*dm_columns(Order, CreateOrderDM))
+            )
         except IntegrityError:
             raise AlreadyExistError("Order already exist")
 
         result = await self._session.execute(stmt)
-        return CreateOrderDM(**result.scalar_one().__dict__)
+        self._invalidate_listings()
+        return to_dm(CreateOrderDM, result.one())
 
     async def update_order(self, data: dict, **filters) -> OrderDM | None:
-        stmt = update(Order).filter_by(**filters).values(data).returning(Order)
+        stmt = (
+            update(Order).filter_by(**filters).values(data).returning(*dm_columns(Order, OrderDM))
+        )
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return OrderDM(**order.__dict__)
+            self._invalidate_listings(order.id)
+            return to_dm(OrderDM, order)
 
     async def update_giveaway_gifts(self, data: dict, gifts_ids: list[int]) -> None:
         stmt = update(Order).values(data).where(Order.id.in_(gifts_ids))
         await self._session.execute(stmt)
+        self._invalidate_listings(*gifts_ids)
 
     async def withdraw_from_market(self, data: dict, **filters) -> UserGiftDM | None:
-        stmt = update(Order).filter_by(**filters).values(data).returning(Order)
+        stmt = (
+            update(Order)
+            .filter_by(**filters)
+            .values(data)
+            .returning(*dm_columns(Order, UserGiftDM))
+        )
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return UserGiftDM(**order.__dict__)
+            self._invalidate_listings(order.id)
+            return to_dm(UserGiftDM, order)
 
-    async def update_cart_orders(self, values: dict, gifts_ids: list[int], user_id: int) -> None:
+    async def update_cart_orders(
+        self, values: dict, gifts_ids: list[int], user_id: int
+    ) -> list[CartGiftDM]:
         stmt = (
             update(Order)
             .where(
@@ -166,23 +351,239 @@ class MarketGateway(OrderSaver, OrderReader):
                 Order.is_active == True,
                 Order.is_completed == False,
                 Order.min_step == None,
+                Order.buyer_id == None,
                 Order.seller_id != user_id,
             )
             .values(values)
+            .returning(*dm_columns(Order, CartGiftDM))
         )
-        await self._session.execute(stmt)
+        result = await self._session.execute(stmt)
+        gifts = to_dms(CartGiftDM, result)
+        if gifts:
+            self._invalidate_listings(*(gift.id for gift in gifts))
+        return gifts
 
     async def delete_order(self, **filters) -> UserGiftDM | None:
-        stmt = delete(Order).filter_by(**filters).returning(Order)
+        stmt = delete(Order).filter_by(**filters).returning(*dm_columns(Order, UserGiftDM))
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return UserGiftDM(**order.__dict__)
+            self._invalidate_listings(order.id)
+            return to_dm(UserGiftDM, order)
+
+    async def complete_auctions(
+        self, orders_ids: list[int], completed_order_date: datetime
+    ) -> list[OrderDM]:
+        if not orders_ids:
+            return []
+        stmt = (
+            update(Order)
+            .where(
+                Order.id.in_(orders_ids),
+                Order.is_completed == False,
+                Order.buyer_id != None,
+                Order.auction_end_time <= func.now(),
+            )
+            .values(is_completed=True, completed_order_date=completed_order_date)
+            .returning(*dm_columns(Order, OrderDM))
+        )
+        result = await self._session.execute(stmt)
+        orders = to_dms(OrderDM, result)
+        if orders:
+            self._invalidate_listings(*(order.id for order in orders))
+        return orders
+
+    async def withdraw_auctions(self, orders_ids: list[int]) -> list[int]:
+        if not orders_ids:
+            return []
+        stmt = (
+            update(Order)
+            .where(
+                Order.id.in_(orders_ids),
+                Order.is_completed == False,
+                Order.buyer_id == None,
+                Order.auction_end_time <= func.now(),
+            )
+            .values(
+                is_active=False,
+                min_step=None,
+                auction_end_time=None,
+                price=None,
+                bids_count=0,
+                bidders_count=0,
+            )
+            .returning(Order.id)
+        )
+        result = await self._session.execute(stmt)
+        withdrawn_ids = list(result.scalars().all())
+        if withdrawn_ids:
+            await self._session.execute(delete(Bid).where(Bid.gift_id.in_(withdrawn_ids)))
+            self._invalidate_listings(*withdrawn_ids)
+        return withdrawn_ids
 
     async def save_auction_bid(self, data: BidDM) -> None:
+        counters = update(Order).where(Order.id == data.gift_id).values(**self._count_bid(data))
+        await self._session.execute(counters)
         stmt = insert(Bid).values(data.model_dump())
         await self._session.execute(stmt)
 
+    async def place_bid(
+        self, data: BidDM, extend_window: timedelta, extend_by: timedelta
+    ) -> PlacedBidDM | None:
+        """Lock the auction, debit the bidder, refund the outbid buyer, move the price and
+        record the bid in one statement. A bid within extend_window of the end pushes the end
+        time back by extend_by.
+
+        Returns the order as it was before the bid, user_balance is None if the bid was rejected
+        """
+
+        locked = (
+            select(*dm_columns(Order, OrderDM))
+            .where(Order.id == data.gift_id, Order.is_active == True, Order.is_completed == False)
+            .with_for_update()
+            .cte("locked")
+        )
+        own_refund = case((locked.c.buyer_id == data.buyer_id, locked.c.price), else_=0)
+        debit = (
+            update(User)
+            .where(
+                User.id == data.buyer_id,
+                User.balance >= data.amount,
+                locked.c.min_step != None,
+                locked.c.min_step <= data.amount - locked.c.price + 0.01,
+                or_(locked.c.auction_end_time == None, locked.c.auction_end_time >= func.now()),
+            )
+            .values(balance=User.balance - data.amount + own_refund)
+            .returning(User.id, User.balance)
+            .cte("debit")
+        )
+        refund = (
+            update(User)
+            .where(
+                User.id == locked.c.buyer_id,
+                locked.c.buyer_id != data.buyer_id,
+                exists(select(debit.c.balance)),
+            )
+            .values(balance=User.balance + locked.c.price)
+            .returning(User.id, User.balance)
+            .cte("refund")
+        )
+        ledger_records = (
+            insert(LedgerRecord)
+            .from_select(
+                ["user_id", "type", "amount", "balance", "reference_id"],
+                select(
+                    debit.c.id,
+                    cast(literal(LedgerRecordType.BID.name), LedgerRecord.type.type),
+                    own_refund - data.amount,
+                    debit.c.balance,
+                    cast(locked.c.id, BigInteger),
+                )
+                .select_from(debit.join(locked, true()))
+                .union_all(
+                    select(
+                        refund.c.id,
+                        cast(literal(LedgerRecordType.BID_REFUND.name), LedgerRecord.type.type),
+                        locked.c.price,
+                        refund.c.balance,
+                        cast(locked.c.id, BigInteger),
+                    ).select_from(refund.join(locked, true()))
+                ),
+            )
+            .cte("ledger_records")
+        )
+        placed = (
+            update(Order)
+            .where(Order.id == locked.c.id, exists(select(debit.c.balance)))
+            .values(
+                **self._count_bid(data),
+                buyer_id=data.buyer_id,
+                price=data.amount,
+                auction_end_time=case(
+                    (
+                        Order.auction_end_time - func.now() < extend_window,
+                        Order.auction_end_time + extend_by,
+                    ),
+                    else_=Order.auction_end_time,
+                ),
+            )
+            .returning(Order.id, Order.auction_end_time)
+            .cte("placed")
+        )
+        bid = (
+            insert(Bid)
+            .from_select(
+                ["gift_id", "amount", "buyer_id"],
+                select(placed.c.id, literal(data.amount), literal(data.buyer_id)),
+            )
+            .returning(Bid.id)
+            .cte("bid")
+        )
+        stmt = (
+            select(
+                locked,
+                debit.c.balance.label("user_balance"),
+                placed.c.auction_end_time.label("new_auction_end_time"),
+            )
+            .select_from(locked.outerjoin(debit, true()).outerjoin(placed, true()))
+            .add_cte(refund, bid, ledger_records)
+        )
+        result = await self._session.execute(stmt)
+        row = result.one_or_none()
+        if not row:
+            return
+        if row.user_balance is not None:
+            self._invalidate_listings(data.gift_id)
+        return PlacedBidDM(
+            order=OrderDM.model_validate(row._mapping),
+            user_balance=row.user_balance,
+            auction_end_time=row.new_auction_end_time,
+        )
+
     async def delete_auction_bids(self, **filters) -> None:
-        stmt = delete(Bid).filter_by(**filters)
+        deleted = delete(Bid).filter_by(**filters).returning(Bid.gift_id).cte("deleted")
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(select(deleted.c.gift_id)))
+            .values(bids_count=0, bidders_count=0)
+        )
         await self._session.execute(stmt)
+
+    def _count_bid(self, data: BidDM) -> dict:
+        """Counter updates of the order for a new bid, run before the bid row is inserted"""
+
+        is_new_bidder = ~exists().where(Bid.gift_id == Order.id, Bid.buyer_id == data.buyer_id)
+        return dict(
+            bids_count=Order.bids_count + 1,
+            bidders_count=Order.bidders_count + case((is_new_bidder, 1), else_=0),
+        )
+
+    def _listing_conditions(self, filters: GiftFiltersDM) -> list[ColumnElement[bool]]:
+        conditions = [
+            Order.is_active == True,
+            Order.is_completed == False,
+            filters.from_gift_number <= Order.number,
+            filters.to_gift_number >= Order.number,
+        ]
+        if filters.shop_type is ShopType.AUCTION:
+            conditions.append(Order.min_step != None)
+        elif filters.shop_type is ShopType.MARKET:
+            conditions.append(Order.min_step == None)
+        return conditions
+
+    def _facet_conditions(self, filters: GiftFiltersDM) -> dict[str, ColumnElement[bool]]:
+        conditions = {
+            "price": and_(filters.from_price <= Order.price, filters.to_price >= Order.price),
+            "rarity": Order.rarity.in_(filters.rarities),
+        }
+        if filters.types:
+            conditions["type"] = Order.type.in_(filters.types)
+        if filters.model_names:
+            conditions["model_name"] = Order.model_name.in_(filters.model_names)
+        return conditions
+
+    def _invalidate_listings(self, *orders_ids: int) -> None:
+        if self._cache:
+            self._session.info[STALE_CACHE_KEY] = self._cache
+        if self._order_book:
+            self._order_book.track(self._session, orders_ids)
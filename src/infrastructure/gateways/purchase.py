@@ -0,0 +1,63 @@
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.application.common.const import PurchaseStatus
+from src.application.interfaces.purchase import PurchaseReader, PurchaseSaver
+from src.domain.entities.market import CreatePurchaseDM, PurchaseDM
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
+from src.infrastructure.models.order import Purchase
+
+
+class PurchaseGateway(PurchaseReader, PurchaseSaver):
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def save(self, data: CreatePurchaseDM) -> PurchaseDM:
+        stmt = insert(Purchase).values(data.model_dump()).returning(*dm_columns(Purchase, PurchaseDM))
+        result = await self._session.execute(stmt)
+        return to_dm(PurchaseDM, result.one())
+
+    async def save_many(self, data: list[CreatePurchaseDM]) -> list[PurchaseDM]:
+        stmt = (
+            insert(Purchase)
+            .values([purchase.model_dump() for purchase in data])
+            .returning(*dm_columns(Purchase, PurchaseDM))
+        )
+        result = await self._session.execute(stmt)
+        return to_dms(PurchaseDM, result)
+
+    async def update_purchase(self, data: dict, **filters) -> PurchaseDM | None:
+        stmt = (
+            update(Purchase)
+            .filter_by(**filters)
+            .values(data)
+            .returning(*dm_columns(Purchase, PurchaseDM))
+        )
+        result = await self._session.execute(stmt)
+        if purchase := result.one_or_none():
+            return to_dm(PurchaseDM, purchase)
+
+    async def update_stale(
+        self, data: dict, status: PurchaseStatus, updated_before: datetime
+    ) -> list[PurchaseDM]:
+        stmt = (
+            update(Purchase)
+            .where(Purchase.status == status, Purchase.updated_at < updated_before)
+            .values(data)
+            .returning(*dm_columns(Purchase, PurchaseDM))
+        )
+        result = await self._session.execute(stmt)
+        return to_dms(PurchaseDM, result)
+
+    async def get_one(self, **filters) -> PurchaseDM | None:
+        stmt = select(*dm_columns(Purchase, PurchaseDM)).filter_by(**filters)
+        result = await self._session.execute(stmt)
+        if purchase := result.one_or_none():
+            return to_dm(PurchaseDM, purchase)
+
+    async def get_many(self, **filters) -> list[PurchaseDM]:
+        stmt = select(*dm_columns(Purchase, PurchaseDM)).filter_by(**filters).order_by(Purchase.id)
+        result = await self._session.execute(stmt)
+        return to_dms(PurchaseDM, result)
@@ -0,0 +1,18 @@
+from bullmq import Queue
+
+from src.application.interfaces.queue import TaskQueue
+
+
+class BullMQTaskQueue(TaskQueue):
+    def __init__(self, queue: Queue) -> None:
+        self._queue = queue
+
+    async def add(self, name: str, data: dict) -> None:
+        await self._queue.add(name, data)
+
+    async def add_bulk(self, jobs: list[tuple[str, dict]]) -> None:
+        if jobs:
+            await self._queue.addBulk([{"name": name, "data": data} for name, data in jobs])
+
+    async def close(self) -> None:
+        await self._queue.close()
@@ -0,0 +1,38 @@
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+from src.application.common.const import PRIMARY_PIN_KEY_PREFIX
+from src.application.common.utils import get_file_logger
+from src.application.interfaces.database import PrimaryPin
+from src.entrypoint.config import PostgresConfig
+
+
+logger = get_file_logger(__name__, "src/logs/user.log")
+
+
+class RedisPrimaryPin(PrimaryPin):
+    """Pins a user to the primary for POSTGRES_PRIMARY_PIN_SECONDS after a write.
+
+    Does nothing without replicas. While Redis is down every user counts as pinned
+    """
+
+    def __init__(self, redis: Redis, config: PostgresConfig) -> None:
+        self._redis = redis
+        self._is_enabled = bool(config.replica_urls)
+        self._ttl = config.POSTGRES_PRIMARY_PIN_SECONDS
+
+    async def pin(self, user_id: int) -> None:
+        if not self._is_enabled:
+            return
+        try:
+            await self._redis.set(f"{PRIMARY_PIN_KEY_PREFIX}{user_id}", 1, ex=self._ttl)
+        except RedisError as e:
+            logger.error(f"RedisPrimaryPin: failed to pin user {user_id}: {e}")
+
+    async def is_pinned(self, user_id: int) -> bool:
+        if not self._is_enabled:
+            return False
+        try:
+            return bool(await self._redis.exists(f"{PRIMARY_PIN_KEY_PREFIX}{user_id}"))
+        except RedisError:
+            return True
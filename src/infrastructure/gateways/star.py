@@ -1,10 +1,13 @@
-from sqlalchemy import and_, delete, insert, or_, select, update
+from sqlalchemy import Select, and_, delete, insert, or_, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
 from src.application.common.const import OrderStatus
 from src.application.interfaces.star import StarOrderSaver
 from src.domain.entities.star import CreateStarOrderDM, StarOrderDM
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
 from src.infrastructure.models.star import Star
+from src.infrastructure.models.user import User
 
 
 class StarGateway(StarOrderSaver):
@@ -12,31 +15,20 @@ class StarGateway(StarOrderSaver):
         self._session = session
 
     async def get_all(self, **filters) -> list[StarOrderDM]:
-        stmt = select(Star).filter_by(**filters)
+        stmt = self._select_with_names(**filters)
         result = await self._session.execute(stmt)
-        return [
-            StarOrderDM(
-                **order.__dict__,
-                seller_name=order.seller.username,
-                buyer_name=None if not order.buyer else order.buyer.username
-            )
-            for order in result.scalars().all()
-        ]
+        return to_dms(StarOrderDM, result)
 
     async def get_one(self, **filters) -> StarOrderDM | None:
-        stmt = select(Star).filter_by(**filters)
+        stmt = self._select_with_names(**filters)
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return StarOrderDM(
-                **order.__dict__,
-                seller_name=order.seller.username,
-                buyer_name=None if not order.buyer else order.buyer.username
-            )
+            return to_dm(StarOrderDM, order)
 
     async def get_cancel_order(self, order_id: int, user_id: int) -> StarOrderDM | None:
         stmt = (
-            select(Star)
+            select(*dm_columns(Star, StarOrderDM))
             .where(
                 and_(
                     Star.id == order_id,
@@ -51,24 +43,42 @@ class StarGateway(StarOrderSaver):
             )
         )
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return StarOrderDM(**order.__dict__)
+            return to_dm(StarOrderDM, order)
 
     async def save(self, star_order: CreateStarOrderDM) -> None:
-        stmt = insert(Star).values(star_order.model_dump()).returning(Star)
+        stmt = insert(Star).values(star_order.model_dump())
         await self._session.execute(stmt)
 
     async def update(self, values: dict, **filters) -> StarOrderDM | None:
-        stmt = update(Star).values(values).filter_by(**filters).returning(Star)
+        stmt = (
+            update(Star)
+            .values(values)
+            .filter_by(**filters)
+            .returning(*dm_columns(Star, StarOrderDM))
+        )
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return StarOrderDM(**order.__dict__)
+            return to_dm(StarOrderDM, order)
 
     async def delete(self, **filters) -> StarOrderDM | None:
-        stmt = delete(Star).filter_by(**filters).returning(Star)
+        stmt = delete(Star).filter_by(**filters).returning(*dm_columns(Star, StarOrderDM))
         result = await self._session.execute(stmt)
-        order = result.scalar_one_or_none()
+        order = result.one_or_none()
         if order:
-            return StarOrderDM(**order.__dict__)
+            return to_dm(StarOrderDM, order)
+
+    def _select_with_names(self, **filters) -> Select:
+        seller, buyer = aliased(User), aliased(User)
+        return (
+            select(
+                *dm_columns(Star, StarOrderDM),
+                seller.username.label("seller_name"),
+                buyer.username.label("buyer_name"),
+            )
+            .filter_by(**filters)
+            .join(seller, Star.seller_id == seller.id)
+            .outerjoin(buyer, Star.buyer_id == buyer.id)
+        )
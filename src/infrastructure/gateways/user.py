@@ -1,27 +1,59 @@
-from sqlalchemy import func, insert, select, update
+from sqlalchemy import (
+    CTE,
+    BigInteger,
+    Float,
+    Integer,
+    String,
+    cast,
+    column,
+    exists,
+    func,
+    insert,
+    literal,
+    or_,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.application.common.const import LedgerRecordType
+from src.application.interfaces.cache import UserCache
 from src.application.interfaces.user import UserReader, UserSaver
 from src.domain.entities.user import CreateUserDM, UpdateUserBalanceDM, UserDM
-from src.infrastructure.models.user import User, UserReferral
+from src.infrastructure.database.mapping import dm_columns, to_dm, to_dms
+from src.infrastructure.models.user import LedgerRecord, User, UserReferral
+
+
+LEDGER_COLUMNS = ["user_id", "type", "amount", "balance", "reference_id"]
 
 
 class UserGateway(UserReader, UserSaver):
-    def __init__(self, session: AsyncSession) -> None:
+    """Changes of users are announced to user_cache, which the API keeps for authentication"""
+
+    def __init__(self, session: AsyncSession, user_cache: UserCache | None = None) -> None:
         self._session = session
+        self._user_cache = user_cache
 
     async def get_by_id(self, user_id: int) -> UserDM | None:
-        stmt = select(User).filter_by(id=user_id)
+        stmt = select(*dm_columns(User, UserDM)).filter_by(id=user_id)
+        result = await self._session.execute(stmt)
+        if user := result.one_or_none():
+            return to_dm(UserDM, user)
+
+    async def get_by_ids(self, users_ids: list[int]) -> list[UserDM]:
+        if not users_ids:
+            return []
+        stmt = select(*dm_columns(User, UserDM)).where(User.id.in_(users_ids))
         result = await self._session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user:
-            return UserDM(**user.__dict__)
+        return to_dms(UserDM, result)
 
     async def get_all(self) -> list[UserDM]:
-        stmt = select(User)
+        stmt = select(*dm_columns(User, UserDM))
         result = await self._session.execute(stmt)
-        return [UserDM(**user.__dict__) for user in result.scalars().all()]
+        return to_dms(UserDM, result)
 
     async def get_sum_users_balance(self) -> float:
         stmt = select(func.sum(User.balance))
@@ -29,70 +61,184 @@ class UserGateway(UserReader, UserSaver):
         return result.scalar_one()
 
     async def save(self, user: CreateUserDM) -> UserDM:
-        stmt = insert(User).values(user.model_dump()).returning(User)
+        stmt = insert(User).values(user.model_dump()).returning(*dm_columns(User, UserDM))
+        result = await self._session.execute(stmt)
+        return to_dm(UserDM, result.one())
+
+    async def upsert(self, user: CreateUserDM, referrer_id: int | None = None) -> None:
+        """Create the user or refresh its photo and username, and attach it to referrer_id if
+        that user exists, in one statement
+        """
+
+        new_user = pg_insert(User).values(user.model_dump())
+        upserted = (
+            new_user.on_conflict_do_update(
+                index_elements=[User.id],
+                set_=dict(photo_url=new_user.excluded.photo_url, username=new_user.excluded.username),
+                where=or_(
+                    User.photo_url.is_distinct_from(new_user.excluded.photo_url),
+                    User.username.is_distinct_from(new_user.excluded.username),
+                ),
+            )
+            .returning(User.id)
+            .cte("upserted")
+        )
+        stmt = select(upserted.c.id)
+        if referrer_id:
+            new_referral = pg_insert(UserReferral).from_select(
+                ["referrer_id", "referral_id"],
+                select(literal(referrer_id, BigInteger), literal(user.id, BigInteger)).where(
+                    exists().where(User.id == referrer_id)
+                ),
+            )
+            referral = new_referral.on_conflict_do_update(
+                index_elements=[UserReferral.referral_id],
+                set_=dict(referrer_id=new_referral.excluded.referrer_id),
+                where=UserReferral.referrer_id != new_referral.excluded.referrer_id,
+            ).cte("referral")
+            stmt = stmt.add_cte(referral)
         result = await self._session.execute(stmt)
-        new_user = result.scalar_one()
-        return UserDM(**new_user.__dict__)
+        if result.scalar_one_or_none():
+            await self._invalidate([user.id])
 
     async def update_user(self, data: dict, **filters) -> UserDM | None:
-        stmt = update(User).values(data).filter_by(**filters).returning(User)
+        stmt = (
+            update(User).values(data).filter_by(**filters).returning(*dm_columns(User, UserDM))
+        )
         result = await self._session.execute(stmt)
-        new_user = result.scalar_one_or_none()
-        if new_user:
-            return UserDM(**new_user.__dict__)
+        if new_user := result.one_or_none():
+            await self._invalidate([new_user.id])
+            return to_dm(UserDM, new_user)
 
     async def get_by_comment(self, comment: str) -> UserDM | None:
-        stmt = select(User).filter_by(deposit_comment=comment)
+        stmt = select(*dm_columns(User, UserDM)).filter_by(deposit_comment=comment)
         result = await self._session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user:
-            return UserDM(**user.__dict__)
+        if user := result.one_or_none():
+            return to_dm(UserDM, user)
 
     async def update_balance(self, data: UpdateUserBalanceDM) -> UserDM | None:
+        """Change the balance and append the ledger record in one statement"""
+
         filter_by = {"deposit_comment": data.deposit_comment}
         if data.id:
             filter_by = {"id": data.id}
-        stmt = (
+        updated = (
             update(User)
             .filter_by(**filter_by)
             .values(balance=User.balance + data.amount)
-            .returning(User)
+            .returning(*dm_columns(User, UserDM))
+            .cte("updated")
+        )
+        stmt = select(updated).add_cte(
+            self._ledger_record(updated, data.type, data.amount, data.reference_id)
+        )
+        result = await self._session.execute(stmt)
+        if user := result.one_or_none():
+            await self._invalidate([user.id])
+            return to_dm(UserDM, user)
+
+    async def update_balances(self, data: list[UpdateUserBalanceDM]) -> dict[int, float]:
+        """Apply the changes with one update per user and one ledger record per change,
+        returns the new balance of each user
+        """
+
+        if not data:
+            return {}
+        items = values(
+            column("position", Integer),
+            column("id", BigInteger),
+            column("type", String),
+            column("amount", Float),
+            column("reference_id", BigInteger),
+            name="items",
+        ).data(
+            [
+                (position, item.id, item.type.name, item.amount, item.reference_id)
+                for position, item in enumerate(data)
+            ]
+        )
+        changes = select(items).cte("changes")
+        totals = (
+            select(changes.c.id, func.sum(changes.c.amount).label("amount"))
+            .group_by(changes.c.id)
+            .cte("totals")
+        )
+        updated = (
+            update(User)
+            .where(User.id == totals.c.id)
+            .values(balance=User.balance + totals.c.amount)
+            .returning(User.id, User.balance)
+            .cte("updated")
+        )
+        # the balance after each change: the new balance minus the changes that follow it
+        running_amount = func.sum(changes.c.amount).over(
+            partition_by=changes.c.id, order_by=changes.c.position
         )
+        records = (
+            insert(LedgerRecord)
+            .from_select(
+                LEDGER_COLUMNS,
+                select(
+                    changes.c.id,
+                    cast(changes.c.type, LedgerRecord.type.type),
+                    changes.c.amount,
+                    updated.c.balance - totals.c.amount + running_amount,
+                    changes.c.reference_id,
+                )
+                .join(updated, updated.c.id == changes.c.id)
+                .join(totals, totals.c.id == changes.c.id),
+            )
+            .cte("records")
+        )
+        stmt = select(updated.c.id, updated.c.balance).add_cte(records)
         result = await self._session.execute(stmt)
-        user = result.scalar_one_or_none()
-        if user:
-            return UserDM(**user.__dict__)
+        await self._invalidate(list({item.id for item in data}))  # type: ignore
+        return dict(result.tuples().all())
 
     async def add_referral(self, referrer_id: int, referral: UserDM) -> bool:
-        stmt = (
+        inserted = (
             insert(UserReferral)
             .values(referrer_id=referrer_id, referral_id=referral.id)
-            .returning(UserReferral)
+            .returning(UserReferral.referrer_id)
+            .cte("inserted")
         )
+        stmt = select(User.is_banned).join(inserted, inserted.c.referrer_id == User.id)
         try:
             result = await self._session.execute(stmt)
         except IntegrityError:
             return False
 
-        return not result.scalar_one().referrer.is_banned
+        return not result.scalar_one()
 
     async def update_referrer(self, referrer_id: int, referral: UserDM) -> None:
         stmt = update(UserReferral).values(referrer_id=referrer_id).filter_by(referral_id=referral.id)
         await self._session.execute(stmt)
 
-    async def update_referrer_balance(self, referrer_id: int, amount: float) -> None:
-        stmt = (
+    async def update_referrer_balance(
+        self, referrer_id: int, amount: float, reference_id: int | None = None
+    ) -> None:
+        updated = (
             update(User)
             .values(balance=User.balance + amount, commission=User.commission + amount)
             .filter_by(id=referrer_id)
+            .returning(User.id, User.balance)
+            .cte("updated")
+        )
+        stmt = select(updated.c.id).add_cte(
+            self._ledger_record(updated, LedgerRecordType.REFERRAL_REWARD, amount, reference_id)
         )
         await self._session.execute(stmt)
+        await self._invalidate([referrer_id])
 
     async def get_referrer(self, user_id: int) -> UserDM | None:
-        stmt = select(UserReferral).filter_by(referral_id=user_id)
+        stmt = (
+            select(*dm_columns(User, UserDM))
+            .join(UserReferral, UserReferral.referrer_id == User.id)
+            .where(UserReferral.referral_id == user_id)
+        )
         result = await self._session.execute(stmt)
-        user_referral = result.scalar_one_or_none()
-        return UserDM(**user_referral.referrer.__dict__) if user_referral else None
+        user = result.one_or_none()
+        return to_dm(UserDM, user) if user else None
 
     async def get_count_referrals(self, user_id: int) -> int:
         stmt = select(func.count()).select_from(UserReferral).filter_by(referrer_id=user_id)
@@ -103,3 +249,27 @@ class UserGateway(UserReader, UserSaver):
         stmt = select(func.count()).select_from(User)
         result = await self._session.execute(stmt)
         return result.scalar_one()
+
+    async def _invalidate(self, users_ids: list[int]) -> None:
+        if self._user_cache:
+            await self._user_cache.invalidate(users_ids)
+
+    def _ledger_record(
+        self, updated: CTE, type: LedgerRecordType, amount: float, reference_id: int | None
+    ) -> CTE:
+        """Ledger record of a balance change, updated must return the user id and balance"""
+
+        return (
+            insert(LedgerRecord)
+            .from_select(
+                LEDGER_COLUMNS,
+                select(
+                    updated.c.id,
+                    cast(literal(type.name), LedgerRecord.type.type),
+                    literal(amount, Float),
+                    updated.c.balance,
+                    literal(reference_id, BigInteger),
+                ),
+            )
+            .cte("ledger_record")
+        )
@@ -1,7 +1,7 @@
 from src.infrastructure.models.base import Base
-from src.infrastructure.models.order import Order, Bid
+from src.infrastructure.models.order import Order, Bid, Purchase
 from src.infrastructure.models.star import Star
 from src.infrastructure.models.transaction import Lt, WithdrawRequest
-from src.infrastructure.models.user import User, UserReferral
+from src.infrastructure.models.user import LedgerRecord, User, UserReferral
 from src.infrastructure.models.history import History
-from src.infrastructure.models.giveaway import Giveaway
+from src.infrastructure.models.giveaway import Giveaway, GiveawayGift, GiveawayParticipant, GiveawayTicket
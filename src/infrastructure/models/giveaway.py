@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, Boolean, Float, ForeignKey, Integer
+from sqlalchemy import TIMESTAMP, BigInteger, Boolean, Float, ForeignKey, Index, Integer, text
 from sqlalchemy.dialects.postgresql import ENUM, JSONB
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -13,10 +13,6 @@ class Giveaway(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     type: Mapped[GiveawayType] = mapped_column(ENUM(GiveawayType))
     price: Mapped[float] = mapped_column(Float)
-    gifts_ids: Mapped[list[int]] = mapped_column(JSONB)
-    participants_ids: Mapped[list[int]] = mapped_column(JSONB)
-    winners_ids: Mapped[list[int]] = mapped_column(JSONB)
-    referrers_ids: Mapped[list[int]] = mapped_column(JSONB)
     channels_usernames: Mapped[list[str]] = mapped_column(JSONB)
     quantity_members: Mapped[int] = mapped_column(Integer)
     is_premium: Mapped[bool] = mapped_column(Boolean)
@@ -24,4 +20,76 @@ class Giveaway(Base):
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
 
-    user: Mapped[User] = relationship("User", lazy="selectin")
+    user: Mapped[User] = relationship("User", lazy="raise")
+
+    __table_args__ = (
+        Index("ix_giveaways_end_time", "end_time"),
+        Index(
+            "ix_giveaways_end_time_not_completed",
+            "end_time",
+            postgresql_where=text("is_completed = false"),
+        ),
+        Index("ix_giveaways_user_id", "user_id"),
+    )
+
+
+class GiveawayParticipant(Base):
+    """One row per user, joining a ticket giveaway again adds tickets to the row, the order
+    the tickets were bought in is kept in GiveawayTicket
+    """
+
+    giveaway_id: Mapped[int] = mapped_column(
+        ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True
+    )
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), primary_key=True
+    )
+    tickets: Mapped[int] = mapped_column(Integer, default=1)
+    # the participant who invited this one into a live giveaway
+    referrer_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+
+    __table_args__ = (
+        # join order for the participants pages, counts and sums of tickets come from the index
+        Index(
+            "ix_giveaway_participants_giveaway_id_created_at",
+            "giveaway_id",
+            "created_at",
+            "user_id",
+            postgresql_include=["tickets"],
+        ),
+        Index(
+            "ix_giveaway_participants_giveaway_id_referrer_id",
+            "giveaway_id",
+            "referrer_id",
+            postgresql_where=text("referrer_id IS NOT NULL"),
+        ),
+        Index("ix_giveaway_participants_user_id", "user_id"),
+    )
+
+
+class GiveawayTicket(Base):
+    """One row per join or ticket purchase, winners are drawn from the tickets in this order"""
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    giveaway_id: Mapped[int] = mapped_column(ForeignKey("giveaways.id", ondelete="CASCADE"))
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    tickets: Mapped[int] = mapped_column(Integer)
+
+    __table_args__ = (
+        Index(
+            "ix_giveaway_tickets_giveaway_id_id",
+            "giveaway_id",
+            "id",
+            postgresql_include=["user_id", "tickets"],
+        ),
+        Index("ix_giveaway_tickets_user_id", "user_id"),
+    )
+
+
+class GiveawayGift(Base):
+    giveaway_id: Mapped[int] = mapped_column(
+        ForeignKey("giveaways.id", ondelete="CASCADE"), primary_key=True
+    )
+    # no foreign key, the giveaway keeps its gifts when their orders are deleted
+    order_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    winner_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
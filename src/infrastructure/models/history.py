@@ -1,4 +1,4 @@
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
@@ -17,4 +17,6 @@ class History(Base):
     model_name: Mapped[str | None] = mapped_column(String, nullable=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
 
-    user: Mapped[User] = relationship("User", lazy="selectin")
+    user: Mapped[User] = relationship("User", lazy="raise")
+
+    __table_args__ = (Index("ix_historys_user_id_created_at", "user_id", "created_at"),)
@@ -1,10 +1,21 @@
 from datetime import datetime
 
-from sqlalchemy import TIMESTAMP, BigInteger, Boolean, Float, ForeignKey, Integer, String
+from sqlalchemy import (
+    TIMESTAMP,
+    BigInteger,
+    Boolean,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    func,
+    text,
+)
 from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
-from src.application.common.const import GiftRarity
+from src.application.common.const import GiftRarity, PurchaseStatus
 from src.infrastructure.models.base import Base
 from src.infrastructure.models.user import User
 
@@ -26,17 +37,69 @@ class Order(Base):
     min_step: Mapped[float | None] = mapped_column(Float, nullable=True)
     auction_end_time: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
     is_active: Mapped[bool] = mapped_column(Boolean, default=False)
-    is_vip: Mapped[bool | None] = mapped_column(Boolean, nullable=True)
+    is_vip: Mapped[bool] = mapped_column(Boolean, default=False, server_default=text("false"))
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
+    # kept up to date by the statements that add and remove bids
+    bids_count: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
+    bidders_count: Mapped[int] = mapped_column(Integer, default=0, server_default=text("0"))
 
     seller_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
     buyer_id: Mapped[int | None] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"), nullable=True
     )
 
-    seller: Mapped[User] = relationship("User", lazy="selectin", foreign_keys="Order.seller_id")
-    buyer: Mapped[User] = relationship("User", lazy="selectin", foreign_keys="Order.buyer_id")
-    bids: Mapped[list["Bid"]] = relationship("Bid", lazy="selectin", uselist=True)
+    seller: Mapped[User] = relationship("User", lazy="raise", foreign_keys="Order.seller_id")
+    buyer: Mapped[User] = relationship("User", lazy="raise", foreign_keys="Order.buyer_id")
+    bids: Mapped[list["Bid"]] = relationship("Bid", lazy="raise", uselist=True)
+
+    __table_args__ = (
+        Index(
+            "ix_orders_listing_created_at",
+            "is_vip",
+            "created_at",
+            "id",
+            postgresql_where=text("is_active = true AND is_completed = false"),
+        ),
+        Index(
+            "ix_orders_listing_created_at_vip_desc",
+            text("is_vip DESC"),
+            "created_at",
+            "id",
+            postgresql_where=text("is_active = true AND is_completed = false"),
+        ),
+        Index(
+            "ix_orders_listing_price",
+            "is_vip",
+            "price",
+            "id",
+            postgresql_where=text("is_active = true AND is_completed = false"),
+        ),
+        Index(
+            "ix_orders_listing_price_vip_desc",
+            text("is_vip DESC"),
+            "price",
+            "id",
+            postgresql_where=text("is_active = true AND is_completed = false"),
+        ),
+        Index(
+            "ix_orders_listing_type_model_name",
+            "type",
+            "model_name",
+            postgresql_where=text("is_active = true AND is_completed = false"),
+        ),
+        Index("ix_orders_type_number", "type", "number"),
+        Index(
+            "ix_orders_seller_id_created_at",
+            "seller_id",
+            "created_at",
+            postgresql_where=text("is_completed = false"),
+        ),
+        Index(
+            "ix_orders_auction_end_time",
+            "auction_end_time",
+            postgresql_where=text("min_step IS NOT NULL AND is_completed = false"),
+        ),
+    )
 
 
 class Bid(Base):
@@ -44,3 +107,34 @@ class Bid(Base):
     amount: Mapped[float] = mapped_column(Float)
     gift_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
     buyer_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+
+    __table_args__ = (
+        Index("ix_bids_gift_id_created_at_id", "gift_id", "created_at", "id"),
+        Index("ix_bids_gift_id_amount", "gift_id", "amount"),
+    )
+
+
+class Purchase(Base):
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    price: Mapped[float] = mapped_column(Float)
+    amount: Mapped[float] = mapped_column(Float)
+    status: Mapped[PurchaseStatus] = mapped_column(
+        ENUM(PurchaseStatus), default=PurchaseStatus.RESERVED
+    )
+    completed_at: Mapped[datetime | None] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    updated_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.now(), onupdate=func.now()
+    )
+
+    order_id: Mapped[int] = mapped_column(ForeignKey("orders.id", ondelete="CASCADE"))
+    buyer_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    seller_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+
+    __table_args__ = (
+        Index("ix_purchases_reserved", "id", postgresql_where=text("status = 'RESERVED'")),
+        Index(
+            "ix_purchases_transferring_updated_at",
+            "updated_at",
+            postgresql_where=text("status = 'TRANSFERRING'"),
+        ),
+    )
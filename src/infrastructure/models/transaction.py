@@ -1,4 +1,4 @@
-from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Integer, String
+from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, Index, Integer, String, text
 from sqlalchemy.orm import Mapped, mapped_column
 
 from src.infrastructure.models.base import Base
@@ -15,3 +15,8 @@ class WithdrawRequest(Base):
     amount: Mapped[float] = mapped_column(Float)
     wallet: Mapped[str] = mapped_column(String)
     is_completed: Mapped[bool] = mapped_column(Boolean, default=False)
+
+    __table_args__ = (
+        Index("ix_withdraw_requests_user_id_is_completed", "user_id", "is_completed"),
+        Index("ix_withdraw_requests_pending", "id", postgresql_where=text("is_completed = false")),
+    )
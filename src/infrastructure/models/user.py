@@ -1,6 +1,10 @@
-from sqlalchemy import BigInteger, Boolean, Float, ForeignKey, String
+from datetime import datetime
+
+from sqlalchemy import TIMESTAMP, BigInteger, Boolean, Float, ForeignKey, Index, String, func
+from sqlalchemy.dialects.postgresql import ENUM
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from src.application.common.const import LedgerRecordType
 from src.infrastructure.models.base import Base
 
 
@@ -22,8 +26,27 @@ class UserReferral(Base):
     )
 
     referrer: Mapped[User] = relationship(
-        "User", lazy="selectin", foreign_keys="UserReferral.referrer_id"
+        "User", lazy="raise", foreign_keys="UserReferral.referrer_id"
     )
     referral: Mapped[User] = relationship(
-        "User", lazy="selectin", foreign_keys="UserReferral.referral_id"
+        "User", lazy="raise", foreign_keys="UserReferral.referral_id"
     )
+
+    __table_args__ = (Index("ix_user_referrals_referrer_id", "referrer_id"),)
+
+
+class LedgerRecord(Base):
+    """Append-only journal of balance changes, users.balance is its running snapshot"""
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
+    type: Mapped[LedgerRecordType] = mapped_column(ENUM(LedgerRecordType))
+    amount: Mapped[float] = mapped_column(Float)
+    balance: Mapped[float] = mapped_column(Float)
+    reference_id: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"))
+    # taken after the user row is locked, so it follows the order of balance changes
+    created_at: Mapped[datetime] = mapped_column(
+        TIMESTAMP(timezone=True), server_default=func.clock_timestamp()
+    )
+
+    __table_args__ = (Index("ix_ledger_records_user_id_created_at_id", "user_id", "created_at", "id"),)
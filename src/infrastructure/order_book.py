@@ -0,0 +1,247 @@
+from asyncio import Lock, Task, create_task, get_running_loop, sleep
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from typing import Any, Iterable, Iterator
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from src.application.common.const import ShopType
+from src.application.common.utils import get_file_logger
+from src.application.interfaces.events import EventSubscriber
+from src.domain.entities.market import GiftFiltersDM, OrderDM
+from src.infrastructure.database.mapping import dm_columns, to_dms
+from src.infrastructure.models.order import Order
+from src.presentation.api.market.params import GiftSortParams
+
+
+logger = get_file_logger(__name__, "src/logs/market.log")
+
+CHANGED_ORDERS_KEY = "order_book_changed_orders"
+BUCKET_FIELDS = ("type", "rarity", "model_name")
+SORT_FIELDS = ("price", "created_at")
+LOAD_RETRY_SECONDS = 5
+
+
+class OrderBook:
+    """In-process index of the active market orders.
+
+    Orders changed through MarketGateway are re-read after the transaction commits, changes
+    made by other processes are re-read from the market events. The periodic consistency
+    check catches the changes that were not announced
+    """
+
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession], is_enabled: bool) -> None:
+        self._session_maker = session_maker
+        self._is_enabled = is_enabled
+        self._is_ready = False
+        self._lock = Lock()
+        self._tasks: set[Task] = set()
+        self._orders: dict[int, OrderDM] = {}
+        self._buckets: dict[str, dict[Any, set[int]]] = {}
+        self._sorted: dict[tuple[str, bool], list[tuple[Any, int]]] = {}
+        self._reset({})
+        if is_enabled:
+            event.listen(Session, "after_commit", self._on_commit)
+            event.listen(Session, "after_soft_rollback", self._on_rollback)
+
+    @property
+    def is_ready(self) -> bool:
+        return self._is_enabled and self._is_ready
+
+    def track(self, session: AsyncSession, orders_ids: Iterable[int]) -> None:
+        if self._is_enabled:
+            session.info.setdefault(CHANGED_ORDERS_KEY, set()).update(orders_ids)
+
+    async def load(self) -> None:
+        async with self._lock:
+            self._reset(await self._fetch_active_orders())
+            self._is_ready = True
+        logger.info(f"OrderBook: loaded {len(self._orders)} active orders")
+
+    async def refresh(self, orders_ids: set[int]) -> None:
+        async with self._lock, self._session_maker() as session:
+            stmt = select(*dm_columns(Order, OrderDM)).where(
+                Order.id.in_(orders_ids),
+                Order.is_active == True,
+                Order.is_completed == False,
+                Order.price != None,
+            )
+            orders = {order.id: order for order in to_dms(OrderDM, await session.execute(stmt))}
+            for order_id in orders_ids:
+                self._remove(order_id)
+                if order := orders.get(order_id):
+                    self._add(order)
+
+    async def check(self) -> list[int]:
+        """Compare the index with the database, rebuild it and return the ids that differed"""
+
+        async with self._lock:
+            orders = await self._fetch_active_orders()
+            mismatched = [
+                order_id
+                for order_id in orders.keys() | self._orders.keys()
+                if orders.get(order_id) != self._orders.get(order_id)
+            ]
+            if mismatched:
+                self._reset(orders)
+        return sorted(mismatched)
+
+    def get_one(self, order_id: int) -> OrderDM | None:
+        return self._orders.get(order_id)
+
+    def get_all_gifts(
+        self, filters: GiftFiltersDM, sort_by: GiftSortParams | None
+    ) -> list[OrderDM]:
+        if filters.limit == 0:
+            return []
+        candidates = self._get_candidates(filters)
+        offset, gifts = filters.offset or 0, []
+        for order_id in self._iter_sorted(filters, sort_by):
+            if candidates is not None and order_id not in candidates:
+                continue
+            order = self._orders[order_id]
+            if not self._matches(order, filters):
+                continue
+            if offset:
+                offset -= 1
+                continue
+            gifts.append(order)
+            if filters.limit and len(gifts) == filters.limit:
+                break
+        return gifts
+
+    def _iter_sorted(self, filters: GiftFiltersDM, sort_by: GiftSortParams | None) -> Iterator[int]:
+        field, is_ascending = "created_at", sort_by is GiftSortParams.OLDEST
+        if sort_by in (GiftSortParams.PRICE_LOW_TO_HIGH, GiftSortParams.PRICE_HIGH_TO_LOW):
+            field, is_ascending = "price", sort_by is GiftSortParams.PRICE_LOW_TO_HIGH
+        cursor = filters.cursor
+        for is_vip in (True, False):
+            entries = self._sorted[field, is_vip]
+            start, stop = (0, len(entries)) if is_ascending else (len(entries) - 1, -1)
+            if cursor and cursor.is_vip is False and is_vip:
+                continue
+            if cursor and cursor.is_vip is is_vip:
+                key = (getattr(cursor, field), cursor.id)
+                start = bisect_left(entries, key) - 1
+                if is_ascending:
+                    start = bisect_right(entries, key)
+            for index in range(start, stop, 1 if is_ascending else -1):
+                yield entries[index][1]
+
+    def _get_candidates(self, filters: GiftFiltersDM) -> set[int] | None:
+        buckets = []
+        for field, values in (
+            ("type", filters.types),
+            ("rarity", filters.rarities),
+            ("model_name", filters.model_names),
+        ):
+            if values and not set(values) >= self._buckets[field].keys():
+                bucket = self._buckets[field]
+                buckets.append(set().union(*(bucket.get(value, ()) for value in values)))
+        return set.intersection(*sorted(buckets, key=len)) if buckets else None
+
+    def _matches(self, order: OrderDM, filters: GiftFiltersDM) -> bool:
+        if not filters.from_price <= order.price <= filters.to_price:
+            return False
+        if not filters.from_gift_number <= order.number <= filters.to_gift_number:
+            return False
+        if filters.shop_type is ShopType.AUCTION:
+            return order.min_step is not None
+        if filters.shop_type is ShopType.MARKET:
+            return order.min_step is None
+        return True
+
+    def _reset(self, orders: dict[int, OrderDM]) -> None:
+        self._orders = {}
+        self._buckets = {field: defaultdict(set) for field in BUCKET_FIELDS}
+        self._sorted = {(field, is_vip): [] for field in SORT_FIELDS for is_vip in (True, False)}
+        for order in orders.values():
+            self._orders[order.id] = order
+            for field in BUCKET_FIELDS:
+                self._buckets[field][getattr(order, field)].add(order.id)
+            for field, value in self._sort_values(order):
+                self._sorted[field, order.is_vip].append((value, order.id))
+        for entries in self._sorted.values():
+            entries.sort()
+
+    def _add(self, order: OrderDM) -> None:
+        self._orders[order.id] = order
+        for field in BUCKET_FIELDS:
+            self._buckets[field][getattr(order, field)].add(order.id)
+        for field, value in self._sort_values(order):
+            insort(self._sorted[field, order.is_vip], (value, order.id))
+
+    def _remove(self, order_id: int) -> None:
+        if not (order := self._orders.pop(order_id, None)):
+            return
+        for field in BUCKET_FIELDS:
+            self._buckets[field][getattr(order, field)].discard(order_id)
+        for field, value in self._sort_values(order):
+            entries = self._sorted[field, order.is_vip]
+            index = bisect_left(entries, (value, order_id))
+            if index < len(entries) and entries[index] == (value, order_id):
+                del entries[index]
+
+    def _sort_values(self, order: OrderDM) -> tuple[tuple[str, Any], ...]:
+        return ("price", order.price), ("created_at", order.created_at)
+
+    async def _fetch_active_orders(self) -> dict[int, OrderDM]:
+        stmt = select(*dm_columns(Order, OrderDM)).where(
+            Order.is_active == True, Order.is_completed == False, Order.price != None
+        )
+        async with self._session_maker() as session:
+            result = await session.execute(stmt)
+            return {order.id: order for order in to_dms(OrderDM, result)}
+
+    def _on_commit(self, session: Session) -> None:
+        if not (orders_ids := session.info.pop(CHANGED_ORDERS_KEY, None)):
+            return
+        task = get_running_loop().create_task(self.refresh(orders_ids))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _on_rollback(self, session: Session, previous_transaction) -> None:
+        session.info.pop(CHANGED_ORDERS_KEY, None)
+
+
+async def run_order_book(
+    order_book: OrderBook, check_interval: int, events: EventSubscriber
+) -> None:
+    while True:
+        try:
+            await order_book.load()
+            break
+        except Exception as e:
+            logger.error(f"OrderBook: load failed: {e}")
+            await sleep(LOAD_RETRY_SECONDS)
+
+    events_task = create_task(follow_market_events(order_book, events))
+    try:
+        while True:
+            await sleep(check_interval)
+            try:
+                if mismatched := await order_book.check():
+                    logger.warning(f"OrderBook: rebuilt, {len(mismatched)} orders were out of date")
+            except Exception as e:
+                logger.error(f"OrderBook: consistency check failed: {e}")
+    finally:
+        events_task.cancel()
+
+
+async def follow_market_events(order_book: OrderBook, events: EventSubscriber) -> None:
+    """Re-read the orders other processes announce on the market events channel, check the
+    whole book when the subscription restarts and events may have been missed
+    """
+
+    async for event in events.follow():
+        try:
+            if event:
+                await order_book.refresh({event.gift_id})
+            elif mismatched := await order_book.check():
+                logger.warning(
+                    f"OrderBook: rebuilt after resubscribing, {len(mismatched)} orders were stale"
+                )
+        except Exception as e:
+            logger.error(f"OrderBook: failed to apply a market event: {e}")
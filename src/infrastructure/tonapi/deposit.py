@@ -1,8 +1,9 @@
 from aiogram import Bot
 from pytonapi import AsyncTonapi
 
-from src.application.common.const import HistoryType
+from src.application.common.const import HistoryType, LedgerRecordType
 from src.application.common.utils import send_message
+from src.application.interfaces.cache import UserCache
 from src.domain.entities.history import CreateHistoryDM
 from src.domain.entities.user import UpdateUserBalanceDM, UserDM
 from src.entrypoint.config import Config, PostgresConfig
@@ -13,7 +14,7 @@ from src.infrastructure.gateways.user import UserGateway
 from src.presentation.bot.services.text import get_deposit_text
 
 
-async def run_tracker(config: Config, bot: Bot) -> None:
+async def run_tracker(config: Config, bot: Bot, user_cache: UserCache) -> None:
     tonapi = AsyncTonapi(config.tonapi.TONAPI_TOKEN, is_testnet=config.tonapi.IS_TESTNET)
     after_lt = await get_last_lt(config.postgres)
     try:
@@ -42,7 +43,9 @@ async def run_tracker(config: Config, bot: Bot) -> None:
             continue
         if ton_amount <= 0:
             continue
-        user = await update_user_balance_and_lt(comment, ton_amount, transaction.lt, config.postgres)
+        user = await update_user_balance_and_lt(
+            comment, ton_amount, transaction.lt, config.postgres, user_cache
+        )
         if user:
             message = get_deposit_text(
                 user.username, user.id, config.tonapi.IS_TESTNET, ton_amount, transaction.hash
@@ -56,12 +59,18 @@ async def run_tracker(config: Config, bot: Bot) -> None:
 
 
 async def update_user_balance_and_lt(
-        comment: str, ton_amount: float, new_lt: int, postgres_config: PostgresConfig
+        comment: str,
+        ton_amount: float,
+        new_lt: int,
+        postgres_config: PostgresConfig,
+        user_cache: UserCache,
 ) -> UserDM | None:
     session_maker = new_session_maker(postgres_config)
     async with session_maker() as session:
-        user = await UserGateway(session).update_balance(
-            UpdateUserBalanceDM(amount=ton_amount, deposit_comment=comment)
+        user = await UserGateway(session, user_cache).update_balance(
+            UpdateUserBalanceDM(
+                amount=ton_amount, deposit_comment=comment, type=LedgerRecordType.DEPOSIT
+            )
         )
         if not user:
             return
@@ -2,14 +2,31 @@ from fastapi import HTTPException, Request
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_401_UNAUTHORIZED, HTTP_403_FORBIDDEN
 
 from src.application.interfaces.auth import TokenDecoder
+from src.application.interfaces.cache import UserCache
 from src.application.interfaces.user import UserReader
 from src.domain.entities.user import UserDM
 from src.infrastructure.gateways.errors import TokenError
 
 
+def get_token_user_id(request: Request, token_gateway: TokenDecoder) -> int | None:
+    """The user of a valid token, None for anonymous requests and invalid tokens"""
+
+    if not (token := request.headers.get("Authorization")):
+        return None
+    try:
+        return int(token_gateway.decode(token)["user_id"])
+    except (TokenError, KeyError, ValueError):
+        return None
+
+
 async def get_user_by_token(
-    request: Request, user_gateway: UserReader, token_gateway: TokenDecoder
+    request: Request,
+    user_gateway: UserReader,
+    token_gateway: TokenDecoder,
+    user_cache: UserCache | None = None,
 ) -> UserDM:
+    """Authenticate the request, user_cache is skipped when None"""
+
     token = request.headers.get("Authorization")
     if not token:
         raise HTTPException(HTTP_401_UNAUTHORIZED)
@@ -20,9 +37,14 @@ async def get_user_by_token(
         raise HTTPException(HTTP_401_UNAUTHORIZED, str(e))
 
     try:
-        user = await user_gateway.get_by_id(user_id=int(data["user_id"]))
+        user_id = int(data["user_id"])
     except ValueError:
         raise HTTPException(HTTP_401_UNAUTHORIZED)
+    user = await user_cache.get(user_id) if user_cache else None
+    if not user:
+        user = await user_gateway.get_by_id(user_id=user_id)
+        if user and user_cache:
+            await user_cache.set(user)
     if not user:
         raise HTTPException(HTTP_400_BAD_REQUEST, "User does not exist")
     if user.is_banned:
@@ -1,17 +1,20 @@
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 from starlette.status import HTTP_400_BAD_REQUEST, HTTP_403_FORBIDDEN, HTTP_404_NOT_FOUND
 
+from src.application.common.const import NEXT_CURSOR_HEADER
 from src.application.dto.giveaway import CreateGiveawayDTO, JoinGiveawayDTO
 from src.application.interactors import errors
 from src.application.interactors import giveaway as interactors
+from src.application.interfaces.auth import TokenDecoder
 from src.domain.entities.giveaway import (
     FullGiveawayDM,
     GiveawayDM,
     GiveawayParticipantDM,
     TelegramChannelDM,
 )
+from src.presentation.api.authentication import get_token_user_id
 
 
 giveaway_router = APIRouter(tags=["Giveaway"])
@@ -57,21 +60,37 @@ async def check_giveaway_subscribes(
 @giveaway_router.get("/giveaway/{id}/participants")
 @inject
 async def get_giveaway_participants(
-    id: int, interactor: FromDishka[interactors.GetGiveawayParticipantsInteractor]
+    id: int,
+    interactor: FromDishka[interactors.GetGiveawayParticipantsInteractor],
+    response: Response,
+    limit: int = Query(default=100, ge=1, le=500),
+    cursor: str | None = Query(default=None, max_length=512),
 ) -> list[GiveawayParticipantDM]:
+    """Participants in the order they joined"""
+
     try:
-        return await interactor(id)
+        page = await interactor(id, limit, cursor)
     except errors.NotFoundError as e:
         raise HTTPException(HTTP_404_NOT_FOUND, str(e))
+    except errors.InvalidCursorError as e:
+        raise HTTPException(HTTP_400_BAD_REQUEST, str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.participants
 
 
 @giveaway_router.post("/giveaway/{id}")
 @inject
 async def get_giveaway(
-    id: int, interactor: FromDishka[interactors.GetGiveawayInteractor]
+    id: int,
+    request: Request,
+    interactor: FromDishka[interactors.GetGiveawayInteractor],
+    token_gateway: FromDishka[TokenDecoder],
 ) -> FullGiveawayDM:
+    """The page stays public, is_participant is only set for a request with a valid token"""
+
     try:
-        return await interactor(id)
+        return await interactor(id, get_token_user_id(request, token_gateway))
     except errors.NotFoundError as e:
         raise HTTPException(HTTP_404_NOT_FOUND, str(e))
 
@@ -0,0 +1,121 @@
+from asyncio import create_task, sleep
+from hashlib import sha256
+from json import dumps, loads
+from time import monotonic
+
+from fastapi import Request, Response
+from starlette import status
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.application.common.const import IDEMPOTENCY_KEY_HEADER, IDEMPOTENT_REPLAYED_HEADER
+from src.application.interfaces.idempotency import IdempotencyStorage
+from src.entrypoint.config import AppConfig, IdempotencyConfig
+from src.infrastructure.gateways.auth import TokenGateway
+from src.presentation.api.authentication import get_token_user_id
+
+
+IDEMPOTENT_PATHS = frozenset(
+    (
+        "/market/order/buy",
+        "/market/order/new-bid",
+        "/market/cart/buy",
+        "/star/buy",
+        "/star/cancel",
+        "/star/seller-accept",
+        "/star/seller-cancel",
+        "/star/confirm",
+        "/star/accept-receipt",
+        "/create-withdraw-request",
+    )
+)
+POLL_INTERVAL_SECONDS = 0.1
+
+
+class IdempotencyMiddleware(BaseHTTPMiddleware):
+    """Runs a money-moving request once per Idempotency-Key and replays the stored response.
+
+    Keys are scoped to the user, so a refreshed token still replays the stored response.
+    A duplicate that arrives while the first call is running waits for its result, the lock
+    is extended for as long as that call runs
+    """
+
+    def __init__(self, app, config: IdempotencyConfig, app_config: AppConfig) -> None:
+        super().__init__(app)
+        self._config = config
+        self._token_gateway = TokenGateway(app_config)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        idempotency_key = request.headers.get(IDEMPOTENCY_KEY_HEADER)
+        if not idempotency_key or request.url.path not in IDEMPOTENT_PATHS:
+            return await call_next(request)
+        if len(idempotency_key) > 255:
+            return self._error(status.HTTP_400_BAD_REQUEST, "Idempotency-Key is too long")
+        if not (user_id := get_token_user_id(request, self._token_gateway)):
+            return await call_next(request)
+
+        storage: IdempotencyStorage = await request.app.state.dishka_container.get(
+            IdempotencyStorage
+        )
+        scope = f"{user_id}:{request.url.path}:{idempotency_key}"
+        key = f"idempotency:{sha256(scope.encode()).hexdigest()}"
+        fingerprint = sha256(await request.body()).hexdigest()
+
+        pending = dumps({"fingerprint": fingerprint})
+        while not await storage.acquire(key, pending, self._config.IDEMPOTENCY_LOCK_TTL):
+            if replayed := await self._wait_for_result(storage, key, fingerprint):
+                return replayed
+
+        lock_task = create_task(self._keep_lock(storage, key))
+        try:
+            response = await call_next(request)
+            body = b"".join([chunk async for chunk in response.body_iterator])  # type: ignore
+        except Exception:
+            await storage.release(key)
+            raise
+        finally:
+            lock_task.cancel()
+        if response.status_code >= status.HTTP_500_INTERNAL_SERVER_ERROR:
+            await storage.release(key)
+        else:
+            stored = {
+                "fingerprint": fingerprint,
+                "status_code": response.status_code,
+                "media_type": response.media_type or response.headers.get("content-type"),
+                "body": body.decode(),
+            }
+            await storage.save(key, dumps(stored), self._config.IDEMPOTENCY_TTL)
+        return Response(body, response.status_code, dict(response.headers))
+
+    async def _keep_lock(self, storage: IdempotencyStorage, key: str) -> None:
+        while True:
+            await sleep(self._config.IDEMPOTENCY_LOCK_TTL / 3)
+            await storage.refresh(key, self._config.IDEMPOTENCY_LOCK_TTL)
+
+    async def _wait_for_result(
+        self, storage: IdempotencyStorage, key: str, fingerprint: str
+    ) -> Response | None:
+        """Wait for the running request, None if it failed and the key can be taken again"""
+
+        deadline = monotonic() + self._config.IDEMPOTENCY_WAIT_TIMEOUT
+        while True:
+            if not (value := await storage.get(key)):
+                return
+            stored = loads(value)
+            if stored["fingerprint"] != fingerprint:
+                return self._error(
+                    status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    "Idempotency-Key was already used with another request",
+                )
+            if "status_code" in stored:
+                return Response(
+                    stored["body"],
+                    stored["status_code"],
+                    {IDEMPOTENT_REPLAYED_HEADER: "true"},
+                    media_type=stored["media_type"],
+                )
+            if monotonic() >= deadline:
+                return self._error(status.HTTP_409_CONFLICT, "The original request is in progress")
+            await sleep(POLL_INTERVAL_SECONDS)
+
+    def _error(self, status_code: int, detail: str) -> Response:
+        return Response(dumps({"detail": detail}), status_code, media_type="application/json")
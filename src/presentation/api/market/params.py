@@ -18,8 +18,10 @@ class GiftFilterParams:
         type: list[str] | None = Query(default=None, alias="type[]"),
         model_name: list[str] | None = Query(default=None, alias="model_name[]"),
         shop_type: ShopType | None = Query(default=ShopType.MARKET),
+        cursor: str | None = Query(default=None, max_length=512),
     ) -> None:
         self.offset = offset
+        self.cursor = cursor
         self.limit = limit
         self.from_price = from_price
         self.to_price = to_price
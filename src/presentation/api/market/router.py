@@ -1,15 +1,28 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator
 
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 from starlette import status
 
 from src.application.common.cart import CartGiftDTO, ResponseCartDTO
+from src.application.common.const import MARKET_EVENTS_KEEPALIVE, NEXT_CURSOR_HEADER
 from src.application.dto.common import ResponseDTO
 from src.application.dto.market import BidDTO, CreateOrderDTO, OrderIdDTO
 from src.application.interactors import errors, market
-from src.domain.entities.market import BidSuccessDM, OrderDM, ReadOrderDM
+from src.application.interfaces.events import EventSubscriber
+from src.domain.entities.market import (
+    BidsSummaryDM,
+    BidSuccessDM,
+    GiftFacetsDM,
+    OrderDM,
+    PurchaseDM,
+    ReadBidDM,
+    ReadOrderDM,
+)
+from src.domain.entities.user import UserDM
+from src.infrastructure.database.session import ReplicaSession
 from src.presentation.api.market.params import GiftFilterParams, GiftSortParams
 
 
@@ -21,9 +34,16 @@ market_router = APIRouter(prefix="/market", tags=["Market"])
 async def get_all_gifts(
     filters: Annotated[GiftFilterParams, Depends()],
     interactor: FromDishka[market.GetGiftsInteractor],
+    response: Response,
     sort_by: GiftSortParams | None = None,
 ) -> list[OrderDM]:
-    return await interactor(filters, sort_by)
+    try:
+        page = await interactor(filters, sort_by)
+    except errors.InvalidCursorError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.gifts
 
 
 @market_router.get("/gifts/auction")
@@ -31,9 +51,53 @@ async def get_all_gifts(
 async def get_all_auction_gifts(
     filters: Annotated[GiftFilterParams, Depends()],
     interactor: FromDishka[market.GetGiftsInteractor],
+    response: Response,
     sort_by: GiftSortParams | None = None,
 ) -> list[OrderDM]:
-    return await interactor(filters, sort_by)
+    try:
+        page = await interactor(filters, sort_by)
+    except errors.InvalidCursorError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.gifts
+
+
+@market_router.get("/gifts/facets")
+@inject
+async def get_gift_facets(
+    filters: Annotated[GiftFilterParams, Depends()],
+    interactor: FromDishka[market.GetGiftFacetsInteractor],
+) -> GiftFacetsDM:
+    """Counts per rarity, type and model name and the price range for the filter panel"""
+
+    return await interactor(filters)
+
+
+@market_router.get("/events")
+@inject
+async def market_events(
+    user: FromDishka[UserDM],
+    session: FromDishka[ReplicaSession],
+    subscriber: FromDishka[EventSubscriber],
+) -> StreamingResponse:
+    """Server-sent events about new listings, price changes, sales, delistings and bids"""
+
+    # the stream outlives the request, release the connection the authentication may hold
+    await session.close()
+
+    async def stream() -> AsyncIterator[str]:
+        async for event in subscriber.listen(MARKET_EVENTS_KEEPALIVE):
+            if event is None:
+                yield ": keepalive\n\n"
+            else:
+                yield f"event: {event.type}\ndata: {event.model_dump_json()}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @market_router.get("/gifts/{id}")
@@ -45,6 +109,38 @@ async def get_gift_by_id(id: int, interactor: FromDishka[market.GetGiftInteracto
         raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
 
 
+@market_router.get("/gifts/{id}/bids")
+@inject
+async def get_gift_bids(
+    id: int,
+    interactor: FromDishka[market.GetGiftBidsInteractor],
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, max_length=512),
+) -> list[ReadBidDM]:
+    """Bid history of an auction, newest first"""
+
+    try:
+        page = await interactor(id, limit, cursor)
+    except errors.InvalidCursorError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.bids
+
+
+@market_router.get("/gifts/{id}/bids/summary")
+@inject
+async def get_gift_bids_summary(
+    id: int,
+    interactor: FromDishka[market.GetGiftBidsSummaryInteractor],
+    top: int = Query(default=3, ge=1, le=50),
+) -> BidsSummaryDM:
+    """Number of bids and bidders and the highest bids of an auction"""
+
+    return await interactor(id, top)
+
+
 @market_router.post("/order/create")
 @inject
 async def create_order(
@@ -66,17 +162,24 @@ async def create_order(
 
 @market_router.post("/order/buy")
 @inject
-async def buy_gift(dto: OrderIdDTO, interactor: FromDishka[market.BuyGiftInteractor]) -> ResponseDTO:
+async def buy_gift(
+    dto: OrderIdDTO, interactor: FromDishka[market.BuyGiftInteractor]
+) -> PurchaseDM:
+    """Reserve the gift and charge the buyer, the transfer is tracked by the purchase status"""
+
     try:
-        await interactor(dto.id)
-    except (
-        errors.NotFoundError,
-        errors.NotEnoughBalanceError,
-        errors.NotAccessError,
-        errors.GiftSendError,
-    ) as e:
+        return await interactor(dto.id)
+    except (errors.NotFoundError, errors.NotEnoughBalanceError, errors.NotAccessError) as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
-    return ResponseDTO(success=True)
+
+
+@market_router.get("/purchases/{id}")
+@inject
+async def get_purchase(id: int, interactor: FromDishka[market.GetPurchaseInteractor]) -> PurchaseDM:
+    try:
+        return await interactor(id)
+    except errors.NotFoundError as e:
+        raise HTTPException(status.HTTP_404_NOT_FOUND, str(e))
 
 
 @market_router.post("/order/new-bid")
@@ -95,10 +198,9 @@ async def new_bid(dto: BidDTO, interactor: FromDishka[market.NewBidInteractor])
 async def buy_many_gifts(
     dto: list[CartGiftDTO],
     interactor: FromDishka[market.BuyGiftsFromCartInteractor],
-    background_tasks: BackgroundTasks,
 ) -> ResponseCartDTO:
     try:
-        is_success, cart = await interactor(dto, background_tasks)
+        is_success, cart = await interactor(dto)
     except errors.NotEnoughBalanceError as e:
         raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
     return ResponseCartDTO(success=is_success, cart=cart)
@@ -6,19 +6,46 @@ from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.base import BaseHTTPMiddleware
 
+from src.application.common.const import (
+    DB_QUERIES_HEADER,
+    DB_REPEATED_QUERIES_HEADER,
+    DB_ROWS_HEADER,
+    DB_TIME_HEADER,
+    IDEMPOTENT_REPLAYED_HEADER,
+    NEXT_CURSOR_HEADER,
+)
 from src.application.common.utils import get_file_logger, send_message
 from src.entrypoint.config import BotConfig, Config
+from src.presentation.api.idempotency import IdempotencyMiddleware
+from src.presentation.api.primary_pin import PrimaryPinMiddleware
+from src.presentation.api.sql_stats import SQLStatsMiddleware
 
 
 logger = get_file_logger(__name__, "src/logs/errors.log")
 
 
 def setup_middlewares(app: FastAPI, config: Config, bot: Bot) -> None:
+    # the last added middleware is the outermost, CORS wraps every response but the
+    # exception handler's, including the ones the idempotency middleware answers by itself
+    if config.postgres.replica_urls:
+        app.add_middleware(PrimaryPinMiddleware, config.app)
+    app.add_middleware(IdempotencyMiddleware, config.idempotency, config.app)
+    if config.postgres.POSTGRES_SQL_STATS:
+        app.add_middleware(SQLStatsMiddleware, config)
     app.add_middleware(
         CORSMiddleware,
         allow_origins=config.app.cors_allowed_origins,
         allow_methods=["OPTIONS", "GET", "POST", "PUT", "PATCH", "DELETE"],
         allow_headers=["*"],
+        expose_headers=[
+            NEXT_CURSOR_HEADER,
+            IDEMPOTENT_REPLAYED_HEADER,
+            DB_QUERIES_HEADER,
+            DB_ROWS_HEADER,
+            DB_TIME_HEADER,
+            DB_REPEATED_QUERIES_HEADER,
+            "Server-Timing",
+        ],
         allow_credentials=True,
     )
     app.add_middleware(HandleExceptionMiddleware, bot, config.bot)
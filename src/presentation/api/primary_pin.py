@@ -0,0 +1,31 @@
+from fastapi import Request, Response
+from starlette import status
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.application.interfaces.database import PrimaryPin
+from src.entrypoint.config import AppConfig
+from src.infrastructure.gateways.auth import TokenGateway
+from src.presentation.api.authentication import get_token_user_id
+
+
+READ_METHODS = frozenset(("GET", "HEAD", "OPTIONS"))
+
+
+class PrimaryPinMiddleware(BaseHTTPMiddleware):
+    """Pins the user to the primary after a successful write, so their next reads see it.
+
+    The pin is set before the response is sent, so it is in place for the next request
+    """
+
+    def __init__(self, app, app_config: AppConfig) -> None:
+        super().__init__(app)
+        self._token_gateway = TokenGateway(app_config)
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        response = await call_next(request)
+        if request.method in READ_METHODS or response.status_code >= status.HTTP_400_BAD_REQUEST:
+            return response
+        if user_id := get_token_user_id(request, self._token_gateway):
+            primary_pin: PrimaryPin = await request.app.state.dishka_container.get(PrimaryPin)
+            await primary_pin.pin(user_id)
+        return response
@@ -0,0 +1,86 @@
+from json import dumps
+
+from fastapi import Request, Response
+from starlette.middleware.base import BaseHTTPMiddleware
+
+from src.application.common.const import (
+    DB_QUERIES_HEADER,
+    DB_REPEATED_QUERIES_HEADER,
+    DB_ROWS_HEADER,
+    DB_TIME_HEADER,
+)
+from src.application.common.utils import get_file_logger
+from src.entrypoint.config import Config
+from src.infrastructure.database.stats import SQLStats, start_sql_stats, stop_sql_stats
+
+
+logger = get_file_logger(__name__, "src/logs/sql.log")
+
+
+class SQLStatsMiddleware(BaseHTTPMiddleware):
+    """Counts the queries, rows and database time of every request and of its interactors.
+
+    Statements run POSTGRES_REPEATED_QUERY_THRESHOLD times in one request are flagged as N+1.
+    In debug mode the numbers go to the response headers, otherwise one line per request
+    goes to sql.log
+    """
+
+    def __init__(self, app, config: Config) -> None:
+        super().__init__(app)
+        self._debug = config.app.DEBUG
+        self._threshold = config.postgres.POSTGRES_REPEATED_QUERY_THRESHOLD
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        stats, token = start_sql_stats()
+        try:
+            response = await call_next(request)
+        finally:
+            stop_sql_stats(token)
+        if not stats.total.queries:
+            return response
+
+        repeated = stats.get_repeated(self._threshold)
+        for shape, count in repeated.items():
+            logger.warning(f"{request.method} {request.url.path}: ran {count} times: {shape}")
+        if self._debug:
+            response.headers.update(self._get_headers(stats, repeated))
+        else:
+            logger.info(self._get_record(request, response, stats, repeated))
+        return response
+
+    def _get_headers(self, stats: SQLStats, repeated: dict[str, int]) -> dict[str, str]:
+        timings = [f'db;dur={stats.total.duration * 1000:.2f};desc="{stats.total.queries} queries"']
+        timings.extend(
+            f'{name};dur={counter.duration * 1000:.2f};desc="{counter.queries} queries"'
+            for name, counter in stats.interactors.items()
+        )
+        return {
+            DB_QUERIES_HEADER: str(stats.total.queries),
+            DB_ROWS_HEADER: str(stats.total.rows),
+            DB_TIME_HEADER: f"{stats.total.duration * 1000:.2f}",
+            DB_REPEATED_QUERIES_HEADER: str(len(repeated)),
+            "Server-Timing": ", ".join(timings),
+        }
+
+    def _get_record(
+        self, request: Request, response: Response, stats: SQLStats, repeated: dict[str, int]
+    ) -> str:
+        return dumps(
+            {
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "queries": stats.total.queries,
+                "rows": stats.total.rows,
+                "time_ms": round(stats.total.duration * 1000, 2),
+                "interactors": {
+                    name: {
+                        "queries": counter.queries,
+                        "rows": counter.rows,
+                        "time_ms": round(counter.duration * 1000, 2),
+                    }
+                    for name, counter in stats.interactors.items()
+                },
+                "repeated_queries": len(repeated),
+            }
+        )
@@ -1,8 +1,11 @@
+from datetime import datetime
+
 from dishka import FromDishka
 from dishka.integrations.fastapi import inject
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 from starlette import status
 
+from src.application.common.const import NEXT_CURSOR_HEADER
 from src.application.dto.common import ResponseDTO
 from src.application.dto.market import OrderIdDTO, UpdateOrderDTO
 from src.application.dto.user import LoginDTO, TokenDTO, UserDTO
@@ -10,10 +13,12 @@ from src.application.interactors import user
 from src.application.interactors.errors import (
     AlreadyExistError,
     GiftSendError,
+    InvalidCursorError,
     NotAccessError,
     NotFoundError,
 )
 from src.domain.entities.market import OrderDM, UserGiftDM
+from src.domain.entities.user import BalanceAtDM, LedgerRecordDM
 
 
 user_router = APIRouter(prefix="/user", tags=["User"])
@@ -39,6 +44,35 @@ async def get_current_user(interactor: FromDishka[user.GetUserInteractor]) -> Us
     return await interactor()
 
 
+@user_router.get("/balance")
+@inject
+async def get_balance_at(
+    interactor: FromDishka[user.GetBalanceAtInteractor], at: datetime = Query()
+) -> BalanceAtDM:
+    """Balance of the current user as it was at the given time"""
+
+    return await interactor(at)
+
+
+@user_router.get("/balance/ledger")
+@inject
+async def get_ledger(
+    interactor: FromDishka[user.GetLedgerInteractor],
+    response: Response,
+    limit: int = Query(default=50, ge=1, le=100),
+    cursor: str | None = Query(default=None, max_length=512),
+) -> list[LedgerRecordDM]:
+    """Balance changes of the current user, newest first"""
+
+    try:
+        page = await interactor(limit, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status.HTTP_400_BAD_REQUEST, str(e))
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.records
+
+
 @user_router.get("/gifts")
 @inject
 async def get_user_gifts(
@@ -2,6 +2,8 @@ from aiogram import F, Router
 from aiogram.filters import Command, CommandStart
 from aiogram.types import Message
 
+from src.application.interfaces.cache import UserCache
+from src.application.interfaces.events import EventPublisher
 from src.entrypoint.config import Config
 from src.presentation.bot.services import market, text, user
 
@@ -43,7 +45,7 @@ async def user_info_handler(message: Message, config: Config) -> Message | None:
 
 
 @router.message(F.text.startswith("/ban"))
-async def ban_handler(message: Message, config: Config) -> Message | None:
+async def ban_handler(message: Message, config: Config, user_cache: UserCache) -> Message | None:
     if message.from_user.id not in config.bot.moderators_chat_id:
         return
     try:
@@ -52,13 +54,13 @@ async def ban_handler(message: Message, config: Config) -> Message | None:
         return await message.answer(
             "❌ Неверный формат команды.\nОтправь команду в формате <code>/ban [user id]</code>"
         )
-    if await user.ban_user(config.postgres, user_id):
+    if await user.ban_user(config.postgres, user_cache, user_id):
         return await message.answer(f"✅ Пользователь #{user_id} заблокирован")
     await message.answer(f"❌ Пользователь с id {user_id} не найден")
 
 
 @router.message(F.text.startswith("/unban"))
-async def unban_handler(message: Message, config: Config) -> Message | None:
+async def unban_handler(message: Message, config: Config, user_cache: UserCache) -> Message | None:
     if message.from_user.id not in config.bot.moderators_chat_id:
         return
     try:
@@ -67,13 +69,15 @@ async def unban_handler(message: Message, config: Config) -> Message | None:
         return await message.answer(
             "❌ Неверный формат команды.\nОтправь команду в формате <code>/unban [user id]</code>"
         )
-    if await user.unban_user(config.postgres, user_id):
+    if await user.unban_user(config.postgres, user_cache, user_id):
         return await message.answer(f"✅ Пользователь #{user_id} разблокирован")
     await message.answer(f"❌ Пользователь с id {user_id} не найден")
 
 
 @router.message(F.text.startswith("/addbalance"))
-async def add_balance_handler(message: Message, config: Config) -> Message | None:
+async def add_balance_handler(
+    message: Message, config: Config, user_cache: UserCache
+) -> Message | None:
     if message.from_user.id not in config.bot.moderators_chat_id:
         return
     try:
@@ -84,7 +88,7 @@ async def add_balance_handler(message: Message, config: Config) -> Message | Non
             "❌ Неверный формат команды."
             "\nОтправь команду в формате <code>/addbalance [user id] [amount]</code>"
         )
-    if await user.add_balance_user(config.postgres, user_id, amount):
+    if await user.add_balance_user(config.postgres, user_cache, user_id, amount):
         return await message.answer(f"✅ Баланс пользователю #{user_id} пополнен на {amount} TON")
     await message.answer(f"❌ Пользователь с id {user_id} не найден")
 
@@ -113,7 +117,9 @@ async def order_info_handler(message: Message, config: Config) -> Message | None
 
 
 @router.message(F.text.startswith("/delete"))
-async def delete_order_handler(message: Message, config: Config) -> Message | None:
+async def delete_order_handler(
+    message: Message, config: Config, event_publisher: EventPublisher
+) -> Message | None:
     if message.from_user.id not in config.bot.moderators_chat_id:
         return
     try:
@@ -123,6 +129,6 @@ async def delete_order_handler(message: Message, config: Config) -> Message | No
             "❌ Неверный формат команды.\nОтправь команду в формате <code>/delete [order id]</code>"
         )
 
-    if await market.delete_order(order_id, config.postgres):
+    if await market.delete_order(order_id, config.postgres, event_publisher):
         return await message.answer(f"✅ Ордер с ID {order_id} удалён")
     await message.answer(f"❌ Ордер с ID {order_id} не найден")
@@ -1,7 +1,9 @@
 from datetime import datetime
 
-from src.application.common.const import PriceList
-from src.domain.entities.market import CreateOrderDM, OrderDM
+from src.application.common.const import LedgerRecordType, MarketEventType, PriceList
+from src.application.interfaces.cache import UserCache
+from src.application.interfaces.events import EventPublisher
+from src.domain.entities.market import CreateOrderDM, MarketEventDM, OrderDM
 from src.domain.entities.user import UpdateUserBalanceDM
 from src.entrypoint.config import Config, PostgresConfig
 from src.infrastructure.database.session import new_session_maker
@@ -24,11 +26,16 @@ async def get_gift(order_id: int, postgres_config: PostgresConfig) -> OrderDM |
         return await MarketGateway(session).get_one(id=order_id)
 
 
-async def delete_order(order_id: int, postgres_config: PostgresConfig) -> OrderDM | None:
+async def delete_order(
+    order_id: int, postgres_config: PostgresConfig, event_publisher: EventPublisher
+) -> OrderDM | None:
     session_maker = new_session_maker(postgres_config)
     async with session_maker() as session:
         if order := await MarketGateway(session).delete_order(id=order_id):
             await session.commit()
+            await event_publisher.publish(
+                MarketEventDM(type=MarketEventType.DELISTED, gift_id=order.id)
+            )
             return order
 
 
@@ -49,7 +56,9 @@ async def get_count_gifts(postgres_config: PostgresConfig) -> tuple[int, int]:
     return count_all_orders, count_completed_orders
 
 
-async def cancel_order(order_id: int, postgres_config: PostgresConfig) -> bool:
+async def cancel_order(
+    order_id: int, postgres_config: PostgresConfig, user_cache: UserCache
+) -> bool:
     session_maker = new_session_maker(postgres_config)
     data = dict(buyer_id=None)
 
@@ -57,8 +66,13 @@ async def cancel_order(order_id: int, postgres_config: PostgresConfig) -> bool:
         gateway = MarketGateway(session)
         if not (order := await gateway.get_one(id=order_id)):
             return False
-        await UserGateway(session).update_balance(
-            UpdateUserBalanceDM(id=order.buyer_id, amount=order.price)
+        await UserGateway(session, user_cache).update_balance(
+            UpdateUserBalanceDM(
+                id=order.buyer_id,
+                amount=order.price,
+                type=LedgerRecordType.PURCHASE_REFUND,
+                reference_id=order.id,
+            )
         )
         await gateway.update_order(data, id=order_id)
         await session.commit()
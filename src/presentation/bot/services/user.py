@@ -1,4 +1,6 @@
+from src.application.common.const import LedgerRecordType
 from src.application.common.utils import generate_deposit_comment
+from src.application.interfaces.cache import UserCache
 from src.domain.entities.user import CreateUserDM, FullUserInfoDM, UpdateUserBalanceDM
 from src.entrypoint.config import PostgresConfig
 from src.infrastructure.database.session import new_session_maker
@@ -13,28 +15,33 @@ async def get_count_users(postgres_config: PostgresConfig) -> int:
         return await UserGateway(session).get_count_users()
 
 
-async def ban_user(postgres_config: PostgresConfig, user_id: int) -> bool:
+async def ban_user(postgres_config: PostgresConfig, user_cache: UserCache, user_id: int) -> bool:
     session_maker = new_session_maker(postgres_config)
     async with session_maker() as session:
-        if await UserGateway(session).update_user(dict(is_banned=True), id=user_id):
+        if await UserGateway(session, user_cache).update_user(dict(is_banned=True), id=user_id):
             await session.commit()
             return True
     return False
 
 
-async def unban_user(postgres_config: PostgresConfig, user_id: int) -> bool:
+async def unban_user(postgres_config: PostgresConfig, user_cache: UserCache, user_id: int) -> bool:
     session_maker = new_session_maker(postgres_config)
     async with session_maker() as session:
-        if await UserGateway(session).update_user(dict(is_banned=False), id=user_id):
+        if await UserGateway(session, user_cache).update_user(dict(is_banned=False), id=user_id):
             await session.commit()
             return True
     return False
 
 
-async def add_balance_user(postgres_config: PostgresConfig, user_id: int, amount: float) -> bool:
+async def add_balance_user(
+    postgres_config: PostgresConfig, user_cache: UserCache, user_id: int, amount: float
+) -> bool:
     session_maker = new_session_maker(postgres_config)
     async with session_maker() as session:
-        if await UserGateway(session).update_balance(UpdateUserBalanceDM(id=user_id, amount=amount)):
+        updated_user = await UserGateway(session, user_cache).update_balance(
+            UpdateUserBalanceDM(id=user_id, amount=amount, type=LedgerRecordType.ADJUSTMENT)
+        )
+        if updated_user:
             await session.commit()
             return True
     return False